@@ -3,8 +3,8 @@ import os
 import markdown
 from dotenv import load_dotenv
 import re
-import sqlite3
 import json
+from db_utils import get_db_connection
 from openai import OpenAI
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
@@ -58,8 +58,7 @@ def get_career_path_recommendations(user_skills, quiz_results):
         avg_soft = 0
     
     # Get available career paths from database
-    conn = sqlite3.connect('job_market.db')
-    conn.row_factory = sqlite3.Row
+    conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM career_paths")
     career_paths = [dict(row) for row in cursor.fetchall()]
@@ -173,7 +172,7 @@ def save_user_recommendations(user_id, recommendations):
         bool: Success status
     """
     try:
-        conn = sqlite3.connect('job_market.db')
+        conn = get_db_connection()
         cursor = conn.cursor()
         
         # Clear previous recommendations for this user
@@ -1,23 +1,53 @@
 # app.py
-from flask import Flask, render_template, request, jsonify,redirect
-import sqlite3
-import pandas as pd
+from flask import Flask, Response, render_template, request, jsonify,redirect
 import json
 from datetime import datetime
-import re
+from functools import wraps
 from auth_utils import register_user, login_user, get_user_by_id, get_user_quiz_results
 from flask import session, redirect, url_for, flash
 import json
 from dotenv import load_dotenv
 from ai_utils import get_career_path_recommendations, save_user_recommendations
-from network_analysis import generate_network_html, get_user_similarity_network, get_skill_job_network, get_full_network, get_shared_skills_connections
+from network_analysis import get_shared_skills_connections, get_user_connections, get_graph_data, GRAPH_MAX_PAGE_SIZE, GRAPH_MAX_HOPS
+from graph_cache_utils import get_graph, get_graph_layout, preload_graph_snapshots, GRAPH_KINDS
+from network_jobs_utils import NETWORK_TYPES, get_network_file, start_network_job, get_network_job
+from minhash_utils import get_similar_users, start_minhash_refresher
+from job_market_utils import (
+    TREND_GRANULARITIES,
+    MARKET_PANELS,
+    JOB_MARKET_POSTGRES_ERROR,
+    job_market_indexes_available,
+    normalize_skill,
+    parse_iso_date,
+    build_match_query,
+    encode_cursor,
+    decode_cursor,
+    get_job_columns,
+    prepare_job_market_data,
+    get_market_summary,
+    get_job_count_by_location,
+    get_top_skills,
+    get_salary_distribution,
+    get_experience_required,
+    get_job_posting_trends,
+    get_company_ratings,
+    get_market_dashboard
+)
+from cache_utils import prepare_data_versions, versioned_response
+from db_utils import get_db_connection, get_read_connection, open_private_read_connection, init_app as init_db
+from schema_utils import prepare_database
+from write_behind_utils import execute_write, WriteQueueFull, WritePending
+from user_skills_utils import (
+    load_skills_data,
+    save_user_skills,
+    get_user_skill_profile
+)
 import os
 from pathlib import Path
 from ai_utils import get_resume_tips, get_interview_tips, format_tips_html
 import markdown
 # from interview_utils import generate_initial_interview_questions, generate_follow_up_question, generate_interview_analysis
 from interview_utils import (
-    get_db_connection,
     generate_initial_interview_questions,
     generate_follow_up_question,
     generate_interview_analysis
@@ -28,11 +58,35 @@ load_dotenv()
 
 app = Flask(__name__)
 
-# Database connection helper
-def get_db_connection():
-    conn = sqlite3.connect('job_market.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+# One shared SQLite connection per worker thread, released after each request
+init_db(app)
+
+# Create / upgrade the application tables and their indexes
+prepare_database()
+
+# Build the job skill, dashboard aggregate and full-text search indexes on first start
+prepare_job_market_data()
+
+# Version counters behind the ETags / response cache of the read-only APIs
+prepare_data_versions()
+
+# Load the network graphs from their on-disk snapshots instead of on the first request
+preload_graph_snapshots()
+
+# Build the similar-user MinHash index, then keep it up to date, in the background
+start_minhash_refresher()
+
+def job_market_indexes_required(view):
+    """
+    Answer 501 on PostgreSQL, where the job market indexes a route reads
+    (full-text index, job_skills, parsed columns, aggregates) are never built
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not job_market_indexes_available():
+            return jsonify({"error": JOB_MARKET_POSTGRES_ERROR}), 501
+        return view(*args, **kwargs)
+    return wrapper
 
 @app.template_filter('fromjson')
 def fromjson_filter(value):
@@ -57,246 +111,270 @@ def skill_assessment():
     return render_template('skill_assessment.html')
 
 @app.route('/api/job_count_by_location')
+@job_market_indexes_required
+@versioned_response('job_market')
 def job_count_by_location():
-    conn = get_db_connection()
-    df = pd.read_sql_query("SELECT job_location, COUNT(*) as count FROM job_market_data GROUP BY job_location ORDER BY count DESC LIMIT 10", conn)
+    conn = get_read_connection()
+    result = get_job_count_by_location(conn)
     conn.close()
-    return jsonify(df.to_dict(orient='records'))
+    return jsonify(result)
 
 @app.route('/api/top_skills')
+@job_market_indexes_required
+@versioned_response('job_market')
 def top_skills():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT required_skills FROM job_market_data")
-    all_skills = cursor.fetchall()
+    conn = get_read_connection()
+    skill_list = get_top_skills(conn)
     conn.close()
-    
-    # Process the skills
-    skill_count = {}
-    for row in all_skills:
-        if row['required_skills']:
-            skills = row['required_skills'].split(',')
-            for skill in skills:
-                skill = skill.strip().lower()
-                if skill:
-                    skill_count[skill] = skill_count.get(skill, 0) + 1
-    
-    # Convert to list of dicts and sort
-    skill_list = [{"skill": skill, "count": count} for skill, count in skill_count.items()]
-    skill_list.sort(key=lambda x: x["count"], reverse=True)
-    
-    return jsonify(skill_list[:20])  # Return top 20 skills
+    return jsonify(skill_list)  # Return top 20 skills
 
 @app.route('/api/salary_distribution')
+@job_market_indexes_required
+@versioned_response('job_market')
 def salary_distribution():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT salary_offered FROM job_market_data WHERE salary_offered IS NOT NULL AND salary_offered != ''")
-    salaries = cursor.fetchall()
+    conn = get_read_connection()
+    result = get_salary_distribution(conn)
     conn.close()
-    
-    # Process the salaries
-    salary_ranges = {
-        "0-50k": 0,
-        "50k-75k": 0,
-        "75k-100k": 0,
-        "100k-125k": 0,
-        "125k-150k": 0,
-        "150k+": 0,
-        "Not Specified": 0
-    }
-    
-    for row in salaries:
-        salary_text = row['salary_offered']
-        if not salary_text:
-            salary_ranges["Not Specified"] += 1
-            continue
-        
-        numbers = re.findall(r'\d+', salary_text)
-        if not numbers:
-            salary_ranges["Not Specified"] += 1
-            continue
-        
-        try:
-            max_salary = max(int(num) for num in numbers)
-            if max_salary < 1000:
-                max_salary *= 1000
-                
-            if max_salary <= 50000:
-                salary_ranges["0-50k"] += 1
-            elif max_salary <= 75000:
-                salary_ranges["50k-75k"] += 1
-            elif max_salary <= 100000:
-                salary_ranges["75k-100k"] += 1
-            elif max_salary <= 125000:
-                salary_ranges["100k-125k"] += 1
-            elif max_salary <= 150000:
-                salary_ranges["125k-150k"] += 1
-            else:
-                salary_ranges["150k+"] += 1
-        except:
-            salary_ranges["Not Specified"] += 1
-    
-    result = [{"range": key, "count": value} for key, value in salary_ranges.items()]
     return jsonify(result)
 
 @app.route('/api/experience_required')
+@job_market_indexes_required
+@versioned_response('job_market')
 def experience_required():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT exp_required FROM job_market_data WHERE exp_required IS NOT NULL AND exp_required != ''")
-    experience_data = cursor.fetchall()
+    conn = get_read_connection()
+    result = get_experience_required(conn)
     conn.close()
-    
-    exp_ranges = {
-        "Entry Level (0-2 years)": 0,
-        "Mid Level (3-5 years)": 0,
-        "Senior Level (6-10 years)": 0,
-        "Expert Level (10+ years)": 0,
-        "Not Specified": 0
-    }
-    
-    for row in experience_data:
-        exp_text = row['exp_required']
-        if not exp_text:
-            exp_ranges["Not Specified"] += 1
-            continue
-        
-        numbers = re.findall(r'\d+', exp_text)
-        if not numbers:
-            exp_ranges["Not Specified"] += 1
-            continue
-        
-        try:
-            max_exp = max(int(num) for num in numbers)
-            
-            if max_exp <= 2:
-                exp_ranges["Entry Level (0-2 years)"] += 1
-            elif max_exp <= 5:
-                exp_ranges["Mid Level (3-5 years)"] += 1
-            elif max_exp <= 10:
-                exp_ranges["Senior Level (6-10 years)"] += 1
-            else:
-                exp_ranges["Expert Level (10+ years)"] += 1
-        except:
-            exp_ranges["Not Specified"] += 1
-    
-    result = [{"range": key, "count": value} for key, value in exp_ranges.items()]
     return jsonify(result)
 
 @app.route('/api/company_ratings')
+@job_market_indexes_required
+@versioned_response('job_market')
 def company_ratings():
-    conn = get_db_connection()
-    df = pd.read_sql_query("""
-        SELECT company, AVG(company_rating) as avg_rating, COUNT(*) as job_count 
-        FROM job_market_data 
-        WHERE company_rating IS NOT NULL 
-        GROUP BY company 
-        HAVING job_count > 1
-        ORDER BY avg_rating DESC 
-        LIMIT 10
-    """, conn)
+    conn = get_read_connection()
+    result = get_company_ratings(conn)
     conn.close()
-    return jsonify(df.to_dict(orient='records'))
+    return jsonify(result)
 
 @app.route('/api/job_posting_trends')
+@job_market_indexes_required
+@versioned_response('job_market')
 def job_posting_trends():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT Posted_on FROM job_market_data WHERE Posted_on IS NOT NULL AND Posted_on != ''")
-    posting_dates = cursor.fetchall()
+    start_date = request.args.get('start', '')
+    end_date = request.args.get('end', '')
+    granularity = request.args.get('granularity', 'month')
+    
+    if granularity not in TREND_GRANULARITIES:
+        return jsonify({"error": f"granularity must be one of: {', '.join(TREND_GRANULARITIES)}"}), 400
+    
+    for date_text in (start_date, end_date):
+        if date_text and not parse_iso_date(date_text):
+            return jsonify({"error": "start and end must be YYYY-MM-DD dates"}), 400
+    
+    conn = get_read_connection()
+    result = get_job_posting_trends(conn, granularity, start_date, end_date)
     conn.close()
     
-    date_counts = {}
+    return jsonify(result)
+
+@app.route('/api/market_dashboard')
+@job_market_indexes_required
+@versioned_response('job_market')
+def market_dashboard():
+    """All job market dashboard panels in one response and one DB snapshot"""
+    panels = request.args.get('panels', '')
+    panels = [panel.strip() for panel in panels.split(',') if panel.strip()] or None
     
-    for row in posting_dates:
-        date_text = row['Posted_on']
-        try:
-            date_formats = [
-                "%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", 
-                "%B %d, %Y", "%d %B %Y", "%Y/%m/%d"
-            ]
-            
-            parsed_date = None
-            for fmt in date_formats:
-                try:
-                    parsed_date = datetime.strptime(date_text, fmt)
-                    break
-                except:
-                    continue
-            
-            if parsed_date:
-                month_year = parsed_date.strftime("%Y-%m")
-                date_counts[month_year] = date_counts.get(month_year, 0) + 1
-            else:
-                continue
-        except:
-            continue
+    unknown_panels = [panel for panel in panels or [] if panel not in MARKET_PANELS]
+    if unknown_panels:
+        return jsonify({"error": f"Unknown panels: {', '.join(unknown_panels)}"}), 400
     
-    # Sort by date
-    sorted_dates = sorted(date_counts.items())
-    result = [{"date": date, "count": count} for date, count in sorted_dates]
+    conn = get_read_connection()
+    result = get_market_dashboard(conn, panels)
+    conn.close()
     
     return jsonify(result)
 
 @app.route('/api/job_search')
+@job_market_indexes_required
+@versioned_response('job_market')
 def job_search():
+    """
+    Search jobs. Supports keyset pagination (limit / cursor, next page
+    cursor in the X-Next-Cursor header), field projection (fields=a,b)
+    and NDJSON streaming (format=ndjson).
+    """
+    keywords = request.args.get('q', '')
     skill = request.args.get('skill', '')
     location = request.args.get('location', '')
     exp_min = request.args.get('exp_min', '')
     exp_max = request.args.get('exp_max', '')
+    salary_min = request.args.get('salary_min', '')
+    salary_max = request.args.get('salary_max', '')
+    fields = request.args.get('fields', '')
+    page_cursor = request.args.get('cursor', '')
+    output_format = request.args.get('format', 'json')
+    limit = request.args.get('limit', '')
+    
+    if output_format not in ('json', 'ndjson'):
+        return jsonify({"error": "format must be json or ndjson"}), 400
+    
+    if limit and (not limit.isdigit() or int(limit) < 1):
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    
+    # Streams run until the end of the results unless a limit is given
+    if output_format == 'ndjson':
+        limit = int(limit) if limit else None
+    else:
+        limit = min(int(limit or 100), 1000)
     
-    conn = get_db_connection()
-    query = "SELECT * FROM job_market_data WHERE 1=1"
-    params = []
+    last_key = decode_cursor(page_cursor) if page_cursor else None
+    if page_cursor and last_key is None:
+        return jsonify({"error": "Invalid cursor"}), 400
+    
+    conn = get_read_connection()
+    
+    # Field projection (id is always returned, it's part of the cursor)
+    job_columns = get_job_columns(conn)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown_fields = [field for field in fields if field not in job_columns]
+    if unknown_fields:
+        conn.close()
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown_fields)}"}), 400
+    
+    columns = ', '.join(f"j.{field}" for field in ['id'] + [field for field in fields if field != 'id']) if fields else "j.*"
+    
+    # Free-text filters go through the FTS5 index and are ranked by BM25
+    match_terms = [build_match_query(keywords), build_match_query(location, column='job_location')]
+    match_query = ' AND '.join(term for term in match_terms if term)
+    
+    if last_key and len(last_key) != (2 if match_query else 1):
+        conn.close()
+        return jsonify({"error": "Cursor does not belong to this search"}), 400
+    
+    if match_query:
+        # Weight title and skills matches above company and location
+        query = f"""
+            SELECT {columns},
+                   highlight(job_search_fts, 0, '<mark>', '</mark>') AS job_post_highlight,
+                   snippet(job_search_fts, -1, '<mark>', '</mark>', '...', 12) AS snippet,
+                   bm25(job_search_fts, 10.0, 2.0, 1.0, 5.0) AS score
+            FROM job_search_fts
+            JOIN job_market_data j ON j.id = job_search_fts.rowid
+            WHERE job_search_fts MATCH ?"""
+        params = [match_query]
+    else:
+        query = f"SELECT {columns} FROM job_market_data j WHERE 1=1"
+        params = []
     
     if skill:
-        query += " AND required_skills LIKE ?"
-        params.append(f"%{skill}%")
+        # Exact skill match through the job_skills index
+        query += """ AND j.id IN (
+            SELECT js.job_id FROM job_skills js
+            JOIN skills s ON s.id = js.skill_id
+            WHERE s.name = ?
+        )"""
+        params.append(normalize_skill(skill))
+    
+    # Range filters keep jobs whose parsed range overlaps the requested one
+    if exp_min.isdigit():
+        query += " AND j.exp_max >= ?"
+        params.append(int(exp_min))
+    
+    if exp_max.isdigit():
+        query += " AND j.exp_min <= ?"
+        params.append(int(exp_max))
+    
+    if salary_min.isdigit():
+        query += " AND j.salary_max >= ?"
+        params.append(int(salary_min))
+    
+    if salary_max.isdigit():
+        query += " AND j.salary_min <= ?"
+        params.append(int(salary_max))
+    
+    # Keyset pagination: ranked results sort by (score, id), the rest by id
+    if match_query:
+        query = f"SELECT * FROM ({query}) WHERE 1=1"
+        if last_key:
+            query += " AND (score > ? OR (score = ? AND id > ?))"
+            params.extend([last_key[0], last_key[0], last_key[-1]])
+        query += " ORDER BY score, id"
+    else:
+        if last_key:
+            query += " AND j.id > ?"
+            params.append(last_key[-1])
+        query += " ORDER BY j.id"
+    
+    if limit is not None:
+        # One extra row tells us whether there is a next page
+        query += " LIMIT ?"
+        params.append(limit + 1)
     
-    if location:
-        query += " AND job_location LIKE ?"
-        params.append(f"%{location}%")
+    def sort_key(job):
+        return [job['score'], job['id']] if match_query else [job['id']]
     
-    query += " LIMIT 100"
+    def to_job(row):
+        job = dict(row)
+        job.pop('score', None)
+        return job
+    
+    if output_format == 'ndjson':
+        # The stream is read after the request ends and the thread's shared
+        # connection is released, so it gets a connection of its own
+        conn.close()
+        conn = open_private_read_connection()
     
     cursor = conn.cursor()
     cursor.execute(query, params)
+    
+    if output_format == 'ndjson':
+        def generate():
+            count = 0
+            last_row = None
+            while True:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                for row in rows:
+                    if limit is not None and count == limit:
+                        # Last line of a limited stream points at the next page
+                        yield json.dumps({"next_cursor": encode_cursor(sort_key(dict(last_row)))}) + "\n"
+                        return
+                    count += 1
+                    last_row = row
+                    yield json.dumps(to_job(row)) + "\n"
+        
+        response = Response(generate(), mimetype='application/x-ndjson')
+        # Also runs when the client goes away before the stream starts
+        response.call_on_close(conn.really_close)
+        return response
+    
     results = cursor.fetchall()
     conn.close()
     
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = encode_cursor(sort_key(dict(results[-1])))
+    
     jobs = []
     for row in results:
-        job = dict(row)
+        job = to_job(row)
         jobs.append(job)
     
-    return jsonify(jobs)
+    response = jsonify(jobs)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @app.route('/api/market_summary')
+@job_market_indexes_required
+@versioned_response('job_market')
 def market_summary():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) as total FROM job_market_data")
-    total_jobs = cursor.fetchone()['total']
-    
-    cursor.execute("SELECT COUNT(DISTINCT company) as company_count FROM job_market_data")
-    company_count = cursor.fetchone()['company_count']
-    
-    cursor.execute("SELECT COUNT(DISTINCT job_location) as location_count FROM job_market_data")
-    location_count = cursor.fetchone()['location_count']
-    
-    cursor.execute("SELECT AVG(company_rating) as avg_rating FROM job_market_data WHERE company_rating IS NOT NULL")
-    avg_rating = cursor.fetchone()['avg_rating']
-    
+    conn = get_read_connection()
+    result = get_market_summary(conn)
     conn.close()
-    
-    return jsonify({
-        "total_jobs": total_jobs,
-        "unique_companies": company_count,
-        "unique_locations": location_count,
-        "average_company_rating": round(avg_rating, 2) if avg_rating else 0
-    })
+    return jsonify(result)
 
 @app.route('/api/quiz')
 def quiz_questions():
@@ -366,9 +444,6 @@ def submit_quiz_results():
         return jsonify({"error": "No user ID provided"}), 400
         
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         proficient_skills = data.get('proficientSkills', [])
         improvement_skills = data.get('improvementSkills', [])
         
@@ -378,7 +453,7 @@ def submit_quiz_results():
         if isinstance(improvement_skills, list):
             improvement_skills = json.dumps(improvement_skills)
         
-        cursor.execute("""
+        result_id = execute_write("""
             INSERT INTO user_quiz_results 
             (user_id, category, proficient_skills, improvement_skills, score, completed_at) 
             VALUES (?, ?, ?, ?, ?, ?)
@@ -391,15 +466,15 @@ def submit_quiz_results():
             data.get('completedAt')
         ))
         
-        result_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
         return jsonify({
             "success": True, 
             "message": "Quiz results saved successfully",
             "result_id": result_id
         })
+    except WriteQueueFull:
+        return jsonify({"error": "Too many pending writes, please retry"}), 503
+    except WritePending:
+        return jsonify({"error": "The write is still being saved; check before sending it again"}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -485,13 +560,9 @@ def dashboard():
     except Exception as e:
         print(f"Error fetching interview history: {e}")
     
-    skills_data = {}
-    try:
-        if user['skills_data'] and user['skills_data'].strip():
-            skills_data = json.loads(user['skills_data'])
-    except Exception as e:
-        print(f"Error parsing skills data: {e}")
-        skills_data = {}
+    conn = get_db_connection()
+    skills_data = get_user_skill_profile(conn, user_id).to_skills_data()
+    conn.close()
     
     return render_template('dashboard.html', 
                           user=user, 
@@ -513,12 +584,11 @@ def profile():
     
     quiz_results = get_user_quiz_results(user_id)
     
-    skills_data = {}
-    try:
-        if user['skills_data']:
-            skills_data = json.loads(user['skills_data'])
-    except:
-        skills_data = {}
+    # Skill lists come from user_skills; the blob only adds extras like the quiz score
+    conn = get_db_connection()
+    skills_data = load_skills_data(user['skills_data'])
+    skills_data.update(get_user_skill_profile(conn, user_id).to_skills_data())
+    conn.close()
     
     return render_template('profile.html', 
                           user=user, 
@@ -544,11 +614,7 @@ def update_user_skills():
             data['improvementSkills'] = []
         
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE users SET skills_data = ? WHERE id = ?",
-            (json.dumps(data), user_id)
-        )
+        save_user_skills(conn, user_id, data, source='profile')
         
         conn.commit()
         conn.close()
@@ -626,13 +692,8 @@ def virtual_interview():
     skills = {}
     if 'user_id' in session:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT skills_data FROM users WHERE id = ?", (session['user_id'],))
-        user = cursor.fetchone()
+        skills = get_user_skill_profile(conn, session['user_id']).to_skills_data()
         conn.close()
-        
-        if user and user['skills_data']:
-            skills = json.loads(user['skills_data'])
     
     return render_template('virtual_interview.html', job_roles=job_roles, skills=skills)
 
@@ -650,17 +711,17 @@ def start_interview():
     interview_data = generate_initial_interview_questions(skill_area, job_role)
     
     # Store interview session in database
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """INSERT INTO interview_sessions 
-           (user_id, skill_area, job_role, started_at, status) 
-           VALUES (?, ?, ?, ?, ?)""",
-        (user_id, skill_area, job_role, datetime.now().isoformat(), 'in_progress')
-    )
-    interview_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    try:
+        interview_id = execute_write(
+            """INSERT INTO interview_sessions 
+               (user_id, skill_area, job_role, started_at, status) 
+               VALUES (?, ?, ?, ?, ?)""",
+            (user_id, skill_area, job_role, datetime.now().isoformat(), 'in_progress')
+        )
+    except WriteQueueFull:
+        return jsonify({"error": "Too many pending writes, please retry"}), 503
+    except WritePending:
+        return jsonify({"error": "The write is still being saved; check before sending it again"}), 503
     
     return jsonify({
         "interview_id": interview_id,
@@ -681,17 +742,21 @@ def submit_interview_answer():
     is_final = data.get('is_final', False)
     
     # Save the Q&A pair to database
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """INSERT INTO interview_qa 
-           (interview_id, question, answer, timestamp) 
-           VALUES (?, ?, ?, ?)""",
-        (interview_id, question, answer, datetime.now().isoformat())
-    )
-    conn.commit()
+    try:
+        execute_write(
+            """INSERT INTO interview_qa 
+               (interview_id, question, answer, timestamp) 
+               VALUES (?, ?, ?, ?)""",
+            (interview_id, question, answer, datetime.now().isoformat())
+        )
+    except WriteQueueFull:
+        return jsonify({"error": "Too many pending writes, please retry"}), 503
+    except WritePending:
+        return jsonify({"error": "The write is still being saved; check before sending it again"}), 503
     
     # Get interview context
+    conn = get_db_connection()
+    cursor = conn.cursor()
     cursor.execute(
         "SELECT skill_area, job_role FROM interview_sessions WHERE id = ?",
         (interview_id,)
@@ -803,7 +868,7 @@ def save_interview_results():
         
         if user_skills_row and user_skills_row['skills_data']:
             try:
-                skills_data = json.loads(user_skills_row['skills_data'])
+                skills_data = load_skills_data(user_skills_row['skills_data'])
                 
                 # Add skills that need improvement to the improvement list if not already there
                 improvement_skills = skills_data.get('improvementSkills', [])
@@ -818,10 +883,7 @@ def save_interview_results():
                 skills_data['lastInterviewDate'] = interview['completed_at']
                 
                 # Save back to database
-                cursor.execute(
-                    "UPDATE users SET skills_data = ? WHERE id = ?",
-                    (json.dumps(skills_data), user_id)
-                )
+                save_user_skills(conn, user_id, skills_data, source='interview')
             except Exception as e:
                 print(f"Error updating user skills data: {e}")
         
@@ -882,15 +944,17 @@ def career_paths_page():
         if input_skills:
             try:
                 skills_list = [skill.strip().lower() for skill in input_skills.split(',') if skill.strip()]
-                skills_json = json.dumps(skills_list)
+                
+                # Replace the proficient skills, keep the rest of the profile
+                skills_data = load_skills_data(user['skills_data'])
+                skills_data['proficientSkills'] = skills_list
                 
                 conn = get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute("UPDATE users SET skills_data = ? WHERE id = ?", (skills_json, user_id))
+                stored = save_user_skills(conn, user_id, skills_data, source='career_paths')
                 conn.commit()
                 conn.close()
                 
-                user['skills_data'] = skills_json  # Update user object
+                user['skills_data'] = json.dumps(stored)  # Update user object
                 skills_data = skills_list
                 flash("Skills saved successfully.")
             except Exception as e:
@@ -898,13 +962,10 @@ def career_paths_page():
                 flash("Something went wrong while saving skills.")
     
     # Load skills from DB if not already loaded in this request
-    if not skills_data and user.get('skills_data'):
-        try:
-            if user['skills_data'].strip():
-                skills_data = json.loads(user['skills_data'])
-        except Exception as e:
-            print(f"Error parsing skills: {e}")
-            skills_data = []
+    if not skills_data:
+        conn = get_db_connection()
+        skills_data = get_user_skill_profile(conn, user_id).proficient
+        conn.close()
     
     has_skill_data = bool(skills_data)
     
@@ -962,13 +1023,10 @@ def generate_career_recommendations():
         return jsonify({"error": "User not found"}), 404
     
     # Get user's skills data and quiz results
-    skills_data = {}
-    try:
-        if user['skills_data'] and user['skills_data'].strip():
-            skills_data = json.loads(user['skills_data'])
-    except Exception as e:
-        print(f"Error parsing skills data: {e}")
-        skills_data = {}
+    conn = get_db_connection()
+    profile = get_user_skill_profile(conn, user_id)
+    conn.close()
+    skills_data = profile.to_skills_data() if profile.proficient or profile.improvement else {}
     
     quiz_results = get_user_quiz_results(user_id)
     
@@ -1038,42 +1096,22 @@ def network_analysis():
     if 'user_id' not in session:
         return redirect('/login')
     
-    # Generate the networks if they don't exist
-    user_network_file = "networks/user_similarity_network.html"
-    skill_job_network_file = "networks/skill_job_network.html"
-    full_network_file = "networks/full_network.html"
-    
-    # Check if the network files exist and create them if they don't
-    user_network_path = Path("static") / user_network_file
-    skill_job_network_path = Path("static") / skill_job_network_file
-    full_network_path = Path("static") / full_network_file
-    
-    if not user_network_path.exists():
-        try:
-            G = get_user_similarity_network()
-            user_network_file = generate_network_html(G, "user_similarity_network.html", "User Similarity Network")
-        except Exception as e:
-            print(f"Error generating user similarity network: {e}")
-            user_network_file = "error.html"
-    
-    if not skill_job_network_path.exists():
-        try:
-            G = get_skill_job_network()
-            skill_job_network_file = generate_network_html(G, "skill_job_network.html", "Skills & Jobs Network")
-        except Exception as e:
-            print(f"Error generating skill job network: {e}")
-            skill_job_network_file = "error.html"
-    
-    if not full_network_path.exists():
-        try:
-            G = get_full_network()
-            full_network_file = generate_network_html(G, "full_network.html", "Complete Network View")
-        except Exception as e:
-            print(f"Error generating full network: {e}")
-            full_network_file = "error.html"
+    # Pages that were never generated are rendered in the background;
+    # the page polls their jobs and loads them when ready
+    network_files = {}
+    pending_jobs = {}
+    for network_type in NETWORK_TYPES:
+        network_files[network_type] = get_network_file(network_type)
+        if not (Path("static") / network_files[network_type]).exists():
+            try:
+                job = start_network_job(network_type)
+                if job["status"] == "running":
+                    pending_jobs[network_type] = job["job_id"]
+            except Exception as e:
+                print(f"Error starting {network_type} render: {e}")
     
     # Get network statistics
-    conn = get_db_connection()
+    conn = get_read_connection()
     user_count = conn.execute("SELECT COUNT(*) as count FROM users").fetchone()['count']
     
     # Count skills from quiz_questions
@@ -1087,9 +1125,10 @@ def network_analysis():
     conn.close()
     
     return render_template('network_analysis.html',
-                          user_network_file=user_network_file,
-                          skill_job_network_file=skill_job_network_file,
-                          full_network_file=full_network_file,
+                          user_network_file=network_files['user-network'],
+                          skill_job_network_file=network_files['skill-job-network'],
+                          full_network_file=network_files['full-network'],
+                          pending_jobs=pending_jobs,
                           user_count=user_count,
                           skill_count=skill_count,
                           job_count=job_count)
@@ -1102,25 +1141,30 @@ def refresh_network():
         return jsonify({"error": "Not authenticated"}), 401
     
     network_type = request.args.get('type', '')
+    if network_type not in NETWORK_TYPES:
+        return jsonify({"error": "Invalid network type"}), 400
     
     try:
-        if network_type == 'user-network':
-            G = get_user_similarity_network()
-            file_path = generate_network_html(G, "user_similarity_network.html", "User Similarity Network")
-        elif network_type == 'skill-job-network':
-            G = get_skill_job_network()
-            file_path = generate_network_html(G, "skill_job_network.html", "Skills & Jobs Network")
-        elif network_type == 'full-network':
-            G = get_full_network()
-            file_path = generate_network_html(G, "full_network.html", "Complete Network View")
-        else:
-            return jsonify({"error": "Invalid network type"}), 400
-            
-        return jsonify({"success": True, "file_path": file_path})
+        job = start_network_job(network_type)
     except Exception as e:
         return jsonify({"error": str(e), "success": False}), 500
+    
+    # 202 while the page is being rendered; poll /api/network_jobs/<job_id>
+    return jsonify({"success": True, **job}), 202 if job["status"] == "running" else 200
+
+@app.route('/api/network_jobs/<int:job_id>')
+def network_job_status(job_id):
+    """API endpoint for the status of a network render job"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    job = get_network_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"success": job["status"] != "failed", **job})
 
 @app.route('/api/network_stats')
+@versioned_response('users', 'job_market', login_required=True)
 def network_stats():
     """API endpoint to get network statistics"""
     # Check if user is logged in
@@ -1129,7 +1173,7 @@ def network_stats():
     
     try:
         # Get user skills network and analyze
-        user_network = get_user_similarity_network()
+        user_network = get_graph('user_similarity')
         
         # Calculate some basic statistics
         user_nodes = [node for node in user_network.nodes() if node.startswith('user_')]
@@ -1150,7 +1194,7 @@ def network_stats():
         top_skills = sorted(skill_connections.items(), key=lambda x: x[1], reverse=True)[:10]
         
         # Get job skills network data
-        job_network = get_skill_job_network()
+        job_network = get_graph('skill_job')
         job_nodes = [node for node in job_network.nodes() if node.startswith('job_')]
         
         return jsonify({
@@ -1176,7 +1220,7 @@ def skill_recommendations():
     
     try:
         # Get user similarity network
-        G = get_user_similarity_network()
+        G = get_graph('user_similarity')
         
         # Check if user exists in the network
         if user_node not in G.nodes():
@@ -1213,7 +1257,7 @@ def skill_recommendations():
         sorted_recommendations = sorted(recommended_skills.items(), key=lambda x: x[1], reverse=True)
         
         # Get job market demand for these skills
-        skill_job_network = get_skill_job_network()
+        skill_job_network = get_graph('skill_job')
         skill_demand = {}
         
         for skill, _ in sorted_recommendations:
@@ -1250,47 +1294,35 @@ def my_connections():
 
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
 
-        # Get current user's skills
-        user_row = cursor.execute("SELECT skills_data FROM users WHERE id = ?", (user_id,)).fetchone()
-        if not user_row:
-            print("[ERROR] No such user found.")
-            return jsonify({"success": True, "connections": []})
+        # Other users sharing skills with this user (profile and passed
+        # quizzes), scored from the same skill matrix as the similarity network
+        user_connections = get_user_connections(conn, user_id)
 
-        try:
-            user_skills_data = json.loads(user_row['skills_data']) if user_row['skills_data'] else {}
-            user_skills = set(s.lower().strip() for s in user_skills_data.get('proficientSkills', []))
-        except Exception as e:
-            print(f"[ERROR] Parsing current user's skills_data: {e}")
-            user_skills = set()
-
-        if not user_skills:
-            print("[INFO] No proficient skills found for this user.")
+        if not user_connections:
+            print("[INFO] No shared-skill connections found for this user.")
             return jsonify({"success": True, "connections": []})
 
-        # Fetch all other users
-        other_users = cursor.execute("""
-            SELECT id, name, email, skills_data FROM users WHERE id != ?
-        """, (user_id,)).fetchall()
+        users = {}
+        other_ids = [other_id for other_id, _, _ in user_connections]
+        for start in range(0, len(other_ids), 500):
+            batch = other_ids[start:start + 500]
+            placeholders = ','.join(['?' for _ in batch])
+            for row in conn.execute(f"SELECT id, name, email FROM users WHERE id IN ({placeholders})", batch):
+                users[row['id']] = row
 
         connections = []
-        for other in other_users:
-            try:
-                skills_data = json.loads(other['skills_data']) if other['skills_data'] else {}
-                other_skills = set(s.lower().strip() for s in skills_data.get('proficientSkills', []))
-                shared = user_skills & other_skills
-
-                if shared:
-                    connections.append({
-                        "id": other['id'],
-                        "username": other['name'],
-                        "email": other['email'],
-                        "skills": list(shared),
-                        "connection_strength": len(shared)
-                    })
-            except Exception as e:
-                print(f"[ERROR] Processing user {other['id']}: {e}")
+        for other_id, score, shared_skills in user_connections:
+            if other_id not in users:
+                continue
+            connections.append({
+                "id": other_id,
+                "username": users[other_id]['name'],
+                "email": users[other_id]['email'],
+                "skills": shared_skills,
+                "connection_strength": len(shared_skills),
+                "score": round(score, 3)
+            })
 
         print(f"[DEBUG] Total shared-skill connections found: {len(connections)}")
         return jsonify({"success": True, "connections": connections})
@@ -1301,6 +1333,28 @@ def my_connections():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/similar_users')
+def similar_users():
+    """Users with the most similar skills to the current user (k, recall)"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    k = request.args.get('k', '10')
+    if not k.isdigit():
+        return jsonify({"error": "k must be a non-negative integer"}), 400
+    try:
+        recall = float(request.args.get('recall', '1'))
+    except ValueError:
+        recall = 0
+    if not 0 < recall <= 1:
+        return jsonify({"error": "recall must be between 0 and 1"}), 400
+    
+    try:
+        users = get_similar_users(session['user_id'], min(int(k), 100), recall)
+        return jsonify({"success": True, "users": users})
+    except Exception as e:
+        return jsonify({"error": str(e), "success": False}), 500
+
 # Find potential connections based on shared skills
 @app.route('/api/find_connections')
 def find_connections():
@@ -1534,23 +1588,75 @@ def user_profile():
     
 
 @app.route('/api/shared_skills_connections')
+@versioned_response('users', login_required=True)
 def shared_skills_connections():
-    """API endpoint to get shared skills connections"""
+    """API endpoint to get shared skills connections (limit / offset / min_strength)"""
     # Check if user is logged in
     if 'user_id' not in session:
         return jsonify({"error": "Not authenticated"}), 401
     
+    limit = request.args.get('limit', '100')
+    offset = request.args.get('offset', '0')
+    min_strength = request.args.get('min_strength', '1')
+    
+    if not (limit.isdigit() and offset.isdigit() and min_strength.isdigit()):
+        return jsonify({"error": "limit, offset and min_strength must be non-negative integers"}), 400
+    limit = min(int(limit), 1000)
+    
     try:
-        connections_data = get_shared_skills_connections()
+        connections_data, total = get_shared_skills_connections(limit, int(offset), int(min_strength))
         
         return jsonify({
             "success": True,
-            "connections": connections_data
+            "connections": connections_data,
+            "total": total,
+            "limit": limit,
+            "offset": int(offset)
         })
     except Exception as e:
         return jsonify({"error": str(e), "success": False}), 500
 
+@app.route('/api/graph/<graph_type>')
+@versioned_response('users', 'job_market', login_required=True)
+def graph_data(graph_type):
+    """
+    API endpoint for a network as node / edge arrays
+    (center / hops for an ego-network, min_degree, limit / offset)
+    """
+    if graph_type not in GRAPH_KINDS:
+        return jsonify({"error": "Invalid network type"}), 404
+    
+    center = request.args.get('center') or None
+    hops = request.args.get('hops', '1')
+    min_degree = request.args.get('min_degree', '0')
+    limit = request.args.get('limit', '500')
+    offset = request.args.get('offset', '0')
+    
+    if not all(value.isdigit() for value in (hops, min_degree, limit, offset)):
+        return jsonify({"error": "hops, min_degree, limit and offset must be non-negative integers"}), 400
+    hops = min(int(hops), GRAPH_MAX_HOPS)
+    limit = min(int(limit), GRAPH_MAX_PAGE_SIZE)
+    
+    try:
+        data = get_graph_data(get_graph(graph_type), center, hops, int(min_degree), limit, int(offset),
+                              positions=get_graph_layout(graph_type))
+    except KeyError:
+        return jsonify({"error": f"Node {center} not found"}), 404
+    except Exception as e:
+        return jsonify({"error": str(e), "success": False}), 500
+    
+    return jsonify({
+        "success": True,
+        "type": graph_type,
+        "nodes": data["nodes"],
+        "edges": data["edges"],
+        "total_nodes": data["total_nodes"],
+        "limit": limit,
+        "offset": int(offset)
+    })
+
 @app.route('/api/matching_jobs')
+@job_market_indexes_required
 def matching_jobs():
     """Get jobs that match specified skills"""
     if 'user_id' not in session:
@@ -1568,25 +1674,19 @@ def matching_jobs():
     try:
         conn = get_db_connection()
         
-        # Build a query to match jobs that require ANY of the specified skills
-        # This uses SQL's LIKE operator to search within comma-separated skill lists
-        placeholders = []
-        parameters = []
-        
-        for skill in skills:
-            # For each skill, create a LIKE condition to search for it within required_skills
-            # The % wildcards ensure it matches regardless of position in the comma-separated list
-            placeholders.append("required_skills LIKE ?")
-            parameters.append(f"%{skill}%")
-        
-        # Join placeholders with OR to match any of the skills
-        where_clause = " OR ".join(placeholders)
-        
+        # Match jobs that require ANY of the specified skills through the job_skills index
+        parameters = [normalize_skill(skill) for skill in skills]
+        placeholders = ','.join(['?' for _ in parameters])
+
         # Get matching jobs
         query = f"""
             SELECT id, job_post, company, required_skills
             FROM job_market_data
-            WHERE {where_clause}
+            WHERE id IN (
+                SELECT js.job_id FROM job_skills js
+                JOIN skills s ON s.id = js.skill_id
+                WHERE s.name IN ({placeholders})
+            )
             ORDER BY job_post
             LIMIT 10
         """
@@ -1,11 +1,6 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask import session
-import sqlite3
-
-def get_db_connection():
-    conn = sqlite3.connect('job_market.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+from db_utils import get_db_connection
 
 def register_user(name, email, password, skills_data='{}'):
     """Register a new user and return their ID"""
@@ -0,0 +1,365 @@
+# benchmark_app.py
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# Canned answers for the functions that call Gemini / OpenRouter
+INTERVIEW_ANALYSIS = (
+    {"technical_score": 75, "communication_score": 80, "strengths": ["Clear explanations"]},
+    {"areas_for_improvement": ["Practice system design"], "overall_feedback": "Solid interview.",
+     "next_steps": ["Review algorithms"]}
+)
+
+TIPS_MARKDOWN = "## Tips\n\n- Quantify your impact\n- Keep it to one page\n"
+
+LLM_STUBS = {
+    'generate_initial_interview_questions': lambda skill_area, job_role: {
+        "greeting": f"Welcome to your {job_role} interview.",
+        "first_question": f"Tell me about your experience with {skill_area}."
+    },
+    'generate_follow_up_question': lambda skill_area, job_role, previous_question, previous_answer: {
+        "next_question": f"How would you apply {skill_area} here?", "is_final": False
+    },
+    'generate_interview_analysis': lambda interview_id: INTERVIEW_ANALYSIS,
+    'get_career_path_recommendations': lambda user_skills, quiz_results: {
+        "recommendations": [
+            {"career_path_id": 1, "title": "Software Engineer", "matching_score": 85, "rationale": "Strong fit",
+             "matching_skills": ["python"], "skills_to_develop": ["system design"]}
+        ]
+    },
+    'get_resume_tips': lambda job_role: TIPS_MARKDOWN,
+    'get_interview_tips': lambda job_role: TIPS_MARKDOWN,
+}
+
+class QueryCounter:
+    """Counts SQL statements run on every connection opened through sqlite3.connect()"""
+
+    def __init__(self):
+        self.count = 0
+        self.connect = sqlite3.connect
+
+    def trace(self, statement):
+        # Statements run by triggers are reported as "-- TRIGGER name" comments
+        if not statement.startswith('--'):
+            self.count += 1
+
+    def counting_connect(self, *args, **kwargs):
+        conn = self.connect(*args, **kwargs)
+        conn.set_trace_callback(self.trace)
+        return conn
+
+    def install(self):
+        sqlite3.connect = self.counting_connect
+
+query_counter = QueryCounter()
+
+def stub_llm_calls(modules):
+    """Replace the LLM-backed functions in every module that imported them"""
+    for module in modules:
+        for name, stub in LLM_STUBS.items():
+            if hasattr(module, name):
+                setattr(module, name, stub)
+
+def get_benchmark_context(conn):
+    """Ids from the dataset that the route requests refer to"""
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id LIMIT 101")]
+    if len(user_ids) < 2:
+        raise SystemExit("The benchmark dataset needs at least two users (run generate_dataset.py)")
+
+    first_value = lambda sql, params=(): (conn.execute(sql, params).fetchone() or [None])[0]
+    return {
+        "user_id": user_ids[0],
+        "other_user_ids": user_ids[1:],
+        "role_id": first_value("SELECT id FROM job_roles ORDER BY id"),
+        "path_id": first_value("SELECT id FROM career_paths ORDER BY id"),
+        "interview_id": first_value("SELECT id FROM interview_sessions WHERE user_id = ? ORDER BY id", (user_ids[0],)),
+        "skill": first_value("SELECT name FROM skills ORDER BY id") or 'python',
+        "started": time.time(),
+    }
+
+def get_route_requests(ctx):
+    """
+    Requests to benchmark, read-only routes first.
+
+    Each entry is (endpoint, method, path, options). `json` / `data` may be
+    callables taking the iteration number, for writes that must differ per
+    request.
+    """
+    other_user = lambda i: ctx["other_user_ids"][i % len(ctx["other_user_ids"])]
+    skill = ctx["skill"]
+    return [
+        ('index', 'GET', '/', {}),
+        ('job_market_analysis', 'GET', '/job_market_analysis', {}),
+        ('skill_assessment', 'GET', '/skill_assessment', {}),
+        ('job_count_by_location', 'GET', '/api/job_count_by_location', {}),
+        ('top_skills', 'GET', '/api/top_skills', {}),
+        ('salary_distribution', 'GET', '/api/salary_distribution', {}),
+        ('experience_required', 'GET', '/api/experience_required', {}),
+        ('company_ratings', 'GET', '/api/company_ratings', {}),
+        ('job_posting_trends', 'GET', '/api/job_posting_trends', {}),
+        ('job_posting_trends', 'GET', '/api/job_posting_trends?granularity=week&start=2024-01-01', {}),
+        ('market_dashboard', 'GET', '/api/market_dashboard', {}),
+        ('market_summary', 'GET', '/api/market_summary', {}),
+        ('job_search', 'GET', '/api/job_search', {}),
+        ('job_search', 'GET', '/api/job_search?q=engineer&limit=20', {}),
+        ('job_search', 'GET', f'/api/job_search?skill={skill}&exp_min=2&salary_min=50000', {}),
+        ('job_search', 'GET', '/api/job_search?location=remote&fields=id,job_post,company', {}),
+        ('job_search', 'GET', '/api/job_search?format=ndjson&limit=1000', {}),
+        ('quiz_questions', 'GET', '/api/quiz?category=technical', {}),
+        ('signup', 'GET', '/signup', {}),
+        ('login', 'GET', '/login', {}),
+        ('dashboard', 'GET', '/dashboard', {'login': True}),
+        ('profile', 'GET', '/profile', {'login': True}),
+        ('resume_tips_page', 'GET', '/resume_tips', {'login': True}),
+        ('get_role_tips', 'GET', f'/resume_tips/{ctx["role_id"]}/resume', {'login': True}),
+        ('virtual_interview', 'GET', '/virtual_interview', {'login': True}),
+        ('career_paths_page', 'GET', '/career_paths', {'login': True}),
+        ('career_path_details', 'GET', f'/api/career_path_details/{ctx["path_id"]}', {'login': True}),
+        ('network_analysis', 'GET', '/network_analysis', {'login': True}),
+        ('network_stats', 'GET', '/api/network_stats', {'login': True}),
+        ('skill_recommendations', 'GET', '/api/skill_recommendations', {'login': True}),
+        ('my_connections', 'GET', '/api/my_connections', {'login': True}),
+        ('similar_users', 'GET', '/api/similar_users?k=10&recall=0.9', {'login': True}),
+        ('graph_data', 'GET', '/api/graph/user_similarity?limit=200', {'login': True}),
+        ('graph_data', 'GET', f'/api/graph/full?center=user_{ctx["user_id"]}&hops=2', {'login': True}),
+        ('find_connections', 'GET', '/api/find_connections', {'login': True}),
+        ('user_profile', 'GET', f'/api/user_profile?user_id={ctx["other_user_ids"][0]}', {'login': True}),
+        ('shared_skills_connections', 'GET', '/api/shared_skills_connections', {'login': True}),
+        ('matching_jobs', 'GET', f'/api/matching_jobs?skill={skill}&skill=sql', {'login': True}),
+        ('refresh_network', 'GET', '/api/refresh_network?type=user-network', {'login': True}),
+        ('refresh_network', 'GET', '/api/refresh_network?type=skill-job-network', {'login': True}),
+        ('refresh_network', 'GET', '/api/refresh_network?type=full-network', {'login': True}),
+        ('login', 'POST', '/login', {'data': {'email': 'user1@example.com', 'password': 'benchmark'}}),
+        ('signup', 'POST', '/signup', {'data': lambda i: {
+            'name': 'Bench User', 'password': 'benchmark', 'user_skills': '{}',
+            'email': f'bench{int(ctx["started"])}-{i}@example.com'}}),
+        ('submit_quiz_results', 'POST', '/api/submit_quiz_results', {'login': True, 'json': {
+            'category': 'technical', 'proficientSkills': ['python'], 'improvementSkills': ['sql'],
+            'score': 7, 'completedAt': '2025-01-01T10:00:00'}}),
+        ('update_user_skills', 'POST', '/api/update_user_skills', {'login': True, 'json': {
+            'proficientSkills': ['python', 'sql'], 'improvementSkills': ['docker']}}),
+        ('career_paths_page', 'POST', '/career_paths', {'login': True, 'data': {'skills': 'python, sql, docker'}}),
+        ('generate_career_recommendations', 'POST', '/api/generate_career_recommendations', {'login': True}),
+        ('start_interview', 'POST', '/api/start_interview', {'login': True, 'json': {
+            'skill_area': 'python', 'job_role': 'Software Engineer'}}),
+        ('submit_interview_answer', 'POST', '/api/submit_interview_answer', {'login': True, 'json': {
+            'interview_id': ctx["interview_id"], 'question': 'Why Python?', 'answer': 'Readability.'}}),
+        ('complete_interview', 'POST', '/api/complete_interview', {'login': True, 'json': {
+            'interview_id': ctx["interview_id"]}}),
+        ('save_interview_results', 'POST', '/api/save_interview_results', {'login': True, 'json': {
+            'interview_id': ctx["interview_id"]}}),
+        ('add_connection', 'POST', '/api/add_connection', {'login': True, 'json': lambda i: {'user_id': other_user(i)}}),
+        ('remove_connection', 'POST', '/api/remove_connection', {'login': True, 'json': lambda i: {'user_id': other_user(i)}}),
+        ('logout', 'GET', '/logout', {'login': True}),
+    ]
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(int(-(-percent * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+def run_request(client, method, path, options, iteration, user_id):
+    if options.get('login'):
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+
+    kwargs = {}
+    for key in ('json', 'data'):
+        if key in options:
+            value = options[key]
+            kwargs[key] = value(iteration) if callable(value) else value
+
+    response = client.open(path, method=method, **kwargs)
+    response.get_data()  # consume streamed bodies inside the measurement
+    return response.status_code
+
+def benchmark_route(app, response_cache, method, path, options, iterations, user_id, clear_cache=False):
+    """Time one route; the first request is cold, memory is measured on an extra cold request"""
+    client = app.test_client()
+    latencies = []
+    queries = []
+    status_codes = {}
+
+    for iteration in range(iterations):
+        if clear_cache:
+            response_cache.clear()
+        query_counter.count = 0
+        started = time.perf_counter()
+        status = run_request(client, method, path, options, iteration, user_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(query_counter.count)
+        status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+
+    # Tracing slows every allocation down, so memory gets its own request
+    response_cache.clear()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        run_request(client, method, path, options, iterations, user_id)
+        peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "status_codes": status_codes,
+        "latency_ms": {
+            "first": round(latencies[0], 3),
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "max": round(max(latencies), 3),
+        },
+        "sql_queries": {
+            "first": queries[0],
+            "mean": round(sum(queries) / len(queries), 2),
+            "max": max(queries),
+        },
+        "peak_memory_kb": round(peak_memory / 1024, 1),
+    }
+
+def get_git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def get_table_counts(conn):
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE '%VIRTUAL%'"
+    )]
+    return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in sorted(tables)}
+
+def compare_results(results, baseline, threshold):
+    """Routes whose p95 latency or query count grew by more than `threshold` times"""
+    regressions = []
+    for name, result in results["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if not previous:
+            continue
+        for metric, current, before in (
+            ('p95_ms', result["latency_ms"]["p95"], previous["latency_ms"]["p95"]),
+            ('sql_queries', result["sql_queries"]["max"], previous["sql_queries"]["max"]),
+        ):
+            if before and current > before * threshold:
+                regressions.append({"route": name, "metric": metric, "before": before, "after": current})
+    return regressions
+
+def run_benchmarks(iterations=20, routes=None, clear_cache=False):
+    """
+    Benchmark every route of app.py through the Flask test client.
+    Must be called from the directory holding the benchmark job_market.db.
+
+    Args:
+        iterations (int): Requests per route
+        routes (list): Only run endpoints / paths containing one of these strings
+        clear_cache (bool): Empty the response cache before every request
+
+    Returns:
+        dict: Run metadata and per-route latency, SQL count and memory
+    """
+    query_counter.install()
+
+    import app as app_module
+    import ai_utils
+    import interview_utils
+    from cache_utils import response_cache
+
+    stub_llm_calls([app_module, ai_utils, interview_utils])
+    app = app_module.app
+    app.config['TESTING'] = True
+    app.secret_key = app.secret_key or 'benchmark'
+
+    conn = sqlite3.connect('job_market.db')
+    try:
+        ctx = get_benchmark_context(conn)
+        table_counts = get_table_counts(conn)
+    finally:
+        conn.close()
+
+    results = {}
+    covered = set()
+    for endpoint, method, path, options in get_route_requests(ctx):
+        covered.add((endpoint, method))
+        name = f"{method} {path}"
+        if routes and not any(route in name or route == endpoint for route in routes):
+            continue
+
+        results[name] = dict(endpoint=endpoint, **benchmark_route(
+            app, response_cache, method, path, options, iterations, ctx["user_id"], clear_cache
+        ))
+        latency = results[name]["latency_ms"]
+        print(f"{name}: p50 {latency['p50']:.1f}ms p95 {latency['p95']:.1f}ms "
+              f"sql {results[name]['sql_queries']['max']} mem {results[name]['peak_memory_kb']:.0f}KB "
+              f"status {results[name]['status_codes']}")
+
+    # New routes have to be added to get_route_requests()
+    uncovered = sorted(
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+        if (rule.endpoint, method) not in covered
+    )
+    for route in uncovered:
+        print(f"Warning: no benchmark for {route}")
+
+    return {
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+        "git_revision": get_git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "iterations": iterations,
+        "clear_cache": clear_cache,
+        "tables": table_counts,
+        "routes": results,
+        "uncovered_routes": uncovered,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every app.py route against a generated dataset")
+    parser.add_argument('--dir', default='benchmark_data', help="Directory holding job_market.db (default: benchmark_data)")
+    parser.add_argument('--iterations', type=int, default=20, help="Requests per route (default: 20)")
+    parser.add_argument('--route', action='append', dest='routes', help="Only run matching routes (repeatable)")
+    parser.add_argument('--no-cache', action='store_true', help="Clear the response cache before every request")
+    parser.add_argument('--output', default='benchmark_results.json', help="Results file (default: benchmark_results.json)")
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Allowed growth factor vs the baseline (default: 1.25)")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if not os.path.exists(os.path.join(args.dir, 'job_market.db')):
+        parser.error(f"No job_market.db in {args.dir} (run generate_dataset.py first)")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(args.dir)
+
+    results = run_benchmarks(args.iterations, args.routes, args.no_cache)
+    if baseline:
+        results["regressions"] = compare_results(results, baseline, args.threshold)
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {len(results['routes'])} route results to {output}")
+
+    if results.get("regressions"):
+        for regression in results["regressions"]:
+            print(f"Regression: {regression['route']} {regression['metric']} "
+                  f"{regression['before']} -> {regression['after']}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
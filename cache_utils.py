@@ -0,0 +1,208 @@
+# cache_utils.py
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, session, jsonify, make_response
+from db_utils import get_db_connection, get_read_connection, is_postgres
+
+# Tables whose writes invalidate cached responses, and the version scope they bump
+VERSIONED_TABLES = {
+    'job_market_data': 'job_market',
+    'users': 'users',
+    'user_quiz_results': 'users',
+}
+
+# Maximum number of responses kept in the in-process cache
+RESPONSE_CACHE_SIZE = 512
+
+def ensure_data_versions_table(conn):
+    """Create the data_versions table (one counter per scope)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def ensure_data_version_schema(conn):
+    """
+    Create the data_versions table and the triggers that bump it.
+    Each scope has a counter that goes up on every write to its tables.
+    """
+    ensure_data_versions_table(conn)
+    if is_postgres(conn):
+        ensure_postgres_version_triggers(conn)
+        return
+
+    for table, scope in VERSIONED_TABLES.items():
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if not exists:
+            continue
+
+        conn.execute("INSERT OR IGNORE INTO data_versions (scope) VALUES (?)", (scope,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE data_versions
+                    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE scope = '{scope}';
+                END
+            """)
+
+def ensure_postgres_version_triggers(conn):
+    """PostgreSQL version of the triggers: one statement-level trigger per table"""
+    conn.execute("""
+        CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE data_versions
+            SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE scope = TG_ARGV[0];
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table, scope in VERSIONED_TABLES.items():
+        if conn.execute("SELECT to_regclass(?)", (table,)).fetchone()[0] is None:
+            continue
+
+        conn.execute("INSERT OR IGNORE INTO data_versions (scope) VALUES (?)", (scope,))
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_version ON {table}")
+        conn.execute(f"""
+            CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('{scope}')
+        """)
+
+def bump_data_version(conn, scope):
+    """Mark a scope as changed (for writes the triggers don't see). Caller commits."""
+    ensure_data_versions_table(conn)
+    conn.execute("""
+        INSERT INTO data_versions (scope, version) VALUES (?, 1)
+        ON CONFLICT (scope) DO UPDATE SET version = data_versions.version + 1, updated_at = CURRENT_TIMESTAMP
+    """, (scope,))
+
+def get_data_versions(conn, scopes):
+    """
+    Get (version, updated_at) for each scope.
+    Unknown scopes count as version 0.
+    """
+    placeholders = ','.join(['?' for _ in scopes])
+    rows = conn.execute(
+        f"SELECT scope, version, updated_at FROM data_versions WHERE scope IN ({placeholders})",
+        list(scopes)
+    ).fetchall()
+
+    versions = {row['scope']: (row['version'], row['updated_at']) for row in rows}
+    return {scope: versions.get(scope, (0, None)) for scope in scopes}
+
+def parse_updated_at(value):
+    """
+    data_versions.updated_at as an aware UTC datetime. SQLite stores
+    CURRENT_TIMESTAMP as 'YYYY-MM-DD HH:MM:SS' text in UTC; PostgreSQL gives
+    a timestamp (or its text form, with fractions and an offset).
+    """
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def prepare_data_versions():
+    """Create the version table and triggers for every versioned table that exists"""
+    conn = get_db_connection()
+    try:
+        ensure_data_version_schema(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+class ResponseCache:
+    """Thread-safe LRU cache of serialized responses (body, headers)"""
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+response_cache = ResponseCache()
+
+def versioned_response(*scopes, login_required=False):
+    """
+    Cache a read-only JSON endpoint on the data version of `scopes`.
+
+    The response carries an ETag and Last-Modified derived from the
+    versions. A request with a matching If-None-Match gets 304 after a
+    single version lookup, and repeat requests for the same endpoint and args
+    are served from the in-process cache until the data changes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if login_required and 'user_id' not in session:
+                return jsonify({"error": "Not authenticated"}), 401
+
+            # Versions come from the same read-only connection / snapshot the views
+            # read, so an ETag never labels older data than it names
+            conn = get_read_connection()
+            try:
+                versions = get_data_versions(conn, scopes)
+            finally:
+                conn.close()
+
+            etag = '-'.join(f"{scope}.{versions[scope][0]}" for scope in scopes)
+            updated = [parse_updated_at(updated_at) for _, updated_at in versions.values()]
+            last_modified = max((updated_at for updated_at in updated if updated_at), default=None)
+
+            # Only the ETag decides 304s: Last-Modified has one-second resolution,
+            # so a write in the same second as a cached response would go unseen
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+            else:
+                key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))), etag)
+                entry = response_cache.get(key)
+
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    # Streamed bodies are generated on the fly and never cached
+                    if not response.is_streamed:
+                        response_cache.set(key, (response.get_data(), list(response.headers.items())))
+                else:
+                    body, headers = entry
+                    response = make_response(body, 200, headers)
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache' if login_required else 'no-cache'
+            return response
+        return wrapper
+    return decorator
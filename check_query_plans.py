@@ -0,0 +1,228 @@
+# check_query_plans.py
+import argparse
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from benchmark_app import get_benchmark_context, get_route_requests, run_request, stub_llm_calls
+
+# A full table scan in EXPLAIN QUERY PLAN output ("SCAN users" / "SCAN TABLE users");
+# index scans ("SCAN users USING COVERING INDEX ...") are fine
+FULL_SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+# Statements whose plans are checked; schema changes, PRAGMAs and
+# transaction control are not queries
+QUERY_KEYWORDS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+# (pattern searched in the normalized SQL, reason a full scan is expected)
+ALLOWED_FULL_SCANS = [
+    (r'FROM sqlite_master WHERE', "schema lookups at startup (SQLite's own catalogue)"),
+    (r'FROM job_market_data j WHERE \?=\? ORDER BY j\.id LIMIT \?$',
+     "the unfiltered first page walks the rowid order and stops at the LIMIT"),
+    (r'^SELECT \* FROM career_paths$',
+     "every career path goes into the prompt / is matched against the user (small catalogue table)"),
+    (r'^SELECT id, role_name FROM job_roles$', "lists every job role (small catalogue table)"),
+    (r'^SELECT bucket, count FROM agg_\w+_counts$', "reads the handful of precomputed buckets"),
+    (r'FROM agg_month_counts WHERE count > \? ORDER BY bucket$', "reads the precomputed monthly buckets"),
+    (r'^SELECT COUNT\(\*\) AS total, COUNT\(DISTINCT company\)',
+     "headline figures are one pass over every job by design"),
+    (r'WHERE EXISTS \(SELECT \? FROM job_skills js WHERE js\.job_id = job_market_data\.id\) LIMIT \?',
+     "takes the first jobs that have skills and stops at the LIMIT"),
+    (r'^SELECT id, name, email, job_role FROM users$', "the network is built from every user"),
+    (r'^SELECT us\.user_id, us\.kind, s\.name, us\.score FROM user_skills us JOIN skills s ON s\.id = us\.skill_id ORDER BY',
+     "loads every user's skills for the network"),
+    (r'^SELECT user_id, proficient_skills FROM user_quiz_results WHERE proficient_skills IS NOT NULL '
+     r'AND proficient_skills != \?$', "the network is built from every quiz result"),
+]
+
+class QueryRecorder:
+    """
+    Records the queries run on every connection opened through
+    sqlite3.connect(), once per distinct statement, with the request that ran it
+    """
+
+    def __init__(self):
+        self.source = 'import app'
+        # normalized SQL -> (source, SQL as run, with its values inlined)
+        self.queries = {}
+        self.connect = sqlite3.connect
+
+    def trace(self, statement):
+        # Statements run by triggers are reported as "-- TRIGGER name" comments
+        if statement.startswith('--') or not is_query(statement):
+            return
+        self.queries.setdefault(normalize_sql(statement), (self.source, statement))
+
+    def recording_connect(self, *args, **kwargs):
+        conn = self.connect(*args, **kwargs)
+        conn.set_trace_callback(self.trace)
+        return conn
+
+    def install(self):
+        sqlite3.connect = self.recording_connect
+
+    def uninstall(self):
+        sqlite3.connect = self.connect
+
+def is_query(statement):
+    words = statement.split(None, 1)
+    return bool(words) and words[0].upper() in QUERY_KEYWORDS
+
+def normalize_sql(sql):
+    """The statement with literals as ? and IN lists / VALUES rows collapsed, so repeats group together"""
+    sql = ' '.join(sql.split())
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'(?<![\w.?])-?\d+(?:\.\d+)?(?![\w.])', '?', sql)
+    sql = re.sub(r'\(\?(?:, ?\?)+\)', '(?)', sql)
+    return re.sub(r'\(\?\)(?:, ?\(\?\))+', '(?)', sql)
+
+def wait_for_network_job(client, job, timeout=300):
+    """Poll a refresh_network job until its background render has finished"""
+    started = time.time()
+    while job.get('status') == 'running' and time.time() - started < timeout:
+        time.sleep(0.1)
+        job = client.get(f"/api/network_jobs/{job['job_id']}").get_json() or {}
+
+def record_route_queries(recorder):
+    """
+    Run every benchmark request through the Flask test client, then the
+    read-only ones again so the incremental graph / index updates and cache
+    refills after the writes run too, and record the SQL.
+    Must be called from the directory holding job_market.db.
+
+    Returns:
+        list: Endpoints no request covered, whose queries went unchecked
+    """
+    recorder.install()
+
+    import app as app_module
+    import ai_utils
+    import interview_utils
+    from write_behind_utils import get_writer
+
+    stub_llm_calls([app_module, ai_utils, interview_utils])
+    app = app_module.app
+    # Errors in a route become 500s (reported below) instead of stopping the run
+    app.secret_key = app.secret_key or 'check-query-plans'
+
+    conn = recorder.connect('job_market.db')
+    try:
+        ctx = get_benchmark_context(conn)
+    finally:
+        conn.close()
+
+    client = app.test_client()
+    requests = get_route_requests(ctx)
+    reads = [entry for entry in requests if entry[1] == 'GET' and entry[0] != 'logout']
+    covered = set()
+    for iteration, (endpoint, method, path, options) in enumerate(requests + reads):
+        covered.add(endpoint)
+        recorder.source = f"{endpoint} ({method} {path})"
+        status = run_request(client, method, path, options, iteration, ctx["user_id"])
+        if status >= 500:
+            print(f"Warning: {method} {path} returned {status}")
+        if endpoint == 'refresh_network':
+            # Asking again returns the job the first request started
+            covered.add('network_job_status')
+            wait_for_network_job(client, client.open(path).get_json() or {})
+
+    recorder.source = 'write-behind flush'
+    get_writer().flush()
+    recorder.uninstall()
+
+    return sorted({rule.endpoint for rule in app.url_map.iter_rules()
+                   if rule.endpoint != 'static' and rule.endpoint not in covered})
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN detail lines"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+def find_full_scans(plan):
+    """Tables scanned row by row without an index"""
+    return [match.group(1) for match in map(FULL_SCAN_PATTERN.match, plan) if match]
+
+def get_allowed_reason(sql):
+    for pattern, reason in ALLOWED_FULL_SCANS:
+        if re.search(pattern, sql):
+            return reason
+    return None
+
+def check_query_plans(conn, queries, verbose=False):
+    """
+    Run EXPLAIN QUERY PLAN on every recorded query, with the values it ran
+    with (partial indexes and LIKE optimizations depend on them).
+
+    Args:
+        queries (dict): normalized SQL -> (source, SQL as run)
+
+    Returns:
+        list: (source, normalized sql, plan, scanned tables) for unexpected full scans
+    """
+    failures = []
+    for normalized, (source, sql) in sorted(queries.items(), key=lambda item: item[1][0]):
+        try:
+            plan = explain(conn, sql)
+        except sqlite3.Error as e:
+            # e.g. TEMP tables of a connection that is gone
+            print(f"Could not explain {normalized} ({source}): {e}")
+            continue
+        scans = find_full_scans(plan)
+
+        if verbose:
+            print(f"{source}: {normalized}\n    {' | '.join(plan)}")
+
+        if scans and not get_allowed_reason(normalized):
+            failures.append((source, normalized, plan, scans))
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every route and fail if a query it runs does a full table scan")
+    parser.add_argument('--dir', help="Directory holding a generated job_market.db; the routes write to it "
+                                      "(default: generate a small dataset in a temporary directory)")
+    parser.add_argument('--scale', type=int, default=1000,
+                        help="Job postings in the generated dataset (default: 1000)")
+    parser.add_argument('--verbose', action='store_true', help="Print every query plan")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    temp_dir = None
+    if args.dir:
+        if not os.path.exists(os.path.join(args.dir, 'job_market.db')):
+            parser.error(f"No job_market.db in {args.dir} (run generate_dataset.py first)")
+    else:
+        # In its own process: connections opened here would be reused untraced
+        temp_dir = tempfile.TemporaryDirectory(prefix='check_query_plans-')
+        args.dir = temp_dir.name
+        subprocess.run([sys.executable, os.path.join(here, 'generate_dataset.py'), '--dir', args.dir,
+                        '--scale', str(args.scale)], check=True)
+    sys.path.insert(0, here)
+    os.chdir(args.dir)
+
+    recorder = QueryRecorder()
+    unchecked = record_route_queries(recorder)
+
+    conn = sqlite3.connect('job_market.db')
+    try:
+        failures = check_query_plans(conn, recorder.queries, args.verbose)
+    finally:
+        conn.close()
+    if temp_dir:
+        os.chdir(here)
+        temp_dir.cleanup()
+
+    for endpoint in unchecked:
+        print(f"Warning: no request for {endpoint} in benchmark_app.get_route_requests(), its queries went unchecked")
+
+    for source, sql, plan, scans in failures:
+        print(f"FULL SCAN of {', '.join(scans)} in {source}: {sql}")
+        for detail in plan:
+            print(f"    {detail}")
+
+    print(f"Checked {len(recorder.queries)} queries, {len(failures)} with full table scans")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+# generate_dataset.py
+import argparse
+import json
+import os
+import random
+import re
+import time
+from datetime import date, timedelta
+from werkzeug.security import generate_password_hash
+from job_market_utils import POSTED_ON_FORMATS, JOB_MARKET_POSTGRES_ERROR, job_market_indexes_available, prepare_job_market_data
+from cache_utils import prepare_data_versions
+from import_jobs import chunked, load_jobs
+from db_utils import open_db_connection
+from schema_utils import migrate
+from user_skills_utils import backfill_user_skills
+
+# Named dataset sizes (number of job postings; the other tables scale from it)
+SCALES = {
+    '1k': 1000,
+    '10k': 10000,
+    '100k': 100000,
+    '1m': 1000000,
+    '10m': 10000000,
+}
+
+# Generated dates fall in the two years before this day (fixed so runs are reproducible)
+END_DATE = date(2025, 6, 30)
+
+# Every generated user can log in with this password
+DEFAULT_PASSWORD = 'benchmark'
+
+TECHNICAL_SKILLS = [
+    "python", "javascript", "java", "c++", "sql", "react", "angular", "vue", "nodejs",
+    "django", "flask", "spring", "docker", "kubernetes", "aws", "azure", "gcp", "git",
+    "machine learning", "deep learning", "data analysis", "pandas", "tensorflow",
+    "pytorch", "mongodb", "postgresql", "html", "css", "typescript", "go", "rust",
+    "linux", "ci/cd", "system design", "algorithms", "data structures", "testing"
+]
+
+SOFT_SKILLS = [
+    "communication", "teamwork", "leadership", "problem solving", "time management",
+    "critical thinking", "creativity", "adaptability", "conflict resolution", "organization"
+]
+
+JOB_TITLES = [
+    "Software Engineer", "Data Scientist", "Data Analyst", "Frontend Developer",
+    "Backend Developer", "Full Stack Developer", "DevOps Engineer", "ML Engineer",
+    "Cloud Architect", "QA Engineer", "Product Manager", "Mobile Developer",
+    "Site Reliability Engineer", "Business Analyst", "Security Engineer"
+]
+
+COMPANIES = [
+    "Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries",
+    "Wayne Enterprises", "Wonka Labs", "Cyberdyne", "Soylent", "Tyrell", "Aperture"
+]
+
+LOCATIONS = [
+    "Bangalore", "Mumbai", "Delhi", "Hyderabad", "Pune", "Chennai", "Ahmedabad",
+    "Gandhinagar", "Kolkata", "Noida", "Gurgaon", "Remote"
+]
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Diya", "Ananya", "Isha", "Rohan", "Kavya",
+    "Arjun", "Meera", "Sanya", "Kabir", "Nikhil", "Priya", "Rahul", "Neha"
+]
+
+LAST_NAMES = [
+    "Sharma", "Patel", "Reddy", "Iyer", "Gupta", "Singh", "Mehta", "Nair",
+    "Das", "Joshi", "Kapoor", "Shah"
+]
+
+def parse_scale(text):
+    """Parse a scale like '100k', '1m', '2500' into a row count"""
+    text = str(text).strip().lower()
+    if text in SCALES:
+        return SCALES[text]
+
+    match = re.fullmatch(r'(\d+)([km]?)', text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid scale: {text}")
+    return int(match.group(1)) * {'': 1, 'k': 1000, 'm': 1000000}[match.group(2)]
+
+def table_rng(seed, table):
+    """Separate generator per table so one table's size doesn't change another's rows"""
+    return random.Random(f"{seed}-{table}")
+
+def random_date(rng, days=730):
+    return END_DATE - timedelta(days=rng.randrange(days))
+
+def insert_rows(conn, sql, rows, chunk_size):
+    """executemany() a row iterator in chunks, one transaction per chunk"""
+    count = 0
+    for chunk in chunked(rows, chunk_size):
+        conn.executemany(sql, chunk)
+        conn.commit()
+        count += len(chunk)
+    return count
+
+def generate_quiz_questions(rng):
+    for category, skills in (('technical', TECHNICAL_SKILLS), ('soft', SOFT_SKILLS)):
+        for skill in skills:
+            for number in range(5):
+                options = [f"{skill} option {letter}" for letter in 'ABCD']
+                yield (
+                    f"Question {number + 1} about {skill}?",
+                    json.dumps(options),
+                    rng.choice(options),
+                    skill,
+                    category
+                )
+
+def generate_skills_data(rng):
+    proficient = rng.sample(TECHNICAL_SKILLS, rng.randint(2, 8)) + rng.sample(SOFT_SKILLS, rng.randint(0, 3))
+    improvement = [skill for skill in rng.sample(TECHNICAL_SKILLS, 4) if skill not in proficient]
+    return {"proficientSkills": proficient, "improvementSkills": improvement}
+
+def generate_users(rng, count, password_hash):
+    for user_id in range(1, count + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        yield (
+            user_id,
+            name,
+            f"{name.split()[0].lower()}{user_id}",
+            f"user{user_id}@example.com",
+            password_hash,
+            json.dumps(generate_skills_data(rng)),
+            rng.choice(JOB_TITLES),
+            f"{random_date(rng)} 12:00:00"
+        )
+
+def generate_quiz_results(rng, user_count, per_user, question_ids):
+    for user_id in range(1, user_count + 1):
+        for _ in range(per_user):
+            category = rng.choice(['technical', 'soft'])
+            skills = TECHNICAL_SKILLS if category == 'technical' else SOFT_SKILLS
+            yield (
+                user_id,
+                rng.choice(question_ids[category]),
+                category,
+                json.dumps(rng.sample(skills, 3)),
+                json.dumps(rng.sample(skills, 2)),
+                rng.randint(0, 10),
+                f"{random_date(rng)}T10:00:00"
+            )
+
+def generate_interview_sessions(rng, user_count):
+    for user_id in range(1, user_count + 1):
+        started = random_date(rng)
+        technical_score = rng.randint(40, 95)
+        communication_score = rng.randint(40, 95)
+        yield (
+            user_id,
+            user_id,
+            rng.choice(TECHNICAL_SKILLS),
+            rng.choice(JOB_TITLES),
+            f"{started}T09:00:00",
+            'completed',
+            f"{started}T09:30:00",
+            json.dumps({"technical_score": technical_score, "communication_score": communication_score,
+                        "strengths": ["Clear explanations"]}),
+            json.dumps({"areas_for_improvement": ["Practice system design"],
+                        "overall_feedback": "Solid interview.", "next_steps": ["Review algorithms"]})
+        )
+
+def generate_interview_qa(rng, session_count, per_session):
+    for interview_id in range(1, session_count + 1):
+        for number in range(per_session):
+            yield (
+                interview_id,
+                f"Interview question {number + 1}?",
+                f"Answer {number + 1} " + ' '.join(rng.sample(TECHNICAL_SKILLS, 3)),
+                f"2024-01-01T09:{number:02d}:00"
+            )
+
+def generate_interview_results(rng, session_count):
+    for interview_id in range(1, session_count + 1):
+        technical_score = rng.randint(40, 95)
+        communication_score = rng.randint(40, 95)
+        yield (
+            interview_id,
+            interview_id,
+            technical_score,
+            communication_score,
+            (technical_score + communication_score) // 2,
+            rng.choice(TECHNICAL_SKILLS),
+            rng.choice(JOB_TITLES),
+            f"{random_date(rng)}T09:30:00"
+        )
+
+def generate_career_paths(rng):
+    for title in JOB_TITLES:
+        yield (
+            title,
+            f"Career path for a {title}.",
+            json.dumps(rng.sample(TECHNICAL_SKILLS, 5) + rng.sample(SOFT_SKILLS, 2)),
+            rng.choice(['Low', 'Medium', 'High']),
+            rng.choice(['Low', 'Medium', 'High']),
+            f"{rng.randint(5, 40)} LPA",
+            json.dumps(["Build a portfolio", "Get certified"])
+        )
+
+def generate_job_roles():
+    for title in JOB_TITLES:
+        yield (title, title, f"Resume and interview tips for {title} roles.", 'technology')
+
+def generate_recommendations(rng, user_count, path_count, per_user):
+    for user_id in range(1, user_count + 1):
+        for path_id in rng.sample(range(1, path_count + 1), per_user):
+            yield (user_id, path_id, rng.randint(40, 100), f"{random_date(rng)} 12:00:00")
+
+def generate_connections(rng, user_count, per_user):
+    for user_id in range(1, user_count + 1):
+        for _ in range(per_user):
+            other_id = rng.randint(1, user_count)
+            if other_id != user_id:
+                yield (user_id, other_id, 'connected')
+
+def generate_jobs(rng, count):
+    """Yield job_market_data rows in the shapes the scrapes use"""
+    for _ in range(count):
+        salary_low = rng.randrange(20, 200, 5)
+        exp_low = rng.randint(0, 10)
+        skills = rng.sample(TECHNICAL_SKILLS, rng.randint(3, 8)) + rng.sample(SOFT_SKILLS, rng.randint(0, 2))
+        yield {
+            'job_post': rng.choice(JOB_TITLES),
+            'company': rng.choice(COMPANIES),
+            'job_location': rng.choice(LOCATIONS),
+            'required_skills': ', '.join(skill.title() if rng.random() < 0.3 else skill for skill in skills),
+            'salary_offered': rng.choice([f"{salary_low}k-{salary_low + rng.randrange(5, 60, 5)}k", 'Not Disclosed']),
+            'exp_required': f"{exp_low}-{exp_low + rng.randint(1, 5)} years",
+            'company_rating': round(rng.uniform(2.5, 5.0), 1),
+            'Posted_on': random_date(rng).strftime(rng.choice(POSTED_ON_FORMATS)),
+        }
+
+def generate_dataset(scale, seed=42, users=None, chunk_size=50000):
+    """
+    Generate a reproducible dataset in ./job_market.db.
+
+    Args:
+        scale (int): Number of job postings
+        seed (int): Random seed; the same seed and sizes give the same rows
+        users (int): Number of users (default scale / 10, at least 50)
+        chunk_size (int): Rows per executemany() / transaction
+
+    Returns:
+        dict: Row counts per table
+    """
+    if not job_market_indexes_available():
+        raise RuntimeError(JOB_MARKET_POSTGRES_ERROR)
+
+    user_count = users or max(scale // 10, 50)
+    started = time.time()
+
+    conn = open_db_connection(synchronous='OFF', journal_mode='MEMORY')
+    migrate(conn)
+
+    counts = {}
+    counts['quiz_questions'] = insert_rows(conn, """
+        INSERT INTO quiz_questions (question, options, correct_answer, skill, category) VALUES (?, ?, ?, ?, ?)
+    """, generate_quiz_questions(table_rng(seed, 'quiz_questions')), chunk_size)
+
+    question_ids = {'technical': [], 'soft': []}
+    for row in conn.execute("SELECT id, category FROM quiz_questions"):
+        question_ids[row['category']].append(row['id'])
+
+    # Hashing is slow on purpose, so every user shares one hash
+    password_hash = generate_password_hash(DEFAULT_PASSWORD)
+    counts['users'] = insert_rows(conn, """
+        INSERT INTO users (id, name, username, email, password_hash, skills_data, job_role, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, generate_users(table_rng(seed, 'users'), user_count, password_hash), chunk_size)
+    # users.skills_data was inserted directly, so index it as migration 3 would
+    counts['user_skills'] = backfill_user_skills(conn, source='generator')
+    conn.commit()
+
+    counts['user_quiz_results'] = insert_rows(conn, """
+        INSERT INTO user_quiz_results
+        (user_id, question_id, category, proficient_skills, improvement_skills, score, completed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, generate_quiz_results(table_rng(seed, 'user_quiz_results'), user_count, 2, question_ids), chunk_size)
+
+    counts['interview_sessions'] = insert_rows(conn, """
+        INSERT INTO interview_sessions
+        (id, user_id, skill_area, job_role, started_at, status, completed_at, analysis, feedback)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, generate_interview_sessions(table_rng(seed, 'interview_sessions'), user_count), chunk_size)
+
+    counts['interview_qa'] = insert_rows(conn, """
+        INSERT INTO interview_qa (interview_id, question, answer, timestamp) VALUES (?, ?, ?, ?)
+    """, generate_interview_qa(table_rng(seed, 'interview_qa'), user_count, 5), chunk_size)
+
+    counts['user_interview_results'] = insert_rows(conn, """
+        INSERT INTO user_interview_results
+        (user_id, interview_id, technical_score, communication_score, overall_score, skill_area, job_role, completed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, generate_interview_results(table_rng(seed, 'user_interview_results'), user_count), chunk_size)
+
+    counts['career_paths'] = insert_rows(conn, """
+        INSERT INTO career_paths
+        (title, description, required_skills, growth_potential, market_demand, avg_salary, next_steps)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, generate_career_paths(table_rng(seed, 'career_paths')), chunk_size)
+
+    counts['user_career_recommendations'] = insert_rows(conn, """
+        INSERT INTO user_career_recommendations (user_id, career_path_id, matching_score, recommendation_date)
+        VALUES (?, ?, ?, ?)
+    """, generate_recommendations(table_rng(seed, 'user_career_recommendations'), user_count,
+                                  counts['career_paths'], 3), chunk_size)
+
+    counts['job_roles'] = insert_rows(conn, """
+        INSERT INTO job_roles (role_name, title, description, category) VALUES (?, ?, ?, ?)
+    """, generate_job_roles(), chunk_size)
+
+    counts['user_connections'] = insert_rows(conn, """
+        INSERT INTO user_connections (user_id, connected_user_id, status) VALUES (?, ?, ?)
+    """, generate_connections(table_rng(seed, 'user_connections'), user_count, 2), chunk_size)
+    conn.close()
+
+    # Jobs go through the bulk importer so the derived tables are built the same way
+    counts['job_market_data'] = load_jobs(generate_jobs(table_rng(seed, 'job_market_data'), scale),
+                                          replace=True, chunk_size=chunk_size, source='generator')
+    prepare_job_market_data()
+    prepare_data_versions()
+
+    print(f"Generated dataset in {time.time() - started:.1f}s: {json.dumps(counts)}")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic job_market.db for benchmarks")
+    parser.add_argument('--scale', type=parse_scale, default=SCALES['10k'],
+                        help="Number of job postings: 1k, 10k, 100k, 1m, 10m or a number (default: 10k)")
+    parser.add_argument('--users', type=parse_scale, help="Number of users (default: scale / 10)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument('--dir', default='benchmark_data', help="Directory for job_market.db (default: benchmark_data)")
+    parser.add_argument('--force', action='store_true', help="Overwrite an existing database")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="Rows per insert batch / transaction")
+    args = parser.parse_args()
+    if not job_market_indexes_available():
+        parser.error(JOB_MARKET_POSTGRES_ERROR)
+
+    os.makedirs(args.dir, exist_ok=True)
+    os.chdir(args.dir)
+    if os.path.exists('job_market.db'):
+        if not args.force:
+            parser.error(f"{os.path.join(args.dir, 'job_market.db')} already exists (use --force to overwrite)")
+        os.remove('job_market.db')
+
+    generate_dataset(args.scale, args.seed, args.users, args.chunk_size)
+
+if __name__ == '__main__':
+    main()
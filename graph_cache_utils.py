@@ -0,0 +1,353 @@
+# graph_cache_utils.py
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from db_utils import get_read_connection
+from cache_utils import get_data_versions
+from graph_snapshot_utils import load_graph_snapshot, save_graph_snapshot
+from graph_layout_utils import compute_layout, scale_layout
+from network_analysis import (
+    build_user_similarity_network,
+    get_skill_job_network,
+    get_full_network,
+    get_user_skill_sets,
+    get_similar_user_pairs,
+    add_user_node,
+    add_user_skill_edges,
+    add_similarity_edges,
+    SIMILARITY_METRIC,
+    SIMILARITY_MIN_OVERLAP,
+    SIMILARITY_TOP_K,
+    SIMILARITY_MAX_SKILL_USERS
+)
+
+# More changed users than this since a graph was built means a full rebuild
+GRAPH_MAX_INCREMENTAL_USERS = int(os.environ.get('GRAPH_MAX_INCREMENTAL_USERS', 500))
+
+# Share of the users with skills whose links a change may affect before the
+# similarity graph is rebuilt instead of patched
+GRAPH_MAX_AFFECTED_SHARE = float(os.environ.get('GRAPH_MAX_AFFECTED_SHARE', 0.5))
+
+# graph kind -> (follows user changes, follows job market changes)
+GRAPH_KINDS = {
+    'user_similarity': (True, False),
+    'skill_job': (False, True),
+    'full': (True, True),
+}
+
+@dataclass(frozen=True)
+class GraphVersion:
+    """Data a cached graph reflects: last graph_changes row and job_market version"""
+    change_id: int
+    job_version: int
+
+@dataclass
+class CachedGraph:
+    """
+    A built graph and the version of the data it reflects.
+    Never modified once published: updates build a new CachedGraph.
+    """
+    graph: object
+    version: GraphVersion
+    user_skills: dict = field(default_factory=dict)
+
+def get_graph_version(conn):
+    row = conn.execute("SELECT MAX(id) FROM graph_changes").fetchone()
+    job_version = get_data_versions(conn, ['job_market'])['job_market'][0]
+    return GraphVersion(row[0] or 0, job_version)
+
+def get_snapshot_tag(conn):
+    """
+    Hash of the database identity and the settings that shape the graphs,
+    part of every snapshot name: a regenerated database or changed settings
+    never load a snapshot built from other data.
+    """
+    row = conn.execute("SELECT token FROM database_identity WHERE id = 1").fetchone()
+    settings = [row['token'] if row is not None else None, SIMILARITY_METRIC, SIMILARITY_MIN_OVERLAP,
+                SIMILARITY_TOP_K, SIMILARITY_MAX_SKILL_USERS]
+    return hashlib.sha1(json.dumps(settings).encode('utf-8')).hexdigest()[:16]
+
+def get_affected_users(old_skills, new_skills, user_ids):
+    """
+    Users whose similarity links can change when `user_ids` change skills:
+    the changed users and everyone holding a skill they had or have (their
+    neighbour lists gain or lose the changed users, and those skills' IDF
+    weights move).
+
+    Returns:
+        set: User ids, or None when a rebuild is needed instead (too many
+        users affected, or every IDF weight moved)
+    """
+    # IDF weights depend on how many users have skills
+    if SIMILARITY_METRIC == 'idf' and len(old_skills) != len(new_skills):
+        return None
+
+    skills = set()
+    for user_id in user_ids:
+        skills.update(old_skills.get(user_id, ()), new_skills.get(user_id, ()))
+    affected = set(user_ids)
+    affected.update(user_id for user_id, user_skills in new_skills.items() if not skills.isdisjoint(user_skills))
+
+    if len(affected) > GRAPH_MAX_AFFECTED_SHARE * len(new_skills):
+        return None
+    return affected
+
+def get_changed_users(conn, since_change_id):
+    """
+    Users touched since a change id, or None when they can't be replayed
+    (too many, or the log was pruned past that point).
+    """
+    oldest = conn.execute("SELECT MIN(id) FROM graph_changes").fetchone()[0]
+    if oldest is not None and oldest > since_change_id + 1:
+        return None
+
+    rows = conn.execute("""
+        SELECT DISTINCT user_id FROM graph_changes WHERE id > ? LIMIT ?
+    """, (since_change_id, GRAPH_MAX_INCREMENTAL_USERS + 1)).fetchall()
+    if len(rows) > GRAPH_MAX_INCREMENTAL_USERS:
+        return None
+    return [row[0] for row in rows]
+
+class GraphCache:
+    """
+    Long-lived network graphs, built once per worker and kept up to date.
+
+    Every read compares the graph's version with the data. Changed users
+    (found through the graph_changes log) are patched into a copy of the
+    graph; job market changes, long gaps and large batches rebuild it.
+    The new graph is published with one reference swap, so readers always
+    hold a complete graph. Graphs are shared: callers must not modify them.
+    """
+
+    def __init__(self, parent=None):
+        # A forked worker starts with the graphs its parent had (never modified,
+        # so safe to share); the locks are its own
+        self.graphs = dict(parent.graphs) if parent is not None else {}
+        self.locks = {kind: threading.Lock() for kind in GRAPH_KINDS}
+        # kind -> (GraphVersion, node -> (x, y)), the layout of the current graph
+        self.layouts = dict(parent.layouts) if parent is not None else {}
+        self.layout_locks = {kind: threading.Lock() for kind in GRAPH_KINDS}
+
+    def get(self, kind):
+        """
+        Get an up-to-date graph.
+
+        Args:
+            kind (str): 'user_similarity', 'skill_job' or 'full'
+
+        Returns:
+            networkx graph (read-only)
+        """
+        follows_users, follows_jobs = GRAPH_KINDS[kind]
+
+        conn = get_read_connection()
+        try:
+            version = get_graph_version(conn)
+            cached = self.graphs.get(kind)
+            if cached is not None and self.is_current(cached, version, follows_users, follows_jobs):
+                return cached.graph
+
+            # One thread updates a graph at a time; the others wait for its result
+            with self.locks[kind]:
+                cached = self.graphs.get(kind)
+                version = get_graph_version(conn)
+                if cached is None:
+                    # Cold start: begin from the newest on-disk snapshot
+                    cached = self.load_snapshot(conn, kind, version)
+                if cached is not None and self.is_current(cached, version, follows_users, follows_jobs):
+                    self.graphs[kind] = cached
+                    return cached.graph
+
+                updated = None
+                if cached is not None and (not follows_jobs or cached.version.job_version == version.job_version):
+                    changed_users = get_changed_users(conn, cached.version.change_id)
+                    if changed_users is not None:
+                        updated = self.apply_user_changes(conn, kind, cached, version, changed_users)
+
+                if updated is None:
+                    updated = self.build(conn, kind, version)
+                    try:
+                        save_graph_snapshot(kind, get_snapshot_tag(conn), (version.change_id, version.job_version),
+                                            updated.graph)
+                    except OSError as e:
+                        print(f"Error saving {kind} graph snapshot: {e}")
+
+                self.graphs[kind] = updated
+                return updated.graph
+        finally:
+            conn.close()
+
+    def preload(self, kind):
+        """
+        Load the newest usable on-disk snapshot of a graph kind, if the cache
+        has none yet. Never builds from SQL: without a snapshot the graph is
+        built by the first request. The next get() brings it up to date.
+        """
+        with self.locks[kind]:
+            if kind in self.graphs:
+                return
+            conn = get_read_connection()
+            try:
+                cached = self.load_snapshot(conn, kind, get_graph_version(conn))
+            finally:
+                conn.close()
+            if cached is not None:
+                self.graphs[kind] = cached
+
+    def build(self, conn, kind, version):
+        if kind == 'user_similarity':
+            # Keeps the skill sets, the incremental updates need them
+            users = conn.execute("SELECT id, name, email, job_role FROM users").fetchall()
+            user_skills = get_user_skill_sets(conn)
+            return CachedGraph(build_user_similarity_network(users, user_skills), version, user_skills)
+        if kind == 'skill_job':
+            return CachedGraph(get_skill_job_network(), version)
+        return CachedGraph(get_full_network(), version)
+
+    def load_snapshot(self, conn, kind, version):
+        follows_users, follows_jobs = GRAPH_KINDS[kind]
+        snapshot = load_graph_snapshot(kind, get_snapshot_tag(conn), (version.change_id, version.job_version),
+                                       follows_users, follows_jobs)
+        if snapshot is None:
+            return None
+
+        graph, (change_id, job_version) = snapshot
+        user_skills = {}
+        if kind == 'user_similarity':
+            # The user -> skill edges are exactly the skill sets
+            for node, attrs in graph.nodes(data=True):
+                if node.startswith('user_'):
+                    skills = {n[len('skill_'):] for n in graph.neighbors(node) if n.startswith('skill_')}
+                    if skills:
+                        user_skills[attrs['user_id']] = skills
+        return CachedGraph(graph, GraphVersion(change_id, job_version), user_skills)
+
+    def is_current(self, cached, version, follows_users, follows_jobs):
+        if follows_users and cached.version.change_id != version.change_id:
+            return False
+        if follows_jobs and cached.version.job_version != version.job_version:
+            return False
+        return True
+
+    def apply_user_changes(self, conn, kind, cached, version, user_ids):
+        """
+        Copy a graph and re-read the changed users into the copy, with the
+        similarity links of every user the change affects.
+
+        Returns:
+            CachedGraph, or None when a rebuild is needed instead
+        """
+        if not user_ids:
+            return CachedGraph(cached.graph, version, cached.user_skills)
+        graph = cached.graph.copy()
+
+        placeholders = ','.join(['?' for _ in user_ids])
+        users = {row['id']: row for row in conn.execute(
+            f"SELECT id, name, email, job_role FROM users WHERE id IN ({placeholders})", user_ids
+        )}
+        changed_skills = get_user_skill_sets(conn, user_ids)
+
+        for user_id in user_ids:
+            node = f"user_{user_id}"
+            if graph.has_node(node):
+                old_skills = [n for n in graph.neighbors(node) if n.startswith('skill_')]
+                graph.remove_node(node)
+                # Drop skill nodes nobody links to any more
+                graph.remove_nodes_from([n for n in old_skills if graph.degree(n) == 0])
+
+            if user_id in users:
+                add_user_node(graph, users[user_id])
+                add_user_skill_edges(graph, user_id, changed_skills.get(user_id, ()))
+
+        user_skills = cached.user_skills
+        if kind == 'user_similarity':
+            # The same skill sets a rebuild reads (get_user_skill_sets())
+            user_skills = dict(user_skills)
+            for user_id in user_ids:
+                user_skills.pop(user_id, None)
+                if user_id in changed_skills:
+                    user_skills[user_id] = changed_skills[user_id]
+
+            affected = get_affected_users(cached.user_skills, user_skills, user_ids)
+            if affected is None:
+                return None
+
+            # Users linked to an affected user keep their own neighbour lists,
+            # which can still name it, so theirs are recomputed too
+            linked = set()
+            for user_id in affected:
+                node = f"user_{user_id}"
+                if graph.has_node(node):
+                    links = [n for n in graph.neighbors(node) if n.startswith('user_')]
+                    linked.update(graph.nodes[n]['user_id'] for n in links)
+                    graph.remove_edges_from([(node, n) for n in links])
+
+            pairs = get_similar_user_pairs(user_skills, user_ids=sorted(affected | linked))
+            add_similarity_edges(graph, {
+                pair: link for pair, link in pairs.items() if pair[0] in affected or pair[1] in affected
+            })
+
+        return CachedGraph(graph, version, user_skills)
+
+    def get_layout(self, kind):
+        """
+        Node positions for the current graph of a kind, in vis.js pixels.
+
+        Computed once per graph version, warm-started from the previous
+        layout so nodes stay where they were and only changed users move.
+        """
+        self.get(kind)
+        cached = self.graphs[kind]
+
+        with self.layout_locks[kind]:
+            version, positions = self.layouts.get(kind, (None, None))
+            if version != cached.version:
+                started = time.time()
+                positions = compute_layout(cached.graph, previous=positions)
+                self.layouts[kind] = (cached.version, positions)
+                print(f"Computed {kind} graph layout in {time.time() - started:.1f}s")
+            return scale_layout(positions)
+
+    def clear(self):
+        self.graphs = {}
+        self.layouts = {}
+
+_graph_cache = None
+_graph_cache_pid = None
+_graph_cache_lock = threading.Lock()
+
+def get_graph_cache():
+    """This process's graph cache (forked workers start their own, from the parent's graphs)"""
+    global _graph_cache, _graph_cache_pid
+    with _graph_cache_lock:
+        if _graph_cache is None or _graph_cache_pid != os.getpid():
+            _graph_cache = GraphCache(_graph_cache)
+            _graph_cache_pid = os.getpid()
+        return _graph_cache
+
+def preload_graph_snapshots():
+    """
+    Load every graph kind's on-disk snapshot at startup, so the first
+    network request in a worker doesn't pay for it (with a preloaded app,
+    forked workers inherit the graphs)
+    """
+    started = time.time()
+    cache = get_graph_cache()
+    for kind in GRAPH_KINDS:
+        try:
+            cache.preload(kind)
+        except Exception as e:
+            print(f"Error preloading {kind} graph snapshot: {e}")
+    if cache.graphs:
+        print(f"Loaded graph snapshots ({', '.join(sorted(cache.graphs))}) in {time.time() - started:.1f}s")
+
+def get_graph(kind):
+    """Up-to-date cached network graph ('user_similarity', 'skill_job' or 'full')"""
+    return get_graph_cache().get(kind)
+
+def get_graph_layout(kind):
+    """Precomputed node positions for the cached network graph of a kind"""
+    return get_graph_cache().get_layout(kind)
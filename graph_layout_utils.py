@@ -0,0 +1,139 @@
+# graph_layout_utils.py
+import os
+import numpy as np
+
+# Iterations for a layout computed from scratch, and for one warm-started
+# from the previous positions (most nodes are already in place)
+LAYOUT_ITERATIONS = int(os.environ.get('LAYOUT_ITERATIONS', 100))
+LAYOUT_WARM_ITERATIONS = int(os.environ.get('LAYOUT_WARM_ITERATIONS', 15))
+
+# Largest step a node can move in the first iteration (layout is in [-1, 1]),
+# from scratch and when warm-started
+LAYOUT_TEMPERATURE = 0.1
+LAYOUT_WARM_TEMPERATURE = 0.02
+
+# Above this many nodes the repulsion is estimated from a random sample of
+# nodes instead of every pair, which keeps an iteration O(n * sample)
+LAYOUT_EXACT_LIMIT = int(os.environ.get('LAYOUT_EXACT_LIMIT', 1000))
+LAYOUT_SAMPLE_SIZE = int(os.environ.get('LAYOUT_SAMPLE_SIZE', 500))
+
+# Rows of the pairwise repulsion computed at once (bounds memory to chunk * n)
+LAYOUT_CHUNK_SIZE = 1024
+
+# Pixel scale of the positions handed to vis.js
+LAYOUT_SCALE = 1000
+
+def get_repulsion(pos, k, rng):
+    """Repulsive displacement k^2 / d for every node, exact or sampled"""
+    n = len(pos)
+    others = pos
+    weight = 1.0
+    if n > LAYOUT_EXACT_LIMIT:
+        others = pos[rng.choice(n, LAYOUT_SAMPLE_SIZE, replace=False)]
+        weight = n / LAYOUT_SAMPLE_SIZE
+
+    displacement = np.empty_like(pos)
+    for start in range(0, n, LAYOUT_CHUNK_SIZE):
+        chunk = pos[start:start + LAYOUT_CHUNK_SIZE]
+        # x and y as separate 2-D arrays, updated in place: far fewer temporaries
+        dx = chunk[:, 0, None] - others[None, :, 0]
+        dy = chunk[:, 1, None] - others[None, :, 1]
+        force = dx * dx
+        force += dy * dy
+        np.maximum(force, 1e-6, out=force)
+        np.divide(k * k, force, out=force)
+        displacement[start:start + LAYOUT_CHUNK_SIZE, 0] = (dx * force).sum(axis=1)
+        displacement[start:start + LAYOUT_CHUNK_SIZE, 1] = (dy * force).sum(axis=1)
+    return displacement * weight
+
+def get_attraction(pos, sources, targets, k):
+    """Attractive displacement d^2 / k along every edge, for both ends"""
+    displacement = np.zeros_like(pos)
+    if len(sources):
+        delta = pos[sources] - pos[targets]
+        distance = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-3)
+        force = delta * (distance / k)[:, None]
+        np.add.at(displacement, sources, -force)
+        np.add.at(displacement, targets, force)
+    return displacement
+
+def get_initial_positions(nodes, index, sources, targets, previous, rng):
+    """
+    Previous positions where known. New nodes start at the mean of their
+    placed neighbours (next to where they belong), or at random.
+    """
+    pos = rng.uniform(-1, 1, (len(nodes), 2))
+    if not previous:
+        return pos, False
+
+    placed = np.zeros(len(nodes), dtype=bool)
+    for node, xy in previous.items():
+        i = index.get(node)
+        if i is not None:
+            pos[i] = xy
+            placed[i] = True
+
+    if placed.any() and not placed.all():
+        neighbour_sum = np.zeros_like(pos)
+        neighbour_count = np.zeros(len(nodes))
+        for a, b in ((sources, targets), (targets, sources)):
+            known = placed[b] & ~placed[a]
+            np.add.at(neighbour_sum, a[known], pos[b[known]])
+            np.add.at(neighbour_count, a[known], 1)
+        has_neighbours = neighbour_count > 0
+        jitter = rng.uniform(-0.02, 0.02, (has_neighbours.sum(), 2))
+        pos[has_neighbours] = neighbour_sum[has_neighbours] / neighbour_count[has_neighbours, None] + jitter
+
+    # Warm start only when most of the graph is already laid out
+    return pos, placed.mean() >= 0.5
+
+def compute_layout(graph, previous=None, iterations=None, seed=42):
+    """
+    Fruchterman-Reingold force-directed layout, vectorized with NumPy.
+
+    Args:
+        graph: networkx graph
+        previous (dict): node -> (x, y) from an earlier layout to warm-start from
+        iterations (int): Override the number of iterations
+        seed (int): Seed for the random start / repulsion sample
+
+    Returns:
+        dict: node -> (x, y) in [-1, 1]
+    """
+    nodes = list(graph.nodes)
+    if not nodes:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[a], index[b]) for a, b in graph.edges() if a != b], dtype=np.int64).reshape(-1, 2)
+    sources, targets = edges[:, 0], edges[:, 1]
+
+    pos, warm = get_initial_positions(nodes, index, sources, targets, previous, rng)
+    if iterations is None:
+        iterations = LAYOUT_WARM_ITERATIONS if warm else LAYOUT_ITERATIONS
+    temperature = LAYOUT_WARM_TEMPERATURE if warm else LAYOUT_TEMPERATURE
+
+    # Optimal distance between nodes for a layout of area 4 ([-1, 1] square)
+    k = np.sqrt(4.0 / len(nodes))
+
+    for step in range(iterations):
+        displacement = get_repulsion(pos, k, rng) + get_attraction(pos, sources, targets, k)
+
+        # Move each node along its displacement, at most `temperature` far
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 1e-9)
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+
+        # Linear cooling
+        temperature *= 1 - 1 / (iterations - step + 1)
+
+    # Centre and fit into [-1, 1]
+    pos -= pos.mean(axis=0)
+    extent = np.abs(pos).max()
+    if extent > 0:
+        pos /= extent
+    return {node: (float(x), float(y)) for node, (x, y) in zip(nodes, pos)}
+
+def scale_layout(positions, scale=LAYOUT_SCALE):
+    """Positions in vis.js pixels"""
+    return {node: (round(x * scale, 1), round(y * scale, 1)) for node, (x, y) in positions.items()}
@@ -0,0 +1,233 @@
+# graph_snapshot_utils.py
+import json
+import os
+import shutil
+import threading
+import time
+import networkx as nx
+import numpy as np
+
+# Directory for the on-disk graph snapshots (empty disables them)
+GRAPH_SNAPSHOT_DIR = os.environ.get('GRAPH_SNAPSHOT_DIR', 'graph_snapshots')
+
+# Snapshots kept per graph kind; older ones are deleted after a save
+GRAPH_SNAPSHOTS_KEPT = int(os.environ.get('GRAPH_SNAPSHOTS_KEPT', 2))
+
+# Integer attribute columns mark missing values with this
+MISSING_INT = np.iinfo(np.int64).min
+
+class StringTable:
+    """Interned strings, stored as one UTF-8 buffer plus offsets"""
+
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def intern(self, value):
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return position
+
+    def to_arrays(self):
+        encoded = [value.encode('utf-8') for value in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(value) for value in encoded])
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def decode_strings(data, offsets):
+    data = data.tobytes()
+    offsets = offsets.tolist()
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+def encode_column(values, strings):
+    """
+    One attribute as an array: int64 when every value is an int, float64
+    when every value is a number, otherwise indexes into the string table
+    (-1 / MISSING_INT / NaN for missing values).
+    """
+    if all(value is None or (isinstance(value, int) and not isinstance(value, bool)) for value in values):
+        return 'int', np.array([MISSING_INT if value is None else value for value in values], dtype=np.int64)
+    if all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)) for value in values):
+        return 'float', np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    return 'str', np.array([-1 if value is None else strings.intern(str(value)) for value in values], dtype=np.int32)
+
+def decode_column(kind, array, strings):
+    if kind == 'int':
+        return [None if value == MISSING_INT else value for value in array.tolist()]
+    if kind == 'float':
+        return [None if value != value else value for value in array.tolist()]
+    return [None if value < 0 else strings[value] for value in array.tolist()]
+
+def encode_attributes(items, strings):
+    """Attribute dicts -> {name: (kind, array)}, one column per attribute name"""
+    names = sorted({name for attrs in items for name in attrs})
+    return {name: encode_column([attrs.get(name) for attrs in items], strings) for name in names}
+
+def decode_attributes(columns, count, strings):
+    items = [{} for _ in range(count)]
+    for name, (kind, array) in columns.items():
+        for attrs, value in zip(items, decode_column(kind, array, strings)):
+            if value is not None:
+                attrs[name] = value
+    return items
+
+def save_graph(graph, path):
+    """
+    Write a graph as CSR arrays (one .npy file each) with an interned string
+    table, into a new directory. Written to a temporary directory and renamed,
+    so readers never see a partial snapshot.
+    """
+    strings = StringTable()
+    nodes = list(graph.nodes)
+    position = {node: i for i, node in enumerate(nodes)}
+
+    # Edges grouped by source node (CSR): indptr[i]:indptr[i + 1] are node i's edges
+    edges = sorted(graph.edges(data=True), key=lambda edge: position[edge[0]])
+    sources = np.array([position[source] for source, _, _ in edges], dtype=np.int64)
+    indptr = np.searchsorted(sources, np.arange(len(nodes) + 1)).astype(np.int64)
+
+    arrays = {
+        'nodes': np.array([strings.intern(str(node)) for node in nodes], dtype=np.int32),
+        'indptr': indptr,
+        'indices': np.array([position[target] for _, target, _ in edges], dtype=np.int32),
+    }
+    meta = {'directed': graph.is_directed(), 'node_attrs': {}, 'edge_attrs': {}}
+
+    for prefix, items in (('node', [attrs for _, attrs in graph.nodes(data=True)]),
+                          ('edge', [attrs for _, _, attrs in edges])):
+        for name, (kind, array) in encode_attributes(items, strings).items():
+            meta[f"{prefix}_attrs"][name] = kind
+            arrays[f"{prefix}_attr_{len(meta[f'{prefix}_attrs']) - 1}"] = array
+
+    arrays['strings'], arrays['string_offsets'] = strings.to_arrays()
+
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(temp_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(temp_path, f"{name}.npy"), array)
+    with open(os.path.join(temp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    try:
+        os.rename(temp_path, path)
+    except OSError:
+        # Another worker saved the same version first
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+def load_graph(path):
+    """
+    Read a graph written by save_graph() into a new NetworkX graph.
+
+    The arrays are memory-mapped only to decode them: the graph is a
+    private copy in every worker, so a snapshot saves the rebuild from SQL
+    and JSON, not memory.
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+
+    def array(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+
+    strings = decode_strings(array('strings'), array('string_offsets'))
+    nodes = [strings[i] for i in array('nodes').tolist()]
+    indptr = array('indptr').tolist()
+    indices = array('indices').tolist()
+
+    node_attrs = decode_attributes(
+        {name: (kind, array(f"node_attr_{i}")) for i, (name, kind) in enumerate(meta['node_attrs'].items())},
+        len(nodes), strings)
+    edge_attrs = decode_attributes(
+        {name: (kind, array(f"edge_attr_{i}")) for i, (name, kind) in enumerate(meta['edge_attrs'].items())},
+        len(indices), strings)
+
+    graph = nx.DiGraph() if meta['directed'] else nx.Graph()
+    graph.add_nodes_from(zip(nodes, node_attrs))
+    graph.add_edges_from(
+        (nodes[source], nodes[indices[j]], edge_attrs[j])
+        for source in range(len(nodes))
+        for j in range(indptr[source], indptr[source + 1])
+    )
+    return graph
+
+def get_snapshot_path(kind, tag, version):
+    change_id, job_version = version
+    return os.path.join(GRAPH_SNAPSHOT_DIR, f"{kind}-{tag}-{change_id}-{job_version}")
+
+def list_graph_snapshots(kind):
+    """
+    Snapshots of a graph kind as (tag, (change_id, job_version), path),
+    newest first. Names in an older, untagged format get a tag of None.
+    """
+    try:
+        names = os.listdir(GRAPH_SNAPSHOT_DIR)
+    except OSError:
+        return []
+
+    snapshots = []
+    for name in names:
+        # Temporary directories of saves in progress
+        if name.endswith('.tmp'):
+            continue
+        parts = name.split('-')
+        if parts[0] != kind or len(parts) not in (3, 4) or not all(part.isdigit() for part in parts[-2:]):
+            continue
+        tag = parts[1] if len(parts) == 4 else None
+        snapshots.append((tag, (int(parts[-2]), int(parts[-1])), os.path.join(GRAPH_SNAPSHOT_DIR, name)))
+    return sorted(snapshots, key=lambda snapshot: snapshot[1], reverse=True)
+
+def save_graph_snapshot(kind, tag, version, graph):
+    """
+    Save a graph for (change_id, job_version) under `tag`, and drop older
+    snapshots of that kind and every snapshot with another tag.
+
+    Args:
+        tag (str): Identity of the database and settings the graph was built
+            from; only snapshots with the same tag are loaded
+    """
+    if not GRAPH_SNAPSHOT_DIR:
+        return
+    os.makedirs(GRAPH_SNAPSHOT_DIR, exist_ok=True)
+
+    path = get_snapshot_path(kind, tag, version)
+    if not os.path.exists(path):
+        started = time.time()
+        save_graph(graph, path)
+        print(f"Saved {kind} graph snapshot in {time.time() - started:.1f}s")
+
+    kept = 0
+    for snapshot_tag, _, snapshot_path in list_graph_snapshots(kind):
+        if snapshot_tag == tag and kept < GRAPH_SNAPSHOTS_KEPT:
+            kept += 1
+            continue
+        shutil.rmtree(snapshot_path, ignore_errors=True)
+
+def load_graph_snapshot(kind, tag, version, follows_users, follows_jobs):
+    """
+    Load the newest usable snapshot of a graph kind.
+
+    A snapshot is usable when it has the same tag, is not newer than
+    `version` and, for graphs with jobs, has the same job_market version;
+    user changes after it can be replayed by the caller.
+
+    Returns:
+        tuple: (graph, (change_id, job_version)), or None
+    """
+    if not GRAPH_SNAPSHOT_DIR:
+        return None
+
+    change_id, job_version = version
+    for snapshot_tag, snapshot_version, snapshot_path in list_graph_snapshots(kind):
+        if snapshot_tag != tag:
+            continue
+        if follows_users and snapshot_version[0] > change_id:
+            continue
+        if follows_jobs and snapshot_version[1] != job_version:
+            continue
+        try:
+            return load_graph(snapshot_path), snapshot_version
+        except (OSError, ValueError, KeyError) as e:
+            # Deleted by another worker, or unreadable; try the next one
+            print(f"Error loading {kind} graph snapshot: {e}")
+    return None
@@ -0,0 +1,219 @@
+# import_jobs.py
+import argparse
+import csv
+import json
+import time
+from pathlib import Path
+from job_market_utils import (
+    PARSED_COLUMNS,
+    JOB_MARKET_POSTGRES_ERROR,
+    job_market_indexes_available,
+    get_job_columns,
+    ensure_job_market_table,
+    ensure_job_market_schema,
+    index_job_skills,
+    index_job_columns,
+    index_job_aggregates,
+    recompute_aggregate_counts,
+    rebuild_job_search_index
+)
+from cache_utils import ensure_data_version_schema, bump_data_version
+from db_utils import open_db_connection
+
+# Tables whose triggers and secondary indexes are dropped during a bulk load
+BULK_LOAD_TABLES = ('job_market_data', 'job_skills', 'job_aggregate_keys')
+
+# PRAGMAs used while loading; the previous values are restored afterwards
+BULK_LOAD_PRAGMAS = {
+    'synchronous': 'OFF',
+    'journal_mode': 'MEMORY',
+    'cache_size': '-262144',  # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+def read_csv_rows(path):
+    """Stream rows of a CSV file with a header line as dicts"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+def read_jsonl_rows(path):
+    """Stream objects of a JSON Lines file"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def read_rows(path, file_format=None):
+    """Stream rows from a CSV or JSONL scrape file (format guessed from the extension)"""
+    file_format = file_format or Path(path).suffix.lstrip('.').lower()
+    if file_format == 'csv':
+        return read_csv_rows(path)
+    if file_format in ('jsonl', 'ndjson'):
+        return read_jsonl_rows(path)
+    raise ValueError(f"Unsupported input format: {file_format}")
+
+def chunked(rows, chunk_size):
+    """Group an iterator of rows into lists of at most chunk_size"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def clean_value(value):
+    """Empty strings from the scrape become NULL"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+def suspend_table_objects(conn, tables):
+    """
+    Drop the triggers and secondary indexes of `tables`.
+
+    Returns:
+        list: (name, sql) pairs to pass to restore_table_objects()
+    """
+    placeholders = ','.join(['?' for _ in tables])
+    objects = conn.execute(f"""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('trigger', 'index') AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    """, list(tables)).fetchall()
+
+    for object_type, name, _ in objects:
+        conn.execute(f"DROP {object_type.upper()} IF EXISTS {name}")
+    return [(name, sql) for _, name, sql in objects]
+
+def restore_table_objects(conn, objects):
+    """Recreate triggers and indexes dropped by suspend_table_objects()"""
+    for name, sql in objects:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        if not exists:
+            conn.execute(sql)
+
+def load_jobs(rows, replace=False, chunk_size=50000, source="input"):
+    """
+    Bulk load job rows into job_market_data.
+
+    Rows are inserted in chunks with executemany(), with the sync / journal
+    PRAGMAs relaxed and the triggers and indexes of the job tables dropped.
+    Afterwards the indexes are rebuilt and the derived tables (skills,
+    parsed columns, aggregates, full-text index) are filled in bulk: for
+    the new rows only when appending, from scratch when replacing.
+
+    Args:
+        rows (iterable): Dicts keyed by job_market_data column names
+        replace (bool): Delete the existing jobs first (nightly refresh)
+        chunk_size (int): Rows per executemany() / transaction
+        source (str): Name of the input, for error messages
+
+    Returns:
+        int: Number of rows imported
+    """
+    if not job_market_indexes_available():
+        raise RuntimeError(JOB_MARKET_POSTGRES_ERROR)
+
+    # A private connection, since the PRAGMAs are changed for the load
+    conn = open_db_connection()
+    ensure_job_market_table(conn)
+    ensure_job_market_schema(conn)
+    ensure_data_version_schema(conn)
+    conn.commit()
+
+    saved_pragmas = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_LOAD_PRAGMAS}
+    for name, value in BULK_LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+    suspended = suspend_table_objects(conn, BULK_LOAD_TABLES)
+    conn.commit()
+
+    try:
+        started = time.time()
+        if replace:
+            conn.execute("DELETE FROM job_market_data")
+            # Everything is new, so the derived tables are rebuilt whole
+            after_id = None
+        else:
+            # Appended rows get larger ids than every existing job
+            after_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM job_market_data").fetchone()[0]
+
+        # Only load columns the table knows about; derived columns are recomputed
+        table_columns = [column for column in get_job_columns(conn) if column not in PARSED_COLUMNS]
+        columns = None
+        row_count = 0
+
+        for chunk in chunked(rows, chunk_size):
+            if columns is None:
+                columns = [column for column in table_columns if column in chunk[0]]
+                if not columns:
+                    raise ValueError(f"No job_market_data columns found in {source}")
+                insert_sql = f"INSERT INTO job_market_data ({', '.join(columns)}) VALUES ({', '.join(['?' for _ in columns])})"
+
+            conn.executemany(insert_sql, [tuple(clean_value(row.get(column)) for column in columns) for row in chunk])
+            conn.commit()
+
+            row_count += len(chunk)
+            elapsed = time.time() - started
+            print(f"Loaded {row_count} rows ({row_count / elapsed:.0f} rows/s)")
+
+        load_seconds = time.time() - started
+
+        # Derived data is cheapest to compute in bulk before the indexes come back
+        index_job_skills(conn, after_id=after_id)
+        index_job_columns(conn, after_id=after_id)
+        index_job_aggregates(conn, after_id=after_id)
+        restore_table_objects(conn, suspended)
+        suspended = []
+        recompute_aggregate_counts(conn, after_id)
+        rebuild_job_search_index(conn, after_id)
+        bump_data_version(conn, 'job_market')
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+
+        total_seconds = time.time() - started
+        print(f"Imported {row_count} rows in {total_seconds:.1f}s "
+              f"(load {load_seconds:.1f}s, {row_count / max(load_seconds, 1e-9):.0f} rows/s; "
+              f"overall {row_count / max(total_seconds, 1e-9):.0f} rows/s)")
+        return row_count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        restore_table_objects(conn, suspended)
+        conn.commit()
+        for name, value in saved_pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        conn.close()
+
+def import_jobs(path, file_format=None, replace=False, chunk_size=50000):
+    """
+    Bulk import a CSV or JSONL scrape file (see load_jobs()).
+
+    Args:
+        path (str): CSV or JSONL file
+        file_format (str): 'csv' or 'jsonl'; guessed from the extension when None
+        replace (bool): Delete the existing jobs first
+        chunk_size (int): Rows per executemany() / transaction
+
+    Returns:
+        int: Number of rows imported
+    """
+    return load_jobs(read_rows(path, file_format), replace, chunk_size, source=path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import job market scrape files")
+    parser.add_argument('path', help="CSV or JSONL file to import")
+    parser.add_argument('--format', dest='file_format', choices=['csv', 'jsonl'], help="Input format (default: from extension)")
+    parser.add_argument('--replace', action='store_true', help="Replace all existing jobs instead of appending")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="Rows per insert batch / transaction")
+    args = parser.parse_args()
+    if not job_market_indexes_available():
+        parser.error(JOB_MARKET_POSTGRES_ERROR)
+
+    import_jobs(args.path, args.file_format, args.replace, args.chunk_size)
+
+if __name__ == '__main__':
+    main()
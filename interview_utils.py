@@ -2,8 +2,8 @@
 import json
 import os
 from dotenv import load_dotenv
-import sqlite3
 import google.generativeai as genai
+from db_utils import get_db_connection
 
 load_dotenv()
 genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
@@ -11,11 +11,6 @@ genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
 # Define the model name to use - using a standard model that should be available
 MODEL_NAME = "gemini-1.5-flash"  # This is the standard model name that replaced gemini-flash-2.0
 
-def get_db_connection():
-    conn = sqlite3.connect('job_market.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def generate_initial_interview_questions(skill_area, job_role):
     """Generate the first easy technical question for the interview"""
     # Generate interview context with Gemini
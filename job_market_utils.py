@@ -0,0 +1,778 @@
+# job_market_utils.py
+import argparse
+import re
+import json
+import base64
+from datetime import datetime
+from functools import lru_cache
+from cache_utils import bump_data_version
+from db_utils import get_db_connection, is_postgres, use_postgres
+
+SALARY_RANGES = [
+    "0-50k", "50k-75k", "75k-100k", "100k-125k", "125k-150k", "150k+", "Not Specified"
+]
+
+EXPERIENCE_RANGES = [
+    "Entry Level (0-2 years)",
+    "Mid Level (3-5 years)",
+    "Senior Level (6-10 years)",
+    "Expert Level (10+ years)",
+    "Not Specified"
+]
+
+POSTED_ON_FORMATS = [
+    "%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y",
+    "%B %d, %Y", "%d %B %Y", "%Y/%m/%d"
+]
+
+# strftime() patterns used to group posted_date for the trends chart
+TREND_GRANULARITIES = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",
+    "month": "%Y-%m"
+}
+
+# The full-text index, the parsed columns and the aggregate tables / triggers
+# are SQLite objects, never built on PostgreSQL: the routes and tools that
+# read or load them refuse to run there with this message
+JOB_MARKET_POSTGRES_ERROR = (
+    "Job search, job matching, the market dashboard and the job importers need the SQLite backend: "
+    "the job market indexes are not built on PostgreSQL yet (unset DATABASE_URL)"
+)
+
+def job_market_indexes_available():
+    """False on PostgreSQL, where prepare_job_market_data() builds nothing"""
+    return not use_postgres()
+
+def normalize_skill(skill):
+    """Canonical form of a skill name (same rules the dashboard uses)"""
+    return skill.strip().lower() if skill else ''
+
+def split_skills(required_skills):
+    """Split a comma-separated required_skills string into unique canonical names"""
+    if not required_skills:
+        return []
+
+    skills = []
+    for skill in required_skills.split(','):
+        skill = normalize_skill(skill)
+        if skill and skill not in skills:
+            skills.append(skill)
+    return skills
+
+def table_exists(conn, table_name):
+    """Check whether a table exists in the database"""
+    if is_postgres(conn):
+        return conn.execute("SELECT to_regclass(?)", (table_name,)).fetchone()[0] is not None
+
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?",
+        (table_name,)
+    ).fetchone()
+    return row is not None
+
+def ensure_job_market_table(conn):
+    """Create job_market_data with the scraped columns if it doesn't exist yet"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_market_data (
+            id INTEGER PRIMARY KEY,
+            job_post TEXT,
+            company TEXT,
+            job_location TEXT,
+            required_skills TEXT,
+            salary_offered TEXT,
+            exp_required TEXT,
+            company_rating REAL,
+            Posted_on TEXT
+        )
+    """)
+
+def ensure_job_skills_schema(conn):
+    """
+    Create the canonical skills dictionary and the job -> skill link table
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS skills (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_skills (
+            job_id INTEGER NOT NULL,
+            skill_id INTEGER NOT NULL,
+            PRIMARY KEY (job_id, skill_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_skills_skill ON job_skills (skill_id, job_id)")
+
+def get_skill_ids(conn, skills, create=False):
+    """
+    Map skill names to ids in the skills dictionary.
+    Unknown skills are skipped unless create=True.
+    """
+    skill_ids = {}
+    for skill in skills:
+        name = normalize_skill(skill)
+        if not name or name in skill_ids:
+            continue
+
+        row = conn.execute("SELECT id FROM skills WHERE name = ?", (name,)).fetchone()
+        if row:
+            skill_ids[name] = row[0]
+        elif create:
+            cursor = conn.execute("INSERT INTO skills (name) VALUES (?)", (name,))
+            skill_ids[name] = cursor.lastrowid
+    return skill_ids
+
+def index_job_skills(conn, job_ids=None, after_id=None):
+    """
+    Split required_skills into job_skills rows.
+    Like the other index_* functions, expects ensure_job_market_schema() to have run.
+
+    Args:
+        conn: Open database connection (caller commits)
+        job_ids (list): Only re-index these jobs; all jobs when None
+        after_id (int): Only index the jobs with a larger id (rows appended
+            by a bulk load); takes the place of job_ids
+
+    Returns:
+        int: Number of jobs indexed
+    """
+    if after_id is not None:
+        conn.execute("DELETE FROM job_skills WHERE job_id > ?", (after_id,))
+        rows = conn.execute("SELECT id, required_skills FROM job_market_data WHERE id > ?", (after_id,)).fetchall()
+    elif job_ids is None:
+        conn.execute("DELETE FROM job_skills")
+        rows = conn.execute("SELECT id, required_skills FROM job_market_data").fetchall()
+    else:
+        rows = []
+        for job_id in job_ids:
+            conn.execute("DELETE FROM job_skills WHERE job_id = ?", (job_id,))
+            row = conn.execute("SELECT id, required_skills FROM job_market_data WHERE id = ?", (job_id,)).fetchone()
+            if row:
+                rows.append(row)
+
+    # Cache skill ids so the dictionary is only hit once per distinct skill
+    skill_cache = {}
+    links = []
+    job_count = 0
+
+    for job_id, required_skills in rows:
+        job_count += 1
+        for skill in split_skills(required_skills):
+            if skill not in skill_cache:
+                skill_cache.update(get_skill_ids(conn, [skill], create=True))
+            links.append((job_id, skill_cache[skill]))
+
+    conn.executemany("INSERT OR IGNORE INTO job_skills (job_id, skill_id) VALUES (?, ?)", links)
+    return job_count
+
+def ensure_job_search_index(conn):
+    """
+    Create the FTS5 index over job_market_data and the triggers that keep it in sync.
+
+    Returns:
+        bool: True if the index was just created and still needs a rebuild
+    """
+    created = not table_exists(conn, 'job_search_fts')
+
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS job_search_fts USING fts5(
+            job_post, company, job_location, required_skills,
+            content='job_market_data', content_rowid='id',
+            tokenize='unicode61', prefix='2 3'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_market_data_fts_insert AFTER INSERT ON job_market_data BEGIN
+            INSERT INTO job_search_fts (rowid, job_post, company, job_location, required_skills)
+            VALUES (new.id, new.job_post, new.company, new.job_location, new.required_skills);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_market_data_fts_delete AFTER DELETE ON job_market_data BEGIN
+            INSERT INTO job_search_fts (job_search_fts, rowid, job_post, company, job_location, required_skills)
+            VALUES ('delete', old.id, old.job_post, old.company, old.job_location, old.required_skills);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_market_data_fts_update
+        AFTER UPDATE OF job_post, company, job_location, required_skills ON job_market_data BEGIN
+            INSERT INTO job_search_fts (job_search_fts, rowid, job_post, company, job_location, required_skills)
+            VALUES ('delete', old.id, old.job_post, old.company, old.job_location, old.required_skills);
+            INSERT INTO job_search_fts (rowid, job_post, company, job_location, required_skills)
+            VALUES (new.id, new.job_post, new.company, new.job_location, new.required_skills);
+        END
+    """)
+    return created
+
+def rebuild_job_search_index(conn, after_id=None):
+    """
+    Rebuild the full-text index from job_market_data, or only add the jobs
+    with an id above after_id (rows appended with the sync triggers dropped)
+    """
+    if after_id is None:
+        conn.execute("INSERT INTO job_search_fts (job_search_fts) VALUES ('rebuild')")
+        return
+    conn.execute("""
+        INSERT INTO job_search_fts (rowid, job_post, company, job_location, required_skills)
+        SELECT id, job_post, company, job_location, required_skills FROM job_market_data WHERE id > ?
+    """, (after_id,))
+
+def build_match_query(text, column=None):
+    """
+    Turn free text from the search box into a safe FTS5 MATCH expression.
+    Every word must match; each word also matches as a prefix ("pyth" -> python).
+
+    Args:
+        text (str): User search text
+        column (str): Restrict the match to one indexed column
+
+    Returns:
+        str: MATCH expression, or '' if the text has no searchable words
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return ''
+
+    terms = ' '.join(f'"{word}"*' for word in words)
+    if column:
+        return f"{column} : ({terms})"
+    return terms
+
+def encode_cursor(values):
+    """Opaque pagination cursor for the sort key of the last returned row"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by encode_cursor().
+
+    Returns:
+        list: The sort key values, or None if the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+def get_table_columns(conn, table_name):
+    """Column names of a table, in table order"""
+    if is_postgres(conn):
+        return [row[0] for row in conn.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = ? ORDER BY ordinal_position
+        """, (table_name,))]
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+def get_job_columns(conn):
+    """Column names of job_market_data, used to validate field projections"""
+    return get_table_columns(conn, 'job_market_data')
+
+# Buckets are computed in SQL from the parsed numeric columns
+SALARY_BUCKET_SQL = """
+    CASE
+        WHEN salary_offered IS NULL OR salary_offered = '' THEN NULL
+        WHEN salary_max IS NULL THEN 'Not Specified'
+        WHEN salary_max <= 50000 THEN '0-50k'
+        WHEN salary_max <= 75000 THEN '50k-75k'
+        WHEN salary_max <= 100000 THEN '75k-100k'
+        WHEN salary_max <= 125000 THEN '100k-125k'
+        WHEN salary_max <= 150000 THEN '125k-150k'
+        ELSE '150k+'
+    END
+"""
+
+EXPERIENCE_BUCKET_SQL = """
+    CASE
+        WHEN exp_required IS NULL OR exp_required = '' THEN NULL
+        WHEN exp_max IS NULL THEN 'Not Specified'
+        WHEN exp_max <= 2 THEN 'Entry Level (0-2 years)'
+        WHEN exp_max <= 5 THEN 'Mid Level (3-5 years)'
+        WHEN exp_max <= 10 THEN 'Senior Level (6-10 years)'
+        ELSE 'Expert Level (10+ years)'
+    END
+"""
+
+def extract_numbers(text):
+    """All integers in a free-text value, ignoring thousands separators"""
+    return [int(num.replace(',', '')) for num in re.findall(r'\d[\d,]*', text or '')]
+
+@lru_cache(maxsize=65536)
+def parse_salary_range(salary_text):
+    """
+    Parse salary_offered into (salary_min, salary_max).
+    Values under 1000 are read as thousands ("60-80k" -> 60000, 80000).
+    """
+    numbers = extract_numbers(salary_text)
+    if not numbers:
+        return None, None
+
+    numbers = [num * 1000 if num < 1000 else num for num in numbers]
+    return min(numbers), max(numbers)
+
+@lru_cache(maxsize=65536)
+def parse_experience_range(exp_text):
+    """Parse exp_required into (exp_min, exp_max) years"""
+    numbers = extract_numbers(exp_text)
+    if not numbers:
+        return None, None
+    return min(numbers), max(numbers)
+
+def column_exists(conn, table_name, column_name):
+    """Check whether a column exists on a table"""
+    return column_name.lower() in (column.lower() for column in get_table_columns(conn, table_name))
+
+@lru_cache(maxsize=65536)
+def parse_posted_date(date_text):
+    """ISO YYYY-MM-DD date for a Posted_on value (None if it can't be parsed)"""
+    if not date_text:
+        return None
+
+    date_text = date_text.strip()
+    for fmt in POSTED_ON_FORMATS:
+        try:
+            return datetime.strptime(date_text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+def parse_iso_date(date_text):
+    """Validate a YYYY-MM-DD request parameter (None if invalid)"""
+    try:
+        return datetime.strptime(date_text, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except (ValueError, TypeError):
+        return None
+
+# Parsed columns added to job_market_data, each with its own index
+PARSED_COLUMNS = {
+    'salary_min': 'INTEGER',
+    'salary_max': 'INTEGER',
+    'exp_min': 'INTEGER',
+    'exp_max': 'INTEGER',
+    'posted_date': 'TEXT',
+}
+
+def ensure_parsed_columns(conn):
+    """
+    Add the parsed numeric and date columns to job_market_data.
+
+    Returns:
+        bool: True if any column was just added and needs a backfill
+    """
+    added = False
+    for column, column_type in PARSED_COLUMNS.items():
+        if not column_exists(conn, 'job_market_data', column):
+            conn.execute(f"ALTER TABLE job_market_data ADD COLUMN {column} {column_type}")
+            added = True
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_job_market_data_{column} ON job_market_data ({column})")
+    return added
+
+def index_job_columns(conn, job_ids=None, after_id=None):
+    """
+    Fill salary_min / salary_max / exp_min / exp_max and posted_date
+    from the free-text columns.
+
+    Args:
+        conn: Open database connection (caller commits)
+        job_ids (list): Only parse these jobs; all jobs when None
+        after_id (int): Only parse the jobs with a larger id; takes the place of job_ids
+
+    Returns:
+        int: Number of jobs parsed
+    """
+    columns = "id, salary_offered, exp_required, Posted_on"
+    if after_id is not None:
+        rows = conn.execute(f"SELECT {columns} FROM job_market_data WHERE id > ?", (after_id,)).fetchall()
+    elif job_ids is None:
+        rows = conn.execute(f"SELECT {columns} FROM job_market_data").fetchall()
+    else:
+        rows = []
+        for job_id in job_ids:
+            row = conn.execute(f"SELECT {columns} FROM job_market_data WHERE id = ?", (job_id,)).fetchone()
+            if row:
+                rows.append(row)
+
+    conn.executemany(
+        """UPDATE job_market_data
+           SET salary_min = ?, salary_max = ?, exp_min = ?, exp_max = ?, posted_date = ?
+           WHERE id = ?""",
+        [
+            parse_salary_range(salary) + parse_experience_range(experience) + (parse_posted_date(posted_on), job_id)
+            for job_id, salary, experience, posted_on in rows
+        ]
+    )
+    return len(rows)
+
+def ensure_aggregate_schema(conn):
+    """
+    Create the dashboard aggregate tables.
+
+    job_aggregate_keys holds the buckets each job falls into; triggers on it
+    (and on job_skills) keep the agg_* counters up to date, so deleting a job
+    or re-indexing it adjusts the counts without rescanning the table.
+    """
+    ensure_job_skills_schema(conn)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_aggregate_keys (
+            job_id INTEGER PRIMARY KEY,
+            salary_bucket TEXT,
+            experience_bucket TEXT,
+            posted_month TEXT
+        )
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS agg_skill_counts (skill_id INTEGER PRIMARY KEY, count INTEGER NOT NULL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_agg_skill_counts_count ON agg_skill_counts (count)")
+    for table in ('agg_salary_counts', 'agg_experience_counts', 'agg_month_counts'):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (bucket TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_skills_agg_insert AFTER INSERT ON job_skills BEGIN
+            INSERT INTO agg_skill_counts (skill_id, count) VALUES (new.skill_id, 1)
+            ON CONFLICT (skill_id) DO UPDATE SET count = count + 1;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_skills_agg_delete AFTER DELETE ON job_skills BEGIN
+            UPDATE agg_skill_counts SET count = count - 1 WHERE skill_id = old.skill_id;
+        END
+    """)
+
+    bucket_columns = [
+        ('agg_salary_counts', 'salary_bucket'),
+        ('agg_experience_counts', 'experience_bucket'),
+        ('agg_month_counts', 'posted_month'),
+    ]
+    increments = "\n".join(f"""
+            INSERT INTO {table} (bucket, count) SELECT new.{column}, 1 WHERE new.{column} IS NOT NULL
+            ON CONFLICT (bucket) DO UPDATE SET count = count + 1;""" for table, column in bucket_columns)
+    decrements = "\n".join(f"""
+            UPDATE {table} SET count = count - 1 WHERE bucket = old.{column};""" for table, column in bucket_columns)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS job_aggregate_keys_insert AFTER INSERT ON job_aggregate_keys BEGIN
+            {increments}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS job_aggregate_keys_delete AFTER DELETE ON job_aggregate_keys BEGIN
+            {decrements}
+        END
+    """)
+
+    # Removing a job takes its skills and buckets out of the aggregates
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_market_data_agg_delete AFTER DELETE ON job_market_data BEGIN
+            DELETE FROM job_skills WHERE job_id = old.id;
+            DELETE FROM job_aggregate_keys WHERE job_id = old.id;
+        END
+    """)
+
+def index_job_aggregates(conn, job_ids=None, after_id=None):
+    """
+    Compute the salary / experience / month buckets for jobs.
+    Buckets are computed in SQL from the columns filled by
+    index_job_columns(); the aggregate counters are updated by triggers.
+
+    Args:
+        conn: Open database connection (caller commits)
+        job_ids (list): Only re-index these jobs; all jobs when None
+        after_id (int): Only index the jobs with a larger id; takes the place of job_ids
+
+    Returns:
+        int: Number of jobs indexed
+    """
+    insert_keys = f"""
+        INSERT INTO job_aggregate_keys (job_id, salary_bucket, experience_bucket, posted_month)
+        SELECT id, {SALARY_BUCKET_SQL}, {EXPERIENCE_BUCKET_SQL}, substr(posted_date, 1, 7)
+        FROM job_market_data
+    """
+    if after_id is not None:
+        conn.execute("DELETE FROM job_aggregate_keys WHERE job_id > ?", (after_id,))
+        return conn.execute(insert_keys + " WHERE id > ?", (after_id,)).rowcount
+    if job_ids is None:
+        conn.execute("DELETE FROM job_aggregate_keys")
+        for table in ('agg_salary_counts', 'agg_experience_counts', 'agg_month_counts'):
+            conn.execute(f"DELETE FROM {table}")
+        return conn.execute(insert_keys).rowcount
+
+    job_count = 0
+    for job_id in job_ids:
+        conn.execute("DELETE FROM job_aggregate_keys WHERE job_id = ?", (job_id,))
+        job_count += conn.execute(insert_keys + " WHERE id = ?", (job_id,)).rowcount
+    return job_count
+
+def recompute_aggregate_counts(conn, after_id=None):
+    """
+    Recount every agg_* table from job_skills / job_aggregate_keys with GROUP BY.
+    Used after bulk loads that ran with the counter triggers suspended.
+
+    Args:
+        after_id (int): Only add the counts of the jobs with a larger id
+            (appended by the load) to the existing counters
+    """
+    if after_id is None:
+        conn.execute("DELETE FROM agg_skill_counts")
+        conn.execute("INSERT INTO agg_skill_counts (skill_id, count) SELECT skill_id, COUNT(*) FROM job_skills GROUP BY skill_id")
+    else:
+        conn.execute("""
+            INSERT INTO agg_skill_counts (skill_id, count)
+            SELECT skill_id, COUNT(*) FROM job_skills WHERE job_id > ? GROUP BY skill_id
+            ON CONFLICT (skill_id) DO UPDATE SET count = count + excluded.count
+        """, (after_id,))
+
+    for table, column in (
+        ('agg_salary_counts', 'salary_bucket'),
+        ('agg_experience_counts', 'experience_bucket'),
+        ('agg_month_counts', 'posted_month'),
+    ):
+        if after_id is None:
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(f"""
+                INSERT INTO {table} (bucket, count)
+                SELECT {column}, COUNT(*) FROM job_aggregate_keys
+                WHERE {column} IS NOT NULL
+                GROUP BY {column}
+            """)
+        else:
+            conn.execute(f"""
+                INSERT INTO {table} (bucket, count)
+                SELECT {column}, COUNT(*) FROM job_aggregate_keys
+                WHERE job_id > ? AND {column} IS NOT NULL
+                GROUP BY {column}
+                ON CONFLICT (bucket) DO UPDATE SET count = count + excluded.count
+            """, (after_id,))
+
+def index_jobs(conn, job_ids=None):
+    """
+    Refresh every derived column and index (skills, numeric ranges,
+    posted_date, aggregates) for new or changed jobs.
+    Call this from any code path that inserts or updates job_market_data.
+    """
+    job_ids = list(job_ids) if job_ids is not None else None
+    index_job_skills(conn, job_ids)
+    index_job_columns(conn, job_ids)
+    job_count = index_job_aggregates(conn, job_ids)
+
+    # Derived tables changed, so cached analytics responses are stale
+    bump_data_version(conn, 'job_market')
+    return job_count
+
+def get_market_summary(conn):
+    """Headline job, company, location and rating figures (one table scan)"""
+    row = conn.execute("""
+        SELECT COUNT(*) AS total,
+               COUNT(DISTINCT company) AS company_count,
+               COUNT(DISTINCT job_location) AS location_count,
+               AVG(company_rating) AS avg_rating
+        FROM job_market_data
+    """).fetchone()
+
+    return {
+        "total_jobs": row['total'],
+        "unique_companies": row['company_count'],
+        "unique_locations": row['location_count'],
+        "average_company_rating": round(row['avg_rating'], 2) if row['avg_rating'] else 0
+    }
+
+def get_job_count_by_location(conn):
+    """Top 10 locations by number of jobs"""
+    rows = conn.execute("""
+        SELECT job_location, COUNT(*) AS count
+        FROM job_market_data
+        GROUP BY job_location
+        ORDER BY count DESC
+        LIMIT 10
+    """).fetchall()
+    return [dict(row) for row in rows]
+
+def get_top_skills(conn, limit=20):
+    """Most demanded skills, read from agg_skill_counts"""
+    rows = conn.execute("""
+        SELECT s.name AS skill, a.count
+        FROM agg_skill_counts a
+        JOIN skills s ON s.id = a.skill_id
+        WHERE a.count > 0
+        ORDER BY a.count DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
+    return [dict(row) for row in rows]
+
+def get_salary_distribution(conn):
+    """Jobs per salary range, read from agg_salary_counts"""
+    counts = {row['bucket']: row['count'] for row in conn.execute("SELECT bucket, count FROM agg_salary_counts")}
+    return [{"range": key, "count": counts.get(key, 0)} for key in SALARY_RANGES]
+
+def get_experience_required(conn):
+    """Jobs per experience level, read from agg_experience_counts"""
+    counts = {row['bucket']: row['count'] for row in conn.execute("SELECT bucket, count FROM agg_experience_counts")}
+    return [{"range": key, "count": counts.get(key, 0)} for key in EXPERIENCE_RANGES]
+
+def get_job_posting_trends(conn, granularity='month', start_date=None, end_date=None):
+    """
+    Job postings per day / week / month.
+
+    Args:
+        conn: Open database connection
+        granularity (str): One of TREND_GRANULARITIES
+        start_date (str): Optional inclusive YYYY-MM-DD lower bound
+        end_date (str): Optional inclusive YYYY-MM-DD upper bound
+
+    Returns:
+        list: {"date", "count"} dicts in date order
+    """
+    if granularity == 'month' and not start_date and not end_date:
+        # Default chart is precomputed in agg_month_counts
+        rows = conn.execute("SELECT bucket AS date, count FROM agg_month_counts WHERE count > 0 ORDER BY bucket").fetchall()
+        return [dict(row) for row in rows]
+
+    # Grouped scan over the posted_date index
+    query = "SELECT strftime(?, posted_date) AS date, COUNT(*) AS count FROM job_market_data WHERE posted_date IS NOT NULL"
+    params = [TREND_GRANULARITIES[granularity]]
+
+    if start_date:
+        query += " AND posted_date >= ?"
+        params.append(start_date)
+
+    if end_date:
+        query += " AND posted_date <= ?"
+        params.append(end_date)
+
+    query += " GROUP BY 1 ORDER BY 1"
+    return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+def get_company_ratings(conn):
+    """Top 10 rated companies with more than one posting"""
+    rows = conn.execute("""
+        SELECT company, AVG(company_rating) as avg_rating, COUNT(*) as job_count 
+        FROM job_market_data 
+        WHERE company_rating IS NOT NULL 
+        GROUP BY company 
+        HAVING job_count > 1
+        ORDER BY avg_rating DESC 
+        LIMIT 10
+    """).fetchall()
+    return [dict(row) for row in rows]
+
+# Panels of the job market dashboard, in page order
+MARKET_PANELS = {
+    "market_summary": get_market_summary,
+    "job_count_by_location": get_job_count_by_location,
+    "top_skills": get_top_skills,
+    "salary_distribution": get_salary_distribution,
+    "experience_required": get_experience_required,
+    "job_posting_trends": get_job_posting_trends,
+    "company_ratings": get_company_ratings,
+}
+
+def get_market_dashboard(conn, panels=None):
+    """
+    Compute several dashboard panels inside one read transaction,
+    so every panel sees the same snapshot of the data.
+
+    Args:
+        conn: Open database connection
+        panels (list): Panel names from MARKET_PANELS; all panels when None
+
+    Returns:
+        dict: Panel name -> panel data
+    """
+    panels = panels or list(MARKET_PANELS)
+
+    # A savepoint rather than BEGIN / rollback(): the connection may be the
+    # shared per-thread one, whose open transaction is not ours to end. With
+    # none open the savepoint starts the read transaction; inside one, the
+    # panels read the caller's snapshot.
+    conn.execute("SAVEPOINT market_dashboard")
+    try:
+        return {panel: MARKET_PANELS[panel](conn) for panel in panels}
+    finally:
+        conn.execute("ROLLBACK TO market_dashboard")
+        conn.execute("RELEASE market_dashboard")
+
+def ensure_job_market_schema(conn):
+    """
+    Create every derived table, column, index and trigger for job_market_data.
+
+    Returns:
+        dict: Which parts were just created and still need a backfill
+    """
+    needs_backfill = {
+        "jobs": not (table_exists(conn, 'job_skills') and table_exists(conn, 'job_aggregate_keys')),
+    }
+    ensure_job_skills_schema(conn)
+    needs_backfill["jobs"] = ensure_parsed_columns(conn) or needs_backfill["jobs"]
+    ensure_aggregate_schema(conn)
+    needs_backfill["search"] = ensure_job_search_index(conn)
+    return needs_backfill
+
+def prepare_job_market_data():
+    """
+    Make sure the normalized job skill index, the dashboard aggregates and
+    the full-text index exist. Builds them on first run; later updates go
+    through index_jobs() and the triggers.
+    """
+    conn = get_db_connection()
+    try:
+        if is_postgres(conn):
+            print(f"Skipping job market indexes: {JOB_MARKET_POSTGRES_ERROR}")
+            return
+
+        if not table_exists(conn, 'job_market_data'):
+            return
+
+        # Aggregates depend on job_skills and the parsed columns, so
+        # everything is rebuilt together whenever any piece is new
+        needs_backfill = ensure_job_market_schema(conn)
+
+        if needs_backfill["jobs"]:
+            job_count = index_jobs(conn)
+            print(f"Indexed skills and dashboard aggregates for {job_count} jobs")
+
+        if needs_backfill["search"]:
+            rebuild_job_search_index(conn)
+            print("Built full-text job search index")
+
+        conn.commit()
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Job market data maintenance")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('index-skills', help="Rebuild the skills / job_skills tables from required_skills")
+    subparsers.add_parser('index-search', help="Rebuild the full-text job search index")
+    subparsers.add_parser('index-aggregates', help="Recompute the dashboard aggregate tables")
+    subparsers.add_parser('backfill-columns', help="Parse salary / experience / Posted_on text into the derived columns")
+    args = parser.parse_args()
+    if not job_market_indexes_available():
+        parser.error(JOB_MARKET_POSTGRES_ERROR)
+
+    conn = get_db_connection()
+    ensure_job_market_schema(conn)
+
+    if args.command == 'index-skills':
+        job_count = index_job_skills(conn)
+        print(f"Indexed required skills for {job_count} jobs")
+    elif args.command == 'index-search':
+        rebuild_job_search_index(conn)
+        print("Rebuilt full-text job search index")
+    elif args.command == 'index-aggregates':
+        job_count = index_jobs(conn)
+        print(f"Computed dashboard aggregates for {job_count} jobs")
+    elif args.command == 'backfill-columns':
+        job_count = index_job_columns(conn)
+        index_job_aggregates(conn)
+        print(f"Parsed salary, experience and posting dates for {job_count} jobs")
+
+    # Cached analytics responses depend on every derived table
+    bump_data_version(conn, 'job_market')
+    conn.commit()
+    conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+# minhash_utils.py
+import hashlib
+import heapq
+import math
+import os
+import threading
+import numpy as np
+from db_utils import get_read_connection, open_db_connection
+from graph_cache_utils import get_changed_users
+from network_analysis import get_user_skill_sets
+
+# LSH banding: each user's signature is MINHASH_BANDS bands of MINHASH_BAND_ROWS
+# min-hashes. Two users become candidates when any band matches, with
+# probability 1 - (1 - J^rows)^bands for Jaccard similarity J: more bands or
+# fewer rows find less similar users, at the cost of more candidates.
+MINHASH_BANDS = int(os.environ.get('MINHASH_BANDS', 42))
+MINHASH_BAND_ROWS = int(os.environ.get('MINHASH_BAND_ROWS', 3))
+
+# Candidates re-ranked by exact Jaccard per query (those matching most bands)
+MINHASH_MAX_CANDIDATES = int(os.environ.get('MINHASH_MAX_CANDIDATES', 1000))
+
+# Users hashed at once when the index is built (bounds the hash matrix)
+MINHASH_BATCH_SIZE = 5000
+
+# How often the background refresher checks graph_changes for users to re-hash (seconds)
+MINHASH_REFRESH_INTERVAL = float(os.environ.get('MINHASH_REFRESH_INTERVAL', 5))
+
+# Hash functions h(x) = (a * x + b) mod p over 31-bit skill hashes, so a * x fits in 64 bits
+MINHASH_PRIME = (1 << 31) - 1
+MINHASH_SEED = 1
+
+_rng = np.random.default_rng(MINHASH_SEED)
+HASH_A = _rng.integers(1, MINHASH_PRIME, MINHASH_BANDS * MINHASH_BAND_ROWS, dtype=np.uint64)
+HASH_B = _rng.integers(0, MINHASH_PRIME, MINHASH_BANDS * MINHASH_BAND_ROWS, dtype=np.uint64)
+
+# Stored with the index; buckets built with other settings are rebuilt
+MINHASH_CONFIG = f"{MINHASH_BANDS}x{MINHASH_BAND_ROWS}:{MINHASH_SEED}"
+
+_refresher = None
+_refresher_pid = None
+_refresher_lock = threading.Lock()
+_refresh_requested = threading.Event()
+
+def hash_skill(skill):
+    """Stable 31-bit hash of a skill name (hash() differs between processes)"""
+    return int.from_bytes(hashlib.blake2b(skill.encode('utf-8'), digest_size=4).digest(), 'little') % MINHASH_PRIME
+
+def get_signatures(skill_sets):
+    """
+    MinHash signatures of non-empty skill sets.
+
+    Returns:
+        numpy array: (len(skill_sets), bands * rows) min-hashes
+    """
+    hashes = np.array([hash_skill(skill) for skills in skill_sets for skill in skills], dtype=np.uint64)
+    offsets = np.zeros(len(skill_sets), dtype=np.int64)
+    offsets[1:] = np.cumsum([len(skills) for skills in skill_sets])[:-1]
+
+    # Every hash function on every skill, then the minimum over each user's run
+    values = (HASH_A[:, None] * hashes[None, :] + HASH_B[:, None]) % np.uint64(MINHASH_PRIME)
+    return np.minimum.reduceat(values, offsets, axis=1).T
+
+def get_band_keys(signatures):
+    """
+    One bucket key per band: the band's rows and its index mixed into a
+    signed 64-bit integer (FNV-1a style, then a murmur finalizer).
+
+    Returns:
+        numpy array: (len(signatures), bands) int64 keys
+    """
+    rows = signatures.reshape(len(signatures), MINHASH_BANDS, MINHASH_BAND_ROWS)
+    keys = np.broadcast_to(np.arange(1, MINHASH_BANDS + 1, dtype=np.uint64), rows.shape[:2]).copy()
+    for row in range(MINHASH_BAND_ROWS):
+        keys ^= rows[:, :, row]
+        keys *= np.uint64(0x100000001B3)
+    keys ^= keys >> np.uint64(33)
+    keys *= np.uint64(0xFF51AFD7ED558CCD)
+    keys ^= keys >> np.uint64(33)
+    return keys.view(np.int64)
+
+def index_users(conn, user_skills):
+    """Insert the bucket rows of users (their old rows must be deleted first)"""
+    user_ids = [user_id for user_id, skills in user_skills.items() if skills]
+    for start in range(0, len(user_ids), MINHASH_BATCH_SIZE):
+        batch = user_ids[start:start + MINHASH_BATCH_SIZE]
+        keys = get_band_keys(get_signatures([sorted(user_skills[user_id]) for user_id in batch]))
+        conn.executemany(
+            "INSERT OR IGNORE INTO minhash_buckets (bucket, user_id) VALUES (?, ?)",
+            [(key, user_id) for user_id, user_keys in zip(batch, keys.tolist()) for key in user_keys]
+        )
+
+def is_index_current(conn):
+    """True when the buckets were built with these settings from every logged change"""
+    change_id = conn.execute("SELECT MAX(id) FROM graph_changes").fetchone()[0] or 0
+    state = conn.execute("SELECT change_id, config FROM minhash_state WHERE id = 1").fetchone()
+    return state is not None and state['config'] == MINHASH_CONFIG and state['change_id'] == change_id
+
+def refresh_minhash_index(conn):
+    """
+    Bring the LSH buckets up to date with the users' skills.
+
+    Users changed since the last refresh (graph_changes) are re-hashed; a
+    missing index, changed settings or a gap the log can't cover rebuild
+    it. Takes a private write connection (never a request's); commits.
+    """
+    if is_index_current(conn):
+        return
+
+    # Under the write lock, so workers refreshing at once don't both apply the same changes
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        change_id = conn.execute("SELECT MAX(id) FROM graph_changes").fetchone()[0] or 0
+        state = conn.execute("SELECT change_id, config FROM minhash_state WHERE id = 1").fetchone()
+        if state is not None and state['config'] == MINHASH_CONFIG and state['change_id'] == change_id:
+            conn.rollback()
+            return
+
+        changed_users = None
+        if state is not None and state['config'] == MINHASH_CONFIG:
+            changed_users = get_changed_users(conn, state['change_id'])
+
+        if changed_users is None:
+            conn.execute("DELETE FROM minhash_buckets")
+            index_users(conn, get_user_skill_sets(conn))
+            print("Rebuilt the MinHash index")
+        elif changed_users:
+            placeholders = ','.join(['?' for _ in changed_users])
+            conn.execute(f"DELETE FROM minhash_buckets WHERE user_id IN ({placeholders})", changed_users)
+            index_users(conn, get_user_skill_sets(conn, changed_users))
+
+        conn.execute("""
+            INSERT INTO minhash_state (id, change_id, config) VALUES (1, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET change_id = excluded.change_id, config = excluded.config
+        """, (change_id, MINHASH_CONFIG))
+        conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+def run_minhash_refresher():
+    while True:
+        conn = open_db_connection()
+        try:
+            refresh_minhash_index(conn)
+        except Exception as e:
+            print(f"Error refreshing the MinHash index: {e}")
+        finally:
+            conn.close()
+        _refresh_requested.wait(MINHASH_REFRESH_INTERVAL)
+        _refresh_requested.clear()
+
+def start_minhash_refresher():
+    """
+    Start this process's MinHash refresh thread (forked workers start their own).
+    It builds the index on a cold start and then re-hashes the users logged in
+    graph_changes every MINHASH_REFRESH_INTERVAL seconds, so queries only read.
+    """
+    global _refresher, _refresher_pid
+    with _refresher_lock:
+        if _refresher is None or _refresher_pid != os.getpid():
+            _refresher = threading.Thread(target=run_minhash_refresher, name='minhash-refresh', daemon=True)
+            _refresher.start()
+            _refresher_pid = os.getpid()
+
+def get_similar_users(user_id, top_k=10, recall=1.0):
+    """
+    Users with the most similar skills (Jaccard), through the LSH index
+    instead of a comparison with every user.
+
+    Read-only: the index is kept up to date by the refresh thread, so users
+    whose skills changed in the last few seconds may be matched by their
+    previous skills (the similarity shown is always exact), and the list is
+    empty until the first build has finished.
+
+    Args:
+        user_id (int): User to find neighbours for
+        top_k (int): Most users returned
+        recall (float): Share of the bands probed (0-1]; lower is faster
+            but misses more of the less similar users
+
+    Returns:
+        list: {"id", "name", "email", "similarity", "shared_skills"} dicts, most similar first
+    """
+    start_minhash_refresher()
+    conn = get_read_connection()
+    try:
+        if not is_index_current(conn):
+            # Re-hash now rather than at the next interval; this query uses the buckets as they are
+            _refresh_requested.set()
+
+        skills = get_user_skill_sets(conn, [user_id]).get(user_id)
+        if not skills:
+            return []
+
+        keys = get_band_keys(get_signatures([sorted(skills)]))[0].tolist()
+        keys = keys[:max(1, math.ceil(recall * MINHASH_BANDS))]
+        candidates = [row['user_id'] for row in conn.execute(f"""
+            SELECT user_id, COUNT(*) AS bands FROM minhash_buckets
+            WHERE bucket IN ({','.join(['?' for _ in keys])}) AND user_id != ?
+            GROUP BY user_id
+            ORDER BY bands DESC, user_id
+            LIMIT ?
+        """, keys + [user_id, MINHASH_MAX_CANDIDATES])]
+        if not candidates:
+            return []
+
+        # Exact Jaccard for the candidates; ties go to the lower user id
+        candidate_skills = get_user_skill_sets(conn, candidates)
+        scored = heapq.nlargest(top_k, (
+            (len(skills & other_skills) / len(skills | other_skills), -other_id, other_id)
+            for other_id, other_skills in candidate_skills.items()
+        ))
+        if not scored:
+            return []
+
+        user_ids = [other_id for _, _, other_id in scored]
+        placeholders = ','.join(['?' for _ in user_ids])
+        users = {row['id']: row for row in conn.execute(
+            f"SELECT id, name, email FROM users WHERE id IN ({placeholders})", user_ids
+        )}
+    finally:
+        conn.close()
+
+    similar_users = []
+    for similarity, _, other_id in scored:
+        if other_id in users:
+            similar_users.append({
+                "id": other_id,
+                "name": users[other_id]['name'],
+                "email": users[other_id]['email'],
+                "similarity": round(similarity, 3),
+                "shared_skills": sorted(skills & candidate_skills[other_id])
+            })
+    return similar_users
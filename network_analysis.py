@@ -1,20 +1,50 @@
 # network_analysis.py
 import networkx as nx
 from pyvis.network import Network
-import sqlite3
 import json
+import threading
 from pathlib import Path
 import os
+from db_utils import get_read_connection
+from cache_utils import get_data_versions
+from job_market_utils import normalize_skill
+from user_skills_utils import get_skill_profiles
+from similarity_utils import SkillMatrix, SIMILARITY_METRIC
 
-# Database connection helper
-def get_db_connection():
-    conn = sqlite3.connect('job_market.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+# Fewest shared skills that link two users in the similarity network
+SIMILARITY_MIN_OVERLAP = int(os.environ.get('SIMILARITY_MIN_OVERLAP', 1))
 
-def generate_network_html(graph, filename, title="Network Analysis", height="600px", width="100%"):
+# Most similar users each user is linked to, so the graph stays bounded on large user bases
+SIMILARITY_TOP_K = int(os.environ.get('SIMILARITY_TOP_K', 20))
+
+# Skills held by more users than this don't count towards overlaps, like stop words
+# (0 counts every skill). Bounds the work when a few skills are held by most users.
+SIMILARITY_MAX_SKILL_USERS = int(os.environ.get('SIMILARITY_MAX_SKILL_USERS', 0)) or None
+
+# Nodes per page of get_graph_data(), default and maximum
+GRAPH_PAGE_SIZE = int(os.environ.get('GRAPH_PAGE_SIZE', 500))
+GRAPH_MAX_PAGE_SIZE = int(os.environ.get('GRAPH_MAX_PAGE_SIZE', 5000))
+
+# Largest ego-network radius get_graph_data() accepts
+GRAPH_MAX_HOPS = 3
+
+# (users data version, (user skill sets, SkillMatrix)) behind get_skill_matrix()
+_skill_matrix = None
+_skill_matrix_lock = threading.Lock()
+
+# (users data version, ranked pairs) behind get_shared_skills_connections()
+_shared_pairs = None
+_shared_pairs_lock = threading.Lock()
+
+def generate_network_html(graph, filename, title="Network Analysis", height="600px", width="100%", positions=None):
     """
     Generate HTML file from a NetworkX graph using PyVis
+
+    Args:
+        positions (dict): node -> (x, y) in pixels, precomputed on the server
+            (graph_layout_utils). The nodes are placed there and the browser's
+            physics simulation is turned off; without it the browser lays the
+            graph out itself.
     """
     # Create output directory if it doesn't exist
     output_dir = Path("static/networks")
@@ -24,177 +54,255 @@ def generate_network_html(graph, filename, title="Network Analysis", height="600
     net = Network(height=height, width=width, directed=True, notebook=False)
     
     # Set network options for better visualization
-    net.set_options("""
-    {
-      "nodes": {
-        "font": {"size": 12},
-        "scaling": {"min": 10, "max": 30}
-      },
-      "edges": {
-        "color": {"inherit": true},
-        "smooth": {"type": "dynamic"},
-        "arrows": {"to": {"enabled": true}}
-      },
-      "physics": {
-        "barnesHut": {"gravitationalConstant": -80000, "springLength": 250},
-        "stabilization": {"iterations": 1000}
-      },
-      "interaction": {
-        "hover": true,
-        "tooltipDelay": 200
-      }
+    options = {
+        "nodes": {
+            "font": {"size": 12},
+            "scaling": {"min": 10, "max": 30}
+        },
+        "edges": {
+            "color": {"inherit": True},
+            "smooth": {"type": "dynamic"},
+            "arrows": {"to": {"enabled": True}}
+        },
+        "physics": {
+            "barnesHut": {"gravitationalConstant": -80000, "springLength": 250},
+            "stabilization": {"iterations": 1000}
+        },
+        "interaction": {
+            "hover": True,
+            "tooltipDelay": 200
+        }
     }
-    """)
-    
-    # Add the NetworkX graph to PyVis
+    if positions is not None:
+        # Fixed layout: no simulation, and straight edges (dynamic smoothing
+        # adds a physics node per edge)
+        options["physics"] = {"enabled": False}
+        options["edges"]["smooth"] = False
+    net.set_options(json.dumps(options))
+    
+    # Add the NetworkX graph to PyVis (from_nx sets default sizes on the
+    # node / edge attributes, so it gets a copy of the shared cached graph)
+    graph = graph.copy()
+    if positions is not None:
+        for node, attrs in graph.nodes(data=True):
+            if node in positions:
+                attrs['x'], attrs['y'] = positions[node]
     net.from_nx(graph)
     
-    # Save the network to an HTML file
+    # Save the network to a temporary file (pyvis wants an .html name) and
+    # rename it into place, so readers never see a partly written page
     output_path = output_dir / filename
-    net.save_graph(str(output_path))
+    temp_path = output_dir / f".{output_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.html"
+    try:
+        net.save_graph(str(temp_path))
+        os.replace(temp_path, output_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
     
     # Return the relative path for the Flask template
     return f"networks/{filename}"
 
-def get_user_info(user_id):
-    """Get detailed information for a user"""
-    conn = get_db_connection()
-    user = conn.execute("""
-        SELECT id, name, email, job_role, skills_data 
-        FROM users WHERE id = ?
-    """, (user_id,)).fetchone()
-    conn.close()
-    return user
+def get_jobs_with_skills(conn, limit):
+    """
+    Get up to `limit` jobs that have indexed skills, with their canonical skill names
+    """
+    rows = conn.execute("""
+        SELECT j.id, j.job_post, j.company, s.name AS skill
+        FROM (
+            SELECT id, job_post, company FROM job_market_data
+            WHERE EXISTS (SELECT 1 FROM job_skills js WHERE js.job_id = job_market_data.id)
+            LIMIT ?
+        ) j
+        JOIN job_skills js ON js.job_id = j.id
+        JOIN skills s ON s.id = js.skill_id
+        ORDER BY j.id
+    """, (limit,)).fetchall()
+    
+    jobs = {}
+    for row in rows:
+        if row['id'] not in jobs:
+            jobs[row['id']] = {
+                "id": row['id'],
+                "job_post": row['job_post'],
+                "company": row['company'],
+                "skills": []
+            }
+        jobs[row['id']]["skills"].append(row['skill'])
+    
+    return list(jobs.values())
 
-def get_user_similarity_network():
+def get_user_skill_sets(conn, user_ids=None):
     """
-    Generate a network showing connections between users based on shared skills
+    Proficient skills per user: the user's profile plus the skills
+    passed in quiz results, as sets of normalized names.
+    
+    Args:
+        conn: Open database connection
+        user_ids (list): Users to load (default: everyone)
     """
-    # Create graph
-    G = nx.Graph()
+    profiles = get_skill_profiles(conn, user_ids)
+    user_skills = {user_id: set(profile.proficient) for user_id, profile in profiles.items() if profile.proficient}
     
-    conn = get_db_connection()
+    query = """
+        SELECT user_id, proficient_skills FROM user_quiz_results
+        WHERE proficient_skills IS NOT NULL AND proficient_skills != '[]'
+    """
+    params = []
+    if user_ids is not None:
+        query += f" AND user_id IN ({','.join(['?' for _ in user_ids])})"
+        params = list(user_ids)
     
-    # Get all users
-    users = conn.execute("SELECT id, name, email, skills_data FROM users").fetchall()
+    for result in conn.execute(query, params).fetchall():
+        try:
+            proficient_skills = json.loads(result['proficient_skills'])
+        except (ValueError, TypeError) as e:
+            print(f"Error processing quiz results for user {result['user_id']}: {e}")
+            continue
+        
+        skills = {normalize_skill(skill) for skill in proficient_skills if isinstance(skill, str)}
+        skills.discard('')
+        if skills:
+            user_skills.setdefault(result['user_id'], set()).update(skills)
     
-    # User nodes with skills
-    user_skills = {}
+    return user_skills
+
+def get_similar_user_pairs(user_skills, min_overlap=SIMILARITY_MIN_OVERLAP, top_k=SIMILARITY_TOP_K,
+                           max_skill_users=SIMILARITY_MAX_SKILL_USERS, user_ids=None, metric=SIMILARITY_METRIC,
+                           matrix=None):
+    """
+    Find users who share skills with the sparse user x skill matrix
+    (similarity_utils), so the work grows with the co-occurrences instead
+    of with every user pair.
+    
+    Args:
+        user_skills (dict): user_id -> set of skills
+        min_overlap (int): Fewest shared skills for a pair to count
+        top_k (int): Most similar users kept per user (None keeps all); a pair
+            is kept when it is in the top k of either user
+        max_skill_users (int): Skills held by more users than this don't count
+            towards the overlap (None counts every skill)
+        user_ids (list): Only find the pairs of these users (default: everyone)
+        metric (str): Similarity score, one of SIMILARITY_METRICS
+        matrix (SkillMatrix): The matrix of user_skills, when already built
+    
+    Returns:
+        dict: (user1_id, user2_id) with user1_id < user2_id -> (score, sorted shared skills)
+    """
+    if matrix is None:
+        matrix = SkillMatrix(user_skills)
+    rows = None
+    if user_ids is not None:
+        rows = [matrix.row[user_id] for user_id in user_ids if user_id in matrix.row]
     
-    for user in users:
-        user_id = user['id']
-        user_name = user['name']
+    row, other, scores, _ = matrix.top_neighbours(metric, top_k, min_overlap, max_skill_users, rows)
+    
+    pairs = {}
+    for user_id, other_id, score in zip(matrix.user_ids[row].tolist(), matrix.user_ids[other].tolist(), scores.tolist()):
+        pair = (min(user_id, other_id), max(user_id, other_id))
+        if pair not in pairs:
+            pairs[pair] = (score, sorted(user_skills[user_id] & user_skills[other_id]))
+    
+    return pairs
+
+def add_user_node(G, user):
+    """Add a user node from a users row (id, name, email, job_role)"""
+    user_id = user['id']
+    user_name = user['name']
+    job_role = user['job_role'] or "Not specified"
+    G.add_node(f"user_{user_id}", 
+       label=user_name,
+       title=f"User: {user_name}",
+       group="users",
+       shape="circle",
+       color="#4169E1",
+       user_id=user_id,
+       user_name=user_name,
+       user_email=user['email'],
+       user_job_role=job_role)
+
+def add_skill_node(G, skill_name):
+    """Add a skill node (normalized name) if it doesn't exist"""
+    if not G.has_node(f"skill_{skill_name}"):
+        G.add_node(f"skill_{skill_name}", 
+                  label=skill_name.title(),
+                  title=f"Skill: {skill_name.title()}",
+                  group="skills",
+                  shape="diamond",
+                  color="#28a745")  # Green
+
+def add_user_skill_edges(G, user_id, skills):
+    """Link a user to their skills"""
+    for skill_name in sorted(skills):
+        add_skill_node(G, skill_name)
+        G.add_edge(f"user_{user_id}", f"skill_{skill_name}", 
+                  title="has_skill",
+                  color="#aaaaaa")
+
+def add_similarity_edges(G, pairs):
+    """Link users that share skills, from get_similar_user_pairs()"""
+    for (user1_id, user2_id), (score, shared_skills) in pairs.items():
+        # Skip users that don't exist (quiz results of deleted users)
+        if not G.has_node(f"user_{user1_id}") or not G.has_node(f"user_{user2_id}"):
+            continue
         
-        # Add user node
-        user = get_user_info(user_id)
-        job_role = user['job_role'] if 'job_role' in user and user['job_role'] else "Not specified"
-        G.add_node(f"user_{user_id}", 
-           label=user_name,
-           title=f"User: {user_name}",
-           group="users",
-           shape="circle",
-           color="#4169E1",
-           user_id=user_id,
-           user_name=user_name,
-           user_email=user['email'],
-           user_job_role=job_role)
+        G.add_edge(f"user_{user1_id}", f"user_{user2_id}", 
+                  title=f"Shares {len(shared_skills)} skills (score {score:.2f})",
+                  value=len(shared_skills),
+                  width=len(shared_skills),
+                  score=round(score, 3),
+                  color="#ff7f0e")  # Orange
+
+def add_job_nodes(G, jobs):
+    """Add job nodes, linked from the skills they require"""
+    for job in jobs:
+        job_id = job['id']
+        job_post = job['job_post']
+        company = job['company']
+        job_label = f"{job_post}"
         
-        # Parse skills data
-        try:
-            if user['skills_data'] and user['skills_data'].strip():
-                skills_data = json.loads(user['skills_data'])
-                
-                # Get proficient skills
-                proficient_skills = skills_data.get('proficientSkills', [])
-                
-                # Store user's skills
-                user_skills[user_id] = set(proficient_skills)
-                
-                # Add skills nodes and connections
-                for skill in proficient_skills:
-                    # Normalize skill name
-                    skill_name = skill.lower().strip()
-                    
-                    # Add skill node if it doesn't exist
-                    if not G.has_node(f"skill_{skill_name}"):
-                        G.add_node(f"skill_{skill_name}", 
-                                  label=skill,
-                                  title=f"Skill: {skill}",
-                                  group="skills",
-                                  shape="diamond",
-                                  color="#28a745")  # Green
-                    
-                    # Add edge between user and skill
-                    G.add_edge(f"user_{user_id}", f"skill_{skill_name}", 
-                              title="has_skill",
-                              color="#aaaaaa")
-        except Exception as e:
-            print(f"Error processing skills for user {user_id}: {e}")
-    
-    # Get Quiz Results to add more skill connections
-    quiz_results = conn.execute("""
-        SELECT user_id, proficient_skills FROM user_quiz_results
-        WHERE proficient_skills IS NOT NULL AND proficient_skills != '[]'
-    """).fetchall()
-    
-    for result in quiz_results:
-        user_id = result['user_id']
+        # Add job node
+        G.add_node(f"job_{job_id}", 
+                  label=job_label,
+                  title=f"{job_post} at {company}",
+                  group="jobs",
+                  shape="box",
+                  color="#dc3545")  # Red
         
-        # Skip if user doesn't exist (might have been deleted)
-        if not G.has_node(f"user_{user_id}"):
-            continue
+        # Add connections from the indexed (already normalized) skills
+        for skill_name in job['skills']:
+            add_skill_node(G, skill_name)
             
-        try:
-            proficient_skills = json.loads(result['proficient_skills'])
-            
-            # Initialize user skills set if not exists
-            if user_id not in user_skills:
-                user_skills[user_id] = set()
-                
-            # Add skills from quiz results
-            for skill in proficient_skills:
-                # Normalize skill name
-                skill_name = skill.lower().strip()
-                user_skills[user_id].add(skill_name)
-                
-                # Add skill node if it doesn't exist
-                if not G.has_node(f"skill_{skill_name}"):
-                    G.add_node(f"skill_{skill_name}", 
-                              label=skill,
-                              title=f"Skill: {skill}",
-                              group="skills",
-                              shape="diamond",
-                              color="#28a745")  # Green
-                
-                # Add edge between user and skill
-                G.add_edge(f"user_{user_id}", f"skill_{skill_name}", 
-                          title="has_skill",
-                          color="#aaaaaa")
-        except Exception as e:
-            print(f"Error processing quiz results for user {user_id}: {e}")
+            # Add edge from skill to job
+            G.add_edge(f"skill_{skill_name}", f"job_{job_id}", 
+                      title="required_for",
+                      color="#aaaaaa")
+
+def build_user_similarity_network(users, user_skills, min_overlap=SIMILARITY_MIN_OVERLAP, top_k=SIMILARITY_TOP_K):
+    """Build the user similarity graph from users rows and get_user_skill_sets()"""
+    G = nx.Graph()
+    
+    for user in users:
+        add_user_node(G, user)
+        add_user_skill_edges(G, user['id'], user_skills.get(user['id'], ()))
     
     # Create edges between users based on shared skills
-    user_ids = list(user_skills.keys())
+    add_similarity_edges(G, get_similar_user_pairs(user_skills, min_overlap, top_k))
+    return G
+
+def get_user_similarity_network(min_overlap=SIMILARITY_MIN_OVERLAP, top_k=SIMILARITY_TOP_K):
+    """
+    Generate a network showing connections between users based on shared skills
+    """
+    conn = get_read_connection()
     
-    for i in range(len(user_ids)):
-        for j in range(i+1, len(user_ids)):
-            user1_id = user_ids[i]
-            user2_id = user_ids[j]
-            
-            # Find shared skills
-            shared_skills = user_skills[user1_id].intersection(user_skills[user2_id])
-            
-            # Add edge if they share skills
-            if len(shared_skills) > 0:
-                G.add_edge(f"user_{user1_id}", f"user_{user2_id}", 
-                          title=f"Shares {len(shared_skills)} skills",
-                          value=len(shared_skills),
-                          width=len(shared_skills),
-                          color="#ff7f0e")  # Orange
+    # Get all users, with skills from profiles and quiz results
+    users = conn.execute("SELECT id, name, email, job_role FROM users").fetchall()
+    user_skills = get_user_skill_sets(conn)
     
     conn.close()
     
-    return G
+    return build_user_similarity_network(users, user_skills, min_overlap, top_k)
 
 def get_skill_job_network():
     """
@@ -203,15 +311,10 @@ def get_skill_job_network():
     # Create directed graph (skills -> jobs)
     G = nx.DiGraph()
     
-    conn = get_db_connection()
+    conn = get_read_connection()
     
     # Get top jobs
-    jobs = conn.execute("""
-        SELECT id, job_post, company, required_skills 
-        FROM job_market_data 
-        WHERE required_skills IS NOT NULL AND required_skills != ''
-        LIMIT 100
-    """).fetchall()
+    jobs = get_jobs_with_skills(conn, 100)
     
     # Get skills from the quiz_questions table for more skill nodes
     skills = conn.execute("""
@@ -219,60 +322,14 @@ def get_skill_job_network():
         WHERE skill IS NOT NULL AND skill != ''
     """).fetchall()
     
+    conn.close()
+    
     # Add skill nodes from quiz questions
     for skill_row in skills:
-        skill = skill_row['skill'].lower().strip()
-        
-        # Add skill node if it doesn't exist
-        if not G.has_node(f"skill_{skill}"):
-            G.add_node(f"skill_{skill}", 
-                      label=skill.title(),
-                      title=f"Skill: {skill.title()}",
-                      group="skills",
-                      shape="diamond",
-                      color="#28a745")  # Green
+        add_skill_node(G, normalize_skill(skill_row['skill']))
     
     # Process jobs and their required skills
-    for job in jobs:
-        job_id = job['id']
-        job_post = job['job_post']
-        company = job['company']
-        job_label = f"{job_post}"
-        
-        # Add job node
-        G.add_node(f"job_{job_id}", 
-                  label=job_label,
-                  title=f"{job_post} at {company}",
-                  group="jobs",
-                  shape="box",
-                  color="#dc3545")  # Red
-        
-        # Process skills and add connections
-        if job['required_skills']:
-            skills_list = job['required_skills'].split(',')
-            
-            for skill in skills_list:
-                # Normalize skill name
-                skill_name = skill.lower().strip()
-                
-                if not skill_name:
-                    continue
-                
-                # Add skill node if it doesn't exist
-                if not G.has_node(f"skill_{skill_name}"):
-                    G.add_node(f"skill_{skill_name}", 
-                              label=skill_name.title(),
-                              title=f"Skill: {skill_name.title()}",
-                              group="skills",
-                              shape="diamond",
-                              color="#28a745")  # Green
-                
-                # Add edge from skill to job
-                G.add_edge(f"skill_{skill_name}", f"job_{job_id}", 
-                          title="required_for",
-                          color="#aaaaaa")
-    
-    conn.close()
+    add_job_nodes(G, jobs)
     
     return G
 
@@ -283,216 +340,205 @@ def get_full_network():
     # Create directed graph
     G = nx.DiGraph()
     
-    conn = get_db_connection()
+    conn = get_read_connection()
     
-    # Get all users
-    users = conn.execute("SELECT id, name, email, skills_data FROM users").fetchall()
+    # Get all users, with skills from profiles and quiz results
+    users = conn.execute("SELECT id, name, email, job_role FROM users").fetchall()
+    user_skills = get_user_skill_sets(conn)
     
     # Get top jobs
-    jobs = conn.execute("""
-        SELECT id, job_post, company, required_skills 
-        FROM job_market_data 
-        WHERE required_skills IS NOT NULL AND required_skills != ''
-        LIMIT 50
-    """).fetchall()
+    jobs = get_jobs_with_skills(conn, 50)
+    
+    conn.close()
     
     # Add user nodes with skills
     for user in users:
-        user_id = user['id']
-        user_name = user['name']
-        
-        # Add user node
-        user = get_user_info(user_id)
-        job_role = user['job_role'] if 'job_role' in user and user['job_role'] else "Not specified"
-        G.add_node(f"user_{user_id}", 
-           label=user_name,
-           title=f"User: {user_name}",
-           group="users",
-           shape="circle",
-           color="#4169E1",
-           user_id=user_id,
-           user_name=user_name,
-           user_email=user['email'],
-           user_job_role=job_role)
-        
-        # Parse skills data
-        try:
-            if user['skills_data'] and user['skills_data'].strip():
-                skills_data = json.loads(user['skills_data'])
-                
-                # Get proficient skills
-                proficient_skills = skills_data.get('proficientSkills', [])
-                
-                # Add skills nodes and connections
-                for skill in proficient_skills:
-                    # Normalize skill name
-                    skill_name = skill.lower().strip()
-                    
-                    # Add skill node if it doesn't exist
-                    if not G.has_node(f"skill_{skill_name}"):
-                        G.add_node(f"skill_{skill_name}", 
-                                  label=skill,
-                                  title=f"Skill: {skill}",
-                                  group="skills",
-                                  shape="diamond",
-                                  color="#28a745")  # Green
-                    
-                    # Add edge between user and skill
-                    G.add_edge(f"user_{user_id}", f"skill_{skill_name}", 
-                              title="has_skill",
-                              color="#aaaaaa")
-        except Exception as e:
-            print(f"Error processing skills for user {user_id}: {e}")
-    
-    # Get Quiz Results to add more skill connections
-    quiz_results = conn.execute("""
-        SELECT user_id, proficient_skills FROM user_quiz_results
-        WHERE proficient_skills IS NOT NULL AND proficient_skills != '[]'
-    """).fetchall()
-    
-    for result in quiz_results:
-        user_id = result['user_id']
-        
-        # Skip if user doesn't exist (might have been deleted)
-        if not G.has_node(f"user_{user_id}"):
-            continue
-            
-        try:
-            proficient_skills = json.loads(result['proficient_skills'])
-            
-            # Add skills from quiz results
-            for skill in proficient_skills:
-                # Normalize skill name
-                skill_name = skill.lower().strip()
-                
-                # Add skill node if it doesn't exist
-                if not G.has_node(f"skill_{skill_name}"):
-                    G.add_node(f"skill_{skill_name}", 
-                              label=skill,
-                              title=f"Skill: {skill}",
-                              group="skills",
-                              shape="diamond",
-                              color="#28a745")  # Green
-                
-                # Add edge between user and skill
-                G.add_edge(f"user_{user_id}", f"skill_{skill_name}", 
-                          title="has_skill",
-                          color="#aaaaaa")
-        except Exception as e:
-            print(f"Error processing quiz results for user {user_id}: {e}")
+        add_user_node(G, user)
+        add_user_skill_edges(G, user['id'], user_skills.get(user['id'], ()))
     
     # Process jobs and their required skills
-    for job in jobs:
-        job_id = job['id']
-        job_post = job['job_post']
-        company = job['company']
-        job_label = f"{job_post}"
-        
-        # Add job node
-        G.add_node(f"job_{job_id}", 
-                  label=job_label,
-                  title=f"{job_post} at {company}",
-                  group="jobs",
-                  shape="box",
-                  color="#dc3545")  # Red
-        
-        # Process skills and add connections
-        if job['required_skills']:
-            skills_list = job['required_skills'].split(',')
-            
-            for skill in skills_list:
-                # Normalize skill name
-                skill_name = skill.lower().strip()
-                
-                if not skill_name:
-                    continue
-                
-                # Add skill node if it doesn't exist
-                if not G.has_node(f"skill_{skill_name}"):
-                    G.add_node(f"skill_{skill_name}", 
-                              label=skill_name.title(),
-                              title=f"Skill: {skill_name.title()}",
-                              group="skills",
-                              shape="diamond",
-                              color="#28a745")  # Green
-                
-                # Add edge from skill to job
-                G.add_edge(f"skill_{skill_name}", f"job_{job_id}", 
-                          title="required_for",
-                          color="#aaaaaa")
-    
-    conn.close()
+    add_job_nodes(G, jobs)
     
     return G
 
 
-def get_shared_skills_connections():
-    """Generate data about users who share common skills"""
-    # Create graph for analysis
-    G = get_user_similarity_network()
+def get_skill_matrix(conn):
+    """
+    Every user's skill set (get_user_skill_sets()) and their SkillMatrix,
+    built once per version of the users data. The shared-skills ranking and
+    the user's own connections both score from it, so a pair gets the same
+    score (and IDF weights) everywhere.
     
-    # Get database connection
-    conn = get_db_connection()
+    Returns:
+        tuple: (user_id -> set of skills, SkillMatrix)
+    """
+    global _skill_matrix
+    version = get_data_versions(conn, ['users'])['users'][0]
+    with _skill_matrix_lock:
+        if _skill_matrix is not None and _skill_matrix[0] == version:
+            return _skill_matrix[1]
+    
+    user_skills = get_user_skill_sets(conn)
+    cached = (user_skills, SkillMatrix(user_skills))
+    
+    with _skill_matrix_lock:
+        _skill_matrix = (version, cached)
+    return cached
+
+def get_user_connections(conn, user_id, metric=SIMILARITY_METRIC):
+    """
+    Every user sharing a skill with `user_id`, scored like the similarity network.
     
-    # Dictionary to store user pairs and their shared skills
-    shared_skills_data = []
+    Returns:
+        list: (other user id, score, sorted shared skills), highest score first
+        (ties by user id)
+    """
+    user_skills, matrix = get_skill_matrix(conn)
+    if user_id not in matrix.row:
+        return []
+    
+    _, other, scores, _ = matrix.top_neighbours(metric, None, 1, SIMILARITY_MAX_SKILL_USERS, [matrix.row[user_id]])
+    skills = user_skills[user_id]
+    return [
+        (other_id, score, sorted(skills & user_skills[other_id]))
+        for other_id, score in zip(matrix.user_ids[other].tolist(), scores.tolist())
+    ]
+
+def get_shared_skill_pairs(conn):
+    """
+    Every linked user pair as (score, strength, user1_id, user2_id, shared_skills),
+    highest score first. Computed once per version of the users data and
+    reused by every page until users or their quiz results change.
+    """
+    global _shared_pairs
+    version = get_data_versions(conn, ['users'])['users'][0]
+    with _shared_pairs_lock:
+        if _shared_pairs is not None and _shared_pairs[0] == version:
+            return _shared_pairs[1]
+    
+    user_skills, matrix = get_skill_matrix(conn)
+    pairs = get_similar_user_pairs(user_skills, matrix=matrix)
+    ranked = sorted(
+        ((score, len(shared_skills), user1_id, user2_id, shared_skills)
+         for (user1_id, user2_id), (score, shared_skills) in pairs.items()),
+        key=lambda pair: (-pair[0], pair[2], pair[3])
+    )
+    
+    with _shared_pairs_lock:
+        _shared_pairs = (version, ranked)
+    return ranked
+
+def get_shared_skills_connections(limit=100, offset=0, min_strength=1):
+    """
+    Generate data about users who share common skills.
     
-    # Get all user nodes from the graph
-    user_nodes = [node for node in G.nodes() if node.startswith('user_')]
+    Args:
+        limit (int): Pairs per page
+        offset (int): Pairs to skip
+        min_strength (int): Fewest shared skills
     
-    # Identify connected users (who share skills)
-    for i in range(len(user_nodes)):
-        for j in range(i+1, len(user_nodes)):
-            user1_id = user_nodes[i].replace('user_', '')
-            user2_id = user_nodes[j].replace('user_', '')
-            
-            # Check if these users are connected in the graph
-            if G.has_edge(user_nodes[i], user_nodes[j]):
-                # Get user details from database
-                user1 = conn.execute("SELECT name, email FROM users WHERE id = ?", (user1_id,)).fetchone()
-                user2 = conn.execute("SELECT name, email FROM users WHERE id = ?", (user2_id,)).fetchone()
-                
-                if not user1 or not user2:
-                    continue
-                
-                # Get skills for user1
-                user1_skills = set()
-                for neighbor in G.neighbors(user_nodes[i]):
-                    if neighbor.startswith('skill_'):
-                        user1_skills.add(neighbor.replace('skill_', ''))
-                
-                # Get skills for user2
-                user2_skills = set()
-                for neighbor in G.neighbors(user_nodes[j]):
-                    if neighbor.startswith('skill_'):
-                        user2_skills.add(neighbor.replace('skill_', ''))
-                
-                # Find shared skills
-                common_skills = user1_skills.intersection(user2_skills)
-                
-                # Only add pairs that actually share skills
-                if common_skills:
-                    shared_skills_data.append({
-                        "user1": {
-                            "id": user1_id,
-                            "name": user1['name'],
-                            "email": user1['email']
-                        },
-                        "user2": {
-                            "id": user2_id,
-                            "name": user2['name'],
-                            "email": user2['email']
-                        },
-                        "shared_skills": list(common_skills),
-                        "connection_strength": len(common_skills)
-                    })
-    
-    # Sort by connection strength (number of shared skills)
-    shared_skills_data.sort(key=lambda x: x["connection_strength"], reverse=True)
+    Returns:
+        tuple: (page of pairs, highest score first; total pairs with min_strength)
+    """
+    conn = get_read_connection()
+    try:
+        ranked = get_shared_skill_pairs(conn)
+        if min_strength > SIMILARITY_MIN_OVERLAP:
+            # Every pair shares SIMILARITY_MIN_OVERLAP skills; only higher thresholds filter
+            ranked = [pair for pair in ranked if pair[1] >= min_strength]
+        total = len(ranked)
+        page = ranked[offset:offset + limit]
+        
+        # One lookup for every user on the page
+        user_ids = sorted({user_id for _, _, user1_id, user2_id, _ in page for user_id in (user1_id, user2_id)})
+        users = {}
+        if user_ids:
+            placeholders = ','.join(['?' for _ in user_ids])
+            for row in conn.execute(f"SELECT id, name, email FROM users WHERE id IN ({placeholders})", user_ids):
+                users[row['id']] = {"id": row['id'], "name": row['name'], "email": row['email']}
+    finally:
+        conn.close()
     
-    conn.close()
-    return shared_skills_data
+    shared_skills_data = []
+    for score, strength, user1_id, user2_id, shared_skills in page:
+        if user1_id not in users or user2_id not in users:
+            continue
+        
+        shared_skills_data.append({
+            "user1": users[user1_id],
+            "user2": users[user2_id],
+            "shared_skills": shared_skills,
+            "connection_strength": strength,
+            "score": round(score, 3)
+        })
+    
+    return shared_skills_data, total
+
+def get_graph_data(graph, center=None, hops=1, min_degree=0, limit=GRAPH_PAGE_SIZE, offset=0, positions=None):
+    """
+    A page of a graph as compact node and edge arrays.
+
+    Nodes are ordered by hops from `center` (ego-network), then by degree,
+    so the first pages hold the most connected nodes. A page's edges link
+    its nodes to each other and to the nodes of earlier pages, so a client
+    that loads pages in order gets every edge exactly once.
+
+    Args:
+        graph: networkx graph (not modified)
+        center (str): Node id ('user_5', 'skill_python') for an ego-network
+        hops (int): Ego-network radius
+        min_degree (int): Leave out nodes with fewer links (level of detail)
+        limit (int): Nodes per page
+        offset (int): Nodes to skip
+        positions (dict): node -> (x, y) to include, from the precomputed layout
+
+    Returns:
+        dict: {"nodes": {column: [...]}, "edges": {column: [...]}, "total_nodes": int}
+
+    Raises:
+        KeyError: center is not in the graph
+    """
+    undirected = graph.to_undirected(as_view=True) if graph.is_directed() else graph
+
+    if center is not None:
+        if center not in graph:
+            raise KeyError(center)
+        distance = nx.single_source_shortest_path_length(undirected, center, cutoff=hops)
+    else:
+        distance = dict.fromkeys(graph, 0)
 
+    degree = undirected.degree
+    ranked = sorted(
+        (node for node in distance if degree[node] >= min_degree or node == center),
+        key=lambda node: (distance[node], -degree[node], node)
+    )
+    page = ranked[offset:offset + limit]
+    rank = {node: i for i, node in enumerate(ranked[:offset + limit])}
 
+    nodes = {"id": [], "label": [], "group": [], "degree": [], "hops": []}
+    if positions is not None:
+        nodes["x"], nodes["y"] = [], []
+    for node in page:
+        attrs = graph.nodes[node]
+        nodes["id"].append(node)
+        nodes["label"].append(attrs.get('label', node))
+        nodes["group"].append(attrs.get('group'))
+        nodes["degree"].append(degree[node])
+        nodes["hops"].append(distance[node])
+        if positions is not None:
+            x, y = positions.get(node, (None, None))
+            nodes["x"].append(x)
+            nodes["y"].append(y)
 
+    # Each edge belongs to the page of its later-ranked end
+    edges = {"source": [], "target": [], "value": []}
+    for node in page:
+        for neighbor in undirected.neighbors(node):
+            if rank.get(neighbor, len(rank)) < rank[node]:
+                # Report directed edges the way round they point
+                source, target = (neighbor, node) if graph.has_edge(neighbor, node) else (node, neighbor)
+                edges["source"].append(source)
+                edges["target"].append(target)
+                edges["value"].append(graph.edges[source, target].get('value', 1))
 
+    return {"nodes": nodes, "edges": edges, "total_nodes": len(ranked)}
@@ -0,0 +1,149 @@
+# network_jobs_utils.py
+import os
+import threading
+import time
+from pathlib import Path
+from db_utils import get_db_connection, open_db_connection
+from graph_cache_utils import GRAPH_KINDS, get_graph, get_graph_layout, get_graph_version
+from network_analysis import generate_network_html
+
+# Network page type -> (graph kind, HTML file, title)
+NETWORK_TYPES = {
+    'user-network': ('user_similarity', 'user_similarity_network.html', 'User Similarity Network'),
+    'skill-job-network': ('skill_job', 'skill_job_network.html', 'Skills & Jobs Network'),
+    'full-network': ('full', 'full_network.html', 'Complete Network View'),
+}
+
+# Seconds a render job holds its lease; a job still running after that
+# (its worker died) is marked failed and another worker may start over
+NETWORK_JOB_LEASE = int(os.environ.get('NETWORK_JOB_LEASE', 600))
+
+# A rendering worker renews its lease this often, so long renders keep it
+NETWORK_JOB_RENEW_INTERVAL = NETWORK_JOB_LEASE / 3
+
+def get_network_version(conn, network_type):
+    """Version of the data a network page shows, as stored in network_jobs.version"""
+    kind = NETWORK_TYPES[network_type][0]
+    follows_users, follows_jobs = GRAPH_KINDS[kind]
+    version = get_graph_version(conn)
+    return f"{version.change_id if follows_users else 0}-{version.job_version if follows_jobs else 0}"
+
+def get_network_file(network_type):
+    """Path of a network page under static/"""
+    return f"networks/{NETWORK_TYPES[network_type][1]}"
+
+def job_to_dict(row):
+    return {
+        "job_id": row['id'],
+        "type": row['network_type'],
+        "status": row['status'],
+        "file_path": row['file_path'],
+        "error": row['error'],
+    }
+
+def start_network_job(network_type):
+    """
+    Regenerate a network page in the background, once across workers.
+
+    A request while a job for the same type is running gets that job; a
+    request when the page already shows the current data gets the last
+    finished job and starts nothing.
+
+    Args:
+        network_type (str): 'user-network', 'skill-job-network' or 'full-network'
+
+    Returns:
+        dict: {"job_id", "type", "status", "file_path", "error"}
+    """
+    conn = get_db_connection()
+    try:
+        now = time.time()
+        # Take over from workers that died mid-render
+        conn.execute("""
+            UPDATE network_jobs SET status = 'failed', error = 'Lease expired', finished_at = ?
+            WHERE network_type = ? AND status = 'running' AND lease_until < ?
+        """, (now, network_type, now))
+
+        version = get_network_version(conn, network_type)
+        latest = conn.execute("""
+            SELECT * FROM network_jobs WHERE network_type = ? AND status = 'done'
+            ORDER BY id DESC LIMIT 1
+        """, (network_type,)).fetchone()
+        if latest is not None and latest['version'] == version and (Path("static") / latest['file_path']).exists():
+            conn.commit()
+            return job_to_dict(latest)
+
+        cursor = conn.execute("""
+            INSERT OR IGNORE INTO network_jobs (network_type, status, version, started_at, lease_until)
+            VALUES (?, 'running', ?, ?, ?)
+        """, (network_type, version, now, now + NETWORK_JOB_LEASE))
+        started = cursor.rowcount == 1
+        # Ours, or the running job that kept ours out (no job starts while one runs)
+        job = conn.execute("""
+            SELECT * FROM network_jobs WHERE network_type = ? ORDER BY id DESC LIMIT 1
+        """, (network_type,)).fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+
+    if started:
+        threading.Thread(target=run_network_job, args=(job['id'], network_type),
+                         name=f"network-job-{job['id']}", daemon=True).start()
+    return job_to_dict(job)
+
+def renew_network_job_lease(job_id, rendered):
+    """Push a running job's lease forward until rendered is set (background thread)"""
+    while not rendered.wait(NETWORK_JOB_RENEW_INTERVAL):
+        conn = open_db_connection()
+        try:
+            renewed = conn.execute("""
+                UPDATE network_jobs SET lease_until = ? WHERE id = ? AND status = 'running'
+            """, (time.time() + NETWORK_JOB_LEASE, job_id)).rowcount
+            conn.commit()
+        except Exception as e:
+            print(f"Error renewing the lease of network job {job_id}: {e}")
+            continue
+        finally:
+            conn.close()
+        if not renewed:
+            return
+
+def run_network_job(job_id, network_type):
+    """Render a network page and record the outcome (background thread)"""
+    kind, filename, title = NETWORK_TYPES[network_type]
+    started = time.time()
+    rendered = threading.Event()
+    threading.Thread(target=renew_network_job_lease, args=(job_id, rendered),
+                     name=f"network-job-{job_id}-lease", daemon=True).start()
+    try:
+        file_path = generate_network_html(get_graph(kind), filename, title, positions=get_graph_layout(kind))
+        status, error = 'done', None
+        print(f"Rendered {filename} in {time.time() - started:.1f}s")
+    except Exception as e:
+        file_path, status, error = None, 'failed', str(e)
+        print(f"Error rendering {filename}: {e}")
+    finally:
+        rendered.set()
+
+    conn = get_db_connection()
+    try:
+        # Only while the job still holds its lease: once it has expired another
+        # job may be running, whose status this must not overwrite
+        recorded = conn.execute("""
+            UPDATE network_jobs SET status = ?, file_path = ?, error = ?, finished_at = ?
+            WHERE id = ? AND status = 'running'
+        """, (status, file_path, error, time.time(), job_id)).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    if not recorded:
+        print(f"Network job {job_id} lost its lease before finishing; its result was not recorded")
+
+def get_network_job(job_id):
+    """A render job's status dict, or None"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT * FROM network_jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return job_to_dict(row) if row is not None else None
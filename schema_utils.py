@@ -0,0 +1,389 @@
+# schema_utils.py
+import argparse
+import secrets
+from db_utils import get_db_connection, is_postgres
+from job_market_utils import ensure_job_market_table, ensure_job_skills_schema, column_exists
+from user_skills_utils import ensure_user_skills_schema, backfill_user_skills, backfill_user_skill_scores
+
+# Application tables, as the routes expect them
+BASE_TABLES = [
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        username TEXT,
+        email TEXT UNIQUE,
+        password_hash TEXT,
+        skills_data TEXT,
+        job_role TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS quiz_questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        question TEXT,
+        options TEXT,
+        correct_answer TEXT,
+        skill TEXT,
+        category TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_quiz_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        question_id INTEGER,
+        category TEXT,
+        proficient_skills TEXT,
+        improvement_skills TEXT,
+        score INTEGER,
+        completed_at TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS interview_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        skill_area TEXT,
+        job_role TEXT,
+        started_at TEXT,
+        status TEXT,
+        completed_at TEXT,
+        analysis TEXT,
+        feedback TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS interview_qa (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        interview_id INTEGER,
+        question TEXT,
+        answer TEXT,
+        timestamp TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_interview_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        interview_id INTEGER,
+        technical_score INTEGER,
+        communication_score INTEGER,
+        overall_score INTEGER,
+        skill_area TEXT,
+        job_role TEXT,
+        completed_at TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS career_paths (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        description TEXT,
+        required_skills TEXT,
+        growth_potential TEXT,
+        market_demand TEXT,
+        avg_salary TEXT,
+        next_steps TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_career_recommendations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        career_path_id INTEGER,
+        matching_score INTEGER,
+        recommendation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS job_roles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        role_name TEXT,
+        title TEXT,
+        description TEXT,
+        category TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_connections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        connected_user_id INTEGER,
+        status TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+]
+
+# Columns the routes use that older hand-made databases may lack
+BASE_COLUMNS = {
+    'users': [('username', 'TEXT'), ('job_role', 'TEXT'), ('created_at', 'TIMESTAMP')],
+    'user_quiz_results': [('question_id', 'INTEGER')],
+    'interview_sessions': [('completed_at', 'TEXT'), ('analysis', 'TEXT'), ('feedback', 'TEXT')],
+    'user_connections': [('status', 'TEXT')],
+}
+
+# (index, table, columns) for every lookup the routes run per request
+HOT_QUERY_INDEXES = [
+    # login / signup: users WHERE email = ?
+    ('idx_users_email', 'users', 'email'),
+    # quiz history ORDER BY completed_at; question_id makes the skill joins covering
+    ('idx_user_quiz_results_user', 'user_quiz_results', 'user_id, completed_at, question_id'),
+    # users who answered questions on a skill (find_connections)
+    ('idx_user_quiz_results_question', 'user_quiz_results', 'question_id, user_id'),
+    ('idx_quiz_questions_category', 'quiz_questions', 'category'),
+    ('idx_quiz_questions_skill', 'quiz_questions', 'skill'),
+    ('idx_interview_sessions_user', 'interview_sessions', 'user_id'),
+    ('idx_interview_qa_interview', 'interview_qa', 'interview_id, timestamp'),
+    ('idx_user_interview_results_user', 'user_interview_results', 'user_id, completed_at'),
+    ('idx_user_career_recommendations_user', 'user_career_recommendations', 'user_id, career_path_id'),
+    # connections are looked up in both directions
+    ('idx_user_connections_user', 'user_connections', 'user_id, connected_user_id'),
+    ('idx_user_connections_connected', 'user_connections', 'connected_user_id, user_id'),
+    ('idx_job_roles_role_name', 'job_roles', 'role_name'),
+    # covering indexes for the location and company rating panels
+    ('idx_job_market_data_location', 'job_market_data', 'job_location'),
+    ('idx_job_market_data_company_rating', 'job_market_data', 'company, company_rating'),
+]
+
+def create_base_tables(conn):
+    for sql in BASE_TABLES:
+        conn.execute(sql)
+    ensure_job_market_table(conn)
+
+    for table, columns in BASE_COLUMNS.items():
+        for column, column_type in columns:
+            if not column_exists(conn, table, column):
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+def create_hot_query_indexes(conn):
+    for name, table, columns in HOT_QUERY_INDEXES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+def create_user_skills(conn):
+    ensure_job_skills_schema(conn)
+    ensure_user_skills_schema(conn)
+    print(f"Copied {backfill_user_skills(conn)} user skills from users.skills_data")
+
+# (table, user id column) whose writes change a user's place in the network graphs;
+# users only for the columns the graphs show
+GRAPH_CHANGE_SOURCES = [
+    ('users', 'id', 'INSERT'),
+    ('users', 'id', 'UPDATE OF name, email, job_role'),
+    ('users', 'id', 'DELETE'),
+    ('user_skills', 'user_id', 'INSERT'),
+    ('user_skills', 'user_id', 'DELETE'),
+    ('user_quiz_results', 'user_id', 'INSERT'),
+    ('user_quiz_results', 'user_id', 'DELETE'),
+]
+
+# Rows kept in graph_changes; a graph further behind than this is rebuilt
+GRAPH_CHANGE_LOG_SIZE = 10000
+
+def create_graph_change_log(conn):
+    """
+    graph_changes: one row per write that touches a user, filled by
+    triggers, so every worker's graph cache can replay the changed users.
+    The log prunes itself every 1000 rows.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS graph_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL
+        )
+    """)
+
+    if is_postgres(conn):
+        conn.execute(f"""
+            CREATE OR REPLACE FUNCTION log_graph_change() RETURNS trigger AS $$
+            DECLARE
+                row_data jsonb;
+                change_id integer;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    row_data := to_jsonb(OLD);
+                ELSE
+                    row_data := to_jsonb(NEW);
+                END IF;
+                INSERT INTO graph_changes (user_id) VALUES ((row_data ->> TG_ARGV[0])::integer)
+                RETURNING id INTO change_id;
+                IF change_id % 1000 = 0 THEN
+                    DELETE FROM graph_changes WHERE id <= change_id - {GRAPH_CHANGE_LOG_SIZE};
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        for table, column, event in GRAPH_CHANGE_SOURCES:
+            name = f"{table}_graph_{event.split()[0].lower()}"
+            conn.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+            conn.execute(f"""
+                CREATE TRIGGER {name} AFTER {event} ON {table}
+                FOR EACH ROW EXECUTE FUNCTION log_graph_change('{column}')
+            """)
+        return
+
+    for table, column, event in GRAPH_CHANGE_SOURCES:
+        row = 'OLD' if event == 'DELETE' else 'NEW'
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_graph_{event.split()[0].lower()} AFTER {event} ON {table} BEGIN
+                INSERT INTO graph_changes (user_id) VALUES ({row}.{column});
+            END
+        """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS graph_changes_prune AFTER INSERT ON graph_changes
+        WHEN NEW.id % 1000 = 0 BEGIN
+            DELETE FROM graph_changes WHERE id <= NEW.id - {GRAPH_CHANGE_LOG_SIZE};
+        END
+    """)
+
+def create_network_jobs(conn):
+    """
+    network_jobs: background renders of the network pages. The partial
+    unique index allows one running job per network type, which is the
+    lease the workers compete for.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS network_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            network_type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            version TEXT NOT NULL,
+            file_path TEXT,
+            error TEXT,
+            started_at REAL NOT NULL,
+            lease_until REAL NOT NULL,
+            finished_at REAL
+        )
+    """)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_network_jobs_running
+        ON network_jobs (network_type) WHERE status = 'running'
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_network_jobs_type ON network_jobs (network_type, status, id)")
+
+def create_minhash_index(conn):
+    """
+    minhash_buckets: LSH band buckets of every user's skill MinHash
+    signature, and minhash_state: the graph_changes id and settings the
+    buckets were built with. Filled by the minhash_utils refresh thread.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS minhash_buckets (
+            bucket BIGINT NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, user_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_minhash_buckets_user ON minhash_buckets (user_id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS minhash_state (
+            id INTEGER PRIMARY KEY,
+            change_id INTEGER NOT NULL,
+            config TEXT NOT NULL
+        )
+    """)
+
+def create_database_identity(conn):
+    """
+    database_identity: a random token made with the database, so caches kept
+    outside it (graph snapshots) can tell a regenerated database from the
+    one they were built from.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS database_identity (
+            id INTEGER PRIMARY KEY,
+            token TEXT NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO database_identity (id, token) VALUES (1, ?)", (secrets.token_hex(16),))
+
+def drop_duplicate_indexes(conn):
+    # users.email is UNIQUE, so its automatic index already serves the login / signup
+    # lookups that migration 2's idx_users_email was created for
+    conn.execute("DROP INDEX IF EXISTS idx_users_email")
+
+def score_user_skills(conn):
+    print(f"Scored the skills of {backfill_user_skill_scores(conn)} users from users.skills_data")
+
+# (version, description, upgrade function); append new migrations, never edit applied ones
+MIGRATIONS = [
+    (1, "Base application tables", create_base_tables),
+    (2, "Indexes for the per-request lookups", create_hot_query_indexes),
+    (3, "Normalized user_skills table", create_user_skills),
+    (4, "Change log for the network graph caches", create_graph_change_log),
+    (5, "Render jobs for the network pages", create_network_jobs),
+    (6, "MinHash LSH index of user skills", create_minhash_index),
+    (7, "Identity token of the database", create_database_identity),
+    (8, "Drop the index duplicating users.email UNIQUE", drop_duplicate_indexes),
+    (9, "Assessment scores of user skills", score_user_skills),
+]
+
+def get_schema_version(conn):
+    """Schema version of the database (0 for a database never migrated)"""
+    if is_postgres(conn):
+        # PostgreSQL has no user_version; the version lives in a one-row table
+        if conn.execute("SELECT to_regclass('schema_version')").fetchone()[0] is None:
+            return 0
+        return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def set_schema_version(conn, version):
+    if is_postgres(conn):
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+        conn.execute("DELETE FROM schema_version")
+        conn.execute("INSERT INTO schema_version (version) VALUES (?)", (version,))
+    else:
+        conn.execute(f"PRAGMA user_version = {version}")
+
+def migrate(conn, target=None):
+    """
+    Apply pending migrations, each in its own transaction.
+
+    Args:
+        conn: Open database connection
+        target (int): Stop after this version (default: latest)
+
+    Returns:
+        int: Schema version after migrating
+    """
+    version = get_schema_version(conn)
+    applied = False
+
+    for migration_version, description, upgrade in MIGRATIONS:
+        if migration_version <= version or (target is not None and migration_version > target):
+            continue
+
+        conn.execute("BEGIN")
+        try:
+            upgrade(conn)
+            set_schema_version(conn, migration_version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        version = migration_version
+        applied = True
+        print(f"Applied migration {migration_version}: {description}")
+
+    if applied:
+        # Refresh planner statistics for the new indexes
+        if is_postgres(conn):
+            conn.execute("ANALYZE")
+            conn.commit()
+        else:
+            conn.execute("PRAGMA optimize")
+    return version
+
+def prepare_database():
+    """Bring the database schema up to date (runs at startup)"""
+    conn = get_db_connection()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument('--status', action='store_true', help="Show the schema version and pending migrations")
+    parser.add_argument('--target', type=int, help="Migrate up to this version")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        if args.status:
+            version = get_schema_version(conn)
+            print(f"Schema version: {version}")
+            for migration_version, description, _ in MIGRATIONS:
+                if migration_version > version:
+                    print(f"Pending {migration_version}: {description}")
+        else:
+            print(f"Schema version: {migrate(conn, args.target)}")
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+# similarity_utils.py
+import os
+import numpy as np
+
+# Score of a user pair: 'overlap' (shared skills), 'jaccard', 'cosine', or
+# 'idf' (shared skills weighted by rarity, so a rare shared skill counts
+# more than one most users have)
+SIMILARITY_METRICS = ('overlap', 'jaccard', 'cosine', 'idf')
+SIMILARITY_METRIC = os.environ.get('SIMILARITY_METRIC', 'idf')
+
+# (user, other user, skill) co-occurrences expanded per block of users;
+# bounds the memory of SkillMatrix.top_neighbours()
+SIMILARITY_BLOCK_SIZE = int(os.environ.get('SIMILARITY_BLOCK_SIZE', 1000000))
+
+# A block is summed into dense (rows x users) arrays instead of sorted
+# when it has at least 1 / SIMILARITY_DENSE_RATIO as many co-occurrences as cells
+SIMILARITY_DENSE_RATIO = 2
+
+def get_idf(user_counts, total_users):
+    """Smoothed inverse document frequency of skills held by `user_counts` of `total_users` users"""
+    return np.log((1 + total_users) / (1 + np.asarray(user_counts, dtype=np.float64))) + 1
+
+def score_similarity(metric, shared, size_a, size_b, shared_weight=None):
+    """
+    Similarity scores from shared skill counts (numbers or arrays).
+
+    Args:
+        metric (str): One of SIMILARITY_METRICS
+        shared: Shared skill counts
+        size_a, size_b: Skill counts of the two users
+        shared_weight: Summed IDF of the shared skills (for 'idf')
+    """
+    shared = np.asarray(shared, dtype=np.float64)
+    if metric == 'overlap':
+        return shared
+    if metric == 'jaccard':
+        return shared / (np.asarray(size_a) + size_b - shared)
+    if metric == 'cosine':
+        return shared / np.sqrt(np.asarray(size_a, dtype=np.float64) * size_b)
+    if metric == 'idf':
+        return np.asarray(shared_weight, dtype=np.float64)
+    raise ValueError(f"Unknown similarity metric: {metric}")
+
+def gather_ranges(starts, lengths):
+    """Concatenated np.arange(start, start + length) for every start / length"""
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+class SkillMatrix:
+    """
+    Users x skills as a sparse CSR matrix (indptr / indices) plus its
+    transpose, the users of every skill. Only users with skills get a row.
+    """
+
+    def __init__(self, user_skills):
+        """
+        Args:
+            user_skills (dict): user_id -> set of skills
+        """
+        self.user_ids = np.array(sorted(user_id for user_id, skills in user_skills.items() if skills), dtype=np.int64)
+        self.row = {user_id: i for i, user_id in enumerate(self.user_ids.tolist())}
+        self.skills = sorted({skill for skills in user_skills.values() for skill in skills})
+        column = {skill: i for i, skill in enumerate(self.skills)}
+
+        rows = [sorted(column[skill] for skill in user_skills[user_id]) for user_id in self.user_ids.tolist()]
+        self.sizes = np.array([len(row) for row in rows], dtype=np.int64)
+        self.indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum(self.sizes)
+        self.indices = np.array([skill for row in rows for skill in row], dtype=np.int64)
+
+        # Transpose: skill_users[skill_indptr[s]:skill_indptr[s + 1]] are the rows holding skill s
+        self.user_counts = np.bincount(self.indices, minlength=len(self.skills))
+        self.skill_indptr = np.zeros(len(self.skills) + 1, dtype=np.int64)
+        self.skill_indptr[1:] = np.cumsum(self.user_counts)
+        self.skill_users = np.repeat(np.arange(len(rows)), self.sizes)[np.argsort(self.indices, kind='stable')]
+
+        self.idf = get_idf(self.user_counts, len(rows))
+
+    def top_neighbours(self, metric=SIMILARITY_METRIC, top_k=None, min_overlap=1, max_skill_users=None, rows=None):
+        """
+        Every row's most similar other rows, computed in blocks of rows so at
+        most SIMILARITY_BLOCK_SIZE co-occurrences are held at once.
+
+        Args:
+            metric (str): One of SIMILARITY_METRICS
+            top_k (int): Neighbours kept per row (None keeps all); ties go to the lower user id
+            min_overlap (int): Fewest shared skills for a neighbour
+            max_skill_users (int): Skills held by more users than this are
+                left out of the scores, like stop words (None counts every skill)
+            rows (array): Rows to find neighbours for (default: all)
+
+        Returns:
+            tuple: arrays (row, neighbour row, score, shared skill count), by row then score
+        """
+        rows = np.arange(len(self.user_ids)) if rows is None else np.asarray(rows, dtype=np.int64)
+        counted = np.ones(len(self.skills), dtype=bool)
+        if max_skill_users is not None:
+            counted = self.user_counts <= max_skill_users
+
+        # Co-occurrences each row expands to, and the block boundaries they give
+        postings = np.where(counted, self.user_counts, 0)
+        row_cost = np.add.reduceat(postings[self.indices], self.indptr[:-1])[rows] if len(self.indices) else np.zeros(len(rows))
+        cumulative = np.cumsum(row_cost)
+
+        blocks = []
+        start = 0
+        while start < len(rows):
+            done = cumulative[start - 1] if start else 0
+            end = max(start + 1, int(np.searchsorted(cumulative, done + SIMILARITY_BLOCK_SIZE, side='right')))
+            blocks.append(self.block_neighbours(rows[start:end], counted, metric, top_k, min_overlap))
+            start = end
+
+        if not blocks:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0), empty
+        return tuple(np.concatenate(columns) for columns in zip(*blocks))
+
+    def block_neighbours(self, block_rows, counted, metric, top_k, min_overlap):
+        # The block's (row, skill) entries, without the skills left out
+        entry_row = np.repeat(np.arange(len(block_rows)), self.sizes[block_rows])
+        entry_skill = self.indices[gather_ranges(self.indptr[block_rows], self.sizes[block_rows])]
+        entry_row, entry_skill = entry_row[counted[entry_skill]], entry_skill[counted[entry_skill]]
+
+        # Each entry expanded to every user holding its skill
+        n = len(self.user_ids)
+        lengths = self.user_counts[entry_skill]
+        pair_other = self.skill_users[gather_ranges(self.skill_indptr[entry_skill], lengths)]
+        keys = np.repeat(entry_row * n, lengths) + pair_other
+        pair_weight = np.repeat(self.idf[entry_skill], lengths) if metric == 'idf' else None
+
+        # Sum per (row, other): the block of the sparse product A * A^T.
+        # Both ways leave the pairs ordered by row, then by user id.
+        if len(keys) * SIMILARITY_DENSE_RATIO >= len(block_rows) * n:
+            # Most pairs co-occur: count into a dense block, no sort needed
+            shared = np.bincount(keys, minlength=len(block_rows) * n).reshape(len(block_rows), n)
+            weight = None
+            if pair_weight is not None:
+                weight = np.bincount(keys, weights=pair_weight, minlength=len(block_rows) * n).reshape(len(block_rows), n)
+            score = score_similarity(metric, shared, self.sizes[block_rows][:, None], self.sizes[None, :], weight)
+
+            valid = shared >= max(min_overlap, 1)
+            valid[np.arange(len(block_rows)), block_rows] = False
+            if top_k is not None and top_k < n:
+                # Each row's k-th best score; only ties with it are sorted below
+                masked = np.where(valid, score, -np.inf)
+                threshold = -np.partition(-masked, top_k - 1, axis=1)[:, top_k - 1]
+                valid &= score >= threshold[:, None]
+            local, other = np.nonzero(valid)
+            score, shared = score[local, other], shared[local, other]
+        else:
+            keys, inverse = np.unique(keys, return_inverse=True)
+            shared = np.bincount(inverse, minlength=len(keys))
+            weight = np.bincount(inverse, weights=pair_weight, minlength=len(keys)) if pair_weight is not None else None
+            local, other = np.divmod(keys, n)
+            score = score_similarity(metric, shared, self.sizes[block_rows[local]], self.sizes[other], weight)
+
+            keep = (shared >= min_overlap) & (other != block_rows[local])
+            local, other, score, shared = local[keep], other[keep], score[keep], shared[keep]
+
+        # Best first within each row; the stable sort keeps ties in user id order
+        order = np.lexsort((-score, local))
+        local, other, score, shared = local[order], other[order], score[order], shared[order]
+        if top_k is not None:
+            rank = np.arange(len(local)) - np.searchsorted(local, local)
+            keep = rank < top_k
+            local, other, score, shared = local[keep], other[keep], score[keep], shared[keep]
+        return block_rows[local], other, score, shared
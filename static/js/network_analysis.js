@@ -70,14 +70,43 @@ function refreshNetwork(networkType) {
     button.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Loading...';
     button.disabled = true;
     
+    // Reset button
+    const resetButton = () => {
+        button.innerHTML = originalText;
+        button.disabled = false;
+    };
+    
     fetch(`/api/refresh_network?type=${networkType}`)
         .then(response => response.json())
         .then(data => {
-            // Reset button
-            button.innerHTML = originalText;
-            button.disabled = false;
-            
             if (data.success) {
+                // Rendered in the background; wait for the job
+                waitForNetworkJob(networkType, data.job_id, resetButton);
+            } else {
+                resetButton();
+                showToast('Error', 'Error refreshing network: ' + data.error, 'error');
+            }
+        })
+        .catch(error => {
+            resetButton();
+            
+            console.error('Error:', error);
+            showToast('Error', 'Failed to refresh network', 'error');
+        });
+}
+
+// Poll a network render job, then reload the iframe
+function waitForNetworkJob(networkType, jobId, done) {
+    fetch(`/api/network_jobs/${jobId}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.status === 'running') {
+                setTimeout(() => waitForNetworkJob(networkType, jobId, done), 1000);
+                return;
+            }
+            done();
+            
+            if (data.status === 'done') {
                 // Reload the iframe with cache-busting parameter
                 const timestamp = new Date().getTime();
                 let frameId;
@@ -101,9 +130,7 @@ function refreshNetwork(networkType) {
             }
         })
         .catch(error => {
-            // Reset button
-            button.innerHTML = originalText;
-            button.disabled = false;
+            done();
             
             console.error('Error:', error);
             showToast('Error', 'Failed to refresh network', 'error');
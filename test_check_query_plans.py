@@ -0,0 +1,50 @@
+# test_check_query_plans.py
+import os
+import sqlite3
+import subprocess
+import sys
+import pytest
+from check_query_plans import check_query_plans, normalize_sql
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT UNIQUE, job_role TEXT)")
+    conn.execute("CREATE TABLE job_roles (id INTEGER PRIMARY KEY, role_name TEXT)")
+    yield conn
+    conn.close()
+
+def recorded(*statements):
+    """Queries as QueryRecorder.queries holds them"""
+    return {normalize_sql(sql): ('test', sql) for sql in statements}
+
+def test_reports_full_scan(conn):
+    failures = check_query_plans(conn, recorded("SELECT id FROM users WHERE job_role = 'Data Scientist'"))
+
+    assert len(failures) == 1
+    source, sql, plan, scans = failures[0]
+    assert sql == "SELECT id FROM users WHERE job_role = ?"
+    assert scans == ['users']
+
+def test_indexed_lookup_passes(conn):
+    assert check_query_plans(conn, recorded("SELECT id FROM users WHERE email = 'a@example.com'",
+                                            "SELECT name FROM users WHERE id = 5")) == []
+
+def test_allowed_full_scan_passes(conn):
+    assert check_query_plans(conn, recorded("SELECT id, role_name FROM job_roles")) == []
+
+def test_routes_have_no_unexpected_full_scans(tmp_path):
+    """Every route on a small generated dataset (the CI gate)"""
+    env = dict(os.environ)
+    # The LLM calls are stubbed, but the clients are created when app is imported
+    env.setdefault('OPENAI_API_KEY', 'unused')
+    env.setdefault('OPENROUTER_API_KEY', 'unused')
+    env.pop('DATABASE_URL', None)
+
+    result = subprocess.run([sys.executable, os.path.join(HERE, 'check_query_plans.py'), '--scale', '200'],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=600)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert '0 with full table scans' in result.stdout
@@ -0,0 +1,213 @@
+# user_skills_utils.py
+import json
+from dataclasses import dataclass, field
+from job_market_utils import normalize_skill, get_skill_ids
+
+# user_skills.kind values and the skills_data keys they come from
+SKILL_KINDS = {
+    'proficient': 'proficientSkills',
+    'improvement': 'improvementSkills',
+}
+
+@dataclass
+class UserSkillProfile:
+    """A user's skills, read from user_skills"""
+    user_id: int
+    proficient: list = field(default_factory=list)
+    improvement: list = field(default_factory=list)
+    # skill name -> score of the skill assessment it came from (skills without one are left out)
+    scores: dict = field(default_factory=dict)
+
+    def to_skills_data(self):
+        """The {"proficientSkills": [...], "improvementSkills": [...]} shape the templates use"""
+        return {key: list(getattr(self, kind)) for kind, key in SKILL_KINDS.items()}
+
+def ensure_user_skills_schema(conn):
+    """Create user_skills, keyed by user and looked up by skill"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_skills (
+            user_id INTEGER NOT NULL,
+            skill_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            source TEXT,
+            score REAL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, kind, skill_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_skills_skill ON user_skills (skill_id, kind, user_id)")
+
+def load_skills_data(skills_data):
+    """
+    Parse a users.skills_data value into a dict.
+    Older rows hold a bare list of skills (career paths page) or nothing.
+    """
+    if isinstance(skills_data, str):
+        try:
+            skills_data = json.loads(skills_data) if skills_data.strip() else {}
+        except ValueError:
+            skills_data = {}
+
+    if isinstance(skills_data, list):
+        return {"proficientSkills": skills_data}
+    return skills_data if isinstance(skills_data, dict) else {}
+
+def get_assessment_score(skills_data):
+    """
+    The skill assessment quiz score (0-100) stored with the skills in
+    skills_data["score"], or None when the skills came without one
+    """
+    score = skills_data.get('score')
+    if isinstance(score, bool):
+        return None
+    try:
+        return float(score) if score is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def save_user_skills(conn, user_id, skills_data, source='profile'):
+    """
+    Store a user's skills in user_skills and users.skills_data.
+
+    Skills the user already had keep their source; skills that are gone
+    are removed. Every skill gets the assessment quiz score saved with them
+    (skills_data["score"]), when there is one. Extra skills_data keys
+    (scores, interview dates) stay in the blob.
+
+    Args:
+        conn: Open database connection (caller commits)
+        user_id (int): User to update
+        skills_data (dict or list): New skills_data; a list means proficient skills
+        source (str): Where new skills came from ('profile', 'career_paths', 'interview', ...)
+
+    Returns:
+        dict: The skills_data that was stored
+    """
+    skills_data = load_skills_data(skills_data)
+    score = get_assessment_score(skills_data)
+
+    wanted = set()
+    for kind, key in SKILL_KINDS.items():
+        skills = [skill for skill in skills_data.get(key) or [] if isinstance(skill, str)]
+        skills_data[key] = skills
+        wanted.update((skill_id, kind) for skill_id in get_skill_ids(conn, skills, create=True).values())
+
+    existing = {(row[0], row[1]) for row in conn.execute(
+        "SELECT skill_id, kind FROM user_skills WHERE user_id = ?", (user_id,)
+    )}
+
+    conn.executemany("DELETE FROM user_skills WHERE user_id = ? AND skill_id = ? AND kind = ?",
+                     [(user_id, skill_id, kind) for skill_id, kind in existing - wanted])
+    conn.executemany("INSERT INTO user_skills (user_id, skill_id, kind, source, score) VALUES (?, ?, ?, ?, ?)",
+                     [(user_id, skill_id, kind, source, score) for skill_id, kind in wanted - existing])
+    if score is not None:
+        # A new quiz re-scores the skills the user keeps
+        conn.executemany("""
+            UPDATE user_skills SET score = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = ? AND skill_id = ? AND kind = ? AND (score IS NULL OR score != ?)
+        """, [(score, user_id, skill_id, kind, score) for skill_id, kind in wanted & existing])
+
+    conn.execute("UPDATE users SET skills_data = ? WHERE id = ?", (json.dumps(skills_data), user_id))
+    return skills_data
+
+def backfill_user_skills(conn, source='skills_data'):
+    """Fill user_skills from every users.skills_data blob (caller commits)"""
+    users = conn.execute("SELECT id, skills_data FROM users WHERE skills_data IS NOT NULL AND skills_data != ''").fetchall()
+
+    rows = []
+    for user in users:
+        skills_data = load_skills_data(user['skills_data'])
+        score = get_assessment_score(skills_data)
+        for kind, key in SKILL_KINDS.items():
+            skills = [skill for skill in skills_data.get(key) or [] if isinstance(skill, str)]
+            for skill_id in get_skill_ids(conn, skills, create=True).values():
+                rows.append((user['id'], skill_id, kind, source, score))
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO user_skills (user_id, skill_id, kind, source, score) VALUES (?, ?, ?, ?, ?)", rows
+    )
+    return len(rows)
+
+def backfill_user_skill_scores(conn):
+    """
+    Set user_skills.score from the assessment score in every users.skills_data
+    blob, for rows copied before scores were stored (caller commits)
+
+    Returns:
+        int: Number of users whose skills got a score
+    """
+    users = conn.execute(
+        "SELECT id, skills_data FROM users WHERE skills_data IS NOT NULL AND skills_data != ''"
+    ).fetchall()
+
+    scores = []
+    for user in users:
+        score = get_assessment_score(load_skills_data(user['skills_data']))
+        if score is not None:
+            scores.append((score, user['id']))
+    conn.executemany("UPDATE user_skills SET score = ? WHERE user_id = ? AND score IS NULL", scores)
+    return len(scores)
+
+def get_skill_profiles(conn, user_ids=None):
+    """
+    Skill profiles for many users in one query.
+
+    Args:
+        conn: Open database connection
+        user_ids (list): Users to load; every user with skills when None
+
+    Returns:
+        dict: user_id -> UserSkillProfile (users without skills are left out)
+    """
+    query = """
+        SELECT us.user_id, us.kind, s.name, us.score
+        FROM user_skills us
+        JOIN skills s ON s.id = us.skill_id
+    """
+    params = []
+    if user_ids is not None:
+        query += f" WHERE us.user_id IN ({','.join(['?' for _ in user_ids])})"
+        params = list(user_ids)
+    query += " ORDER BY us.user_id, us.kind, s.name"
+
+    profiles = {}
+    for row in conn.execute(query, params):
+        profile = profiles.get(row['user_id'])
+        if profile is None:
+            profile = profiles[row['user_id']] = UserSkillProfile(row['user_id'])
+        getattr(profile, row['kind']).append(row['name'])
+        if row['score'] is not None:
+            profile.scores[row['name']] = row['score']
+    return profiles
+
+def get_user_skill_profile(conn, user_id):
+    """A single user's UserSkillProfile (empty lists when they have no skills)"""
+    return get_skill_profiles(conn, [user_id]).get(user_id) or UserSkillProfile(user_id)
+
+def get_users_with_skills(conn, skills, kind='proficient', exclude_user_id=None):
+    """
+    Users that have any of `skills`, through the skill index.
+
+    Returns:
+        list: {"id", "name", "email", "skills"} dicts with the matching skill names, by user id
+    """
+    names = sorted({normalize_skill(skill) for skill in skills if normalize_skill(skill)})
+    if not names:
+        return []
+
+    rows = conn.execute(f"""
+        SELECT u.id, u.name, u.email, s.name AS skill
+        FROM skills s
+        JOIN user_skills us ON us.skill_id = s.id AND us.kind = ?
+        JOIN users u ON u.id = us.user_id
+        WHERE s.name IN ({','.join(['?' for _ in names])}) AND us.user_id != ?
+        ORDER BY u.id, s.name
+    """, [kind] + names + [exclude_user_id if exclude_user_id is not None else -1]).fetchall()
+
+    users = {}
+    for row in rows:
+        user = users.get(row['id'])
+        if user is None:
+            user = users[row['id']] = {"id": row['id'], "name": row['name'], "email": row['email'], "skills": []}
+        user["skills"].append(row['skill'])
+    return list(users.values())
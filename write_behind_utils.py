@@ -0,0 +1,194 @@
+# write_behind_utils.py
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from db_utils import get_db_connection, open_db_connection
+
+# Opt in with WRITE_BEHIND=1; otherwise every write commits on its own as before
+WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+
+# Pending writes allowed before callers are made to wait (backpressure)
+WRITE_QUEUE_SIZE = int(os.environ.get('WRITE_BEHIND_QUEUE_SIZE', 10000))
+
+# How long the writer gathers more writes after the first one arrives (seconds)
+WRITE_BATCH_INTERVAL = float(os.environ.get('WRITE_BEHIND_INTERVAL', 0.005))
+
+# Most writes committed in one transaction
+WRITE_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500))
+
+# How long a caller waits for queue space, and then for its write to commit (seconds)
+WRITE_TIMEOUT = float(os.environ.get('WRITE_BEHIND_TIMEOUT', 5))
+
+class WriteQueueFull(Exception):
+    """The write was not queued, or not started, within WRITE_TIMEOUT seconds; nothing was stored"""
+
+class WritePending(Exception):
+    """The write was still committing after WRITE_TIMEOUT seconds; it may still be stored"""
+
+class WriteBehindWriter:
+    """
+    Background thread that commits queued INSERT / UPDATE statements in batches.
+
+    Callers get a Future that resolves to the statement's lastrowid once the
+    batch holding it has committed, so a request still only answers after its
+    row is durable, but concurrent requests share one transaction and fsync.
+    A statement that fails only fails its own future.
+    """
+
+    def __init__(self, queue_size=WRITE_QUEUE_SIZE, interval=WRITE_BATCH_INTERVAL,
+                 batch_size=WRITE_BATCH_SIZE, timeout=WRITE_TIMEOUT):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='write-behind', daemon=True)
+                self.thread.start()
+
+    def submit(self, sql, params=()):
+        """
+        Queue a statement.
+
+        Returns:
+            Future: Resolves to the cursor's lastrowid after commit
+
+        Raises:
+            WriteQueueFull: No queue space within the timeout
+        """
+        self.start()
+        future = Future()
+        try:
+            self.queue.put((sql, params, future), timeout=self.timeout)
+        except queue.Full:
+            raise WriteQueueFull(f"{self.queue.qsize()} writes pending")
+        return future
+
+    def next_batch(self):
+        """Block for one write, then gather more until the interval or batch size runs out"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        conn = open_db_connection()
+        try:
+            while True:
+                batch = self.next_batch()
+                stop = batch[-1] is None
+                self.commit_batch(conn, [item for item in batch if item is not None])
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def commit_batch(self, conn, batch):
+        # Writes their callers withdrew after timing out are skipped
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, params, future in batch:
+                # Each statement runs in its own savepoint, so a failed one is
+                # rolled back alone and the rest of the batch goes on. Without
+                # it, one error aborts the whole transaction on PostgreSQL and
+                # the COMMIT silently rolls back the statements that worked.
+                conn.execute("SAVEPOINT write_behind")
+                try:
+                    results.append((future, conn.execute(sql, params).lastrowid, None))
+                except Exception as e:
+                    if not conn.in_transaction:
+                        # The error ended the whole transaction (e.g. OR ROLLBACK)
+                        raise
+                    conn.execute("ROLLBACK TO write_behind")
+                    results.append((future, None, e))
+                conn.execute("RELEASE write_behind")
+            conn.commit()
+        except Exception as e:
+            print(f"Error committing write batch: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for future, lastrowid, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(lastrowid)
+
+    def flush(self):
+        """Wait until everything queued so far has committed"""
+        if self.thread is not None and self.thread.is_alive():
+            self.submit("SELECT 1").result(timeout=self.timeout)
+
+    def stop(self):
+        """Commit the pending writes and stop the thread (runs at exit)"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """This process's writer (forked workers start their own)"""
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = WriteBehindWriter()
+            _writer_pid = os.getpid()
+            atexit.register(_writer.stop)
+        return _writer
+
+def execute_write(sql, params=()):
+    """
+    Run one INSERT / UPDATE and commit it.
+
+    With WRITE_BEHIND enabled the statement goes through the batching writer
+    thread; otherwise it is committed directly on the shared connection.
+
+    Returns:
+        int: lastrowid of the statement
+
+    Raises:
+        WriteQueueFull: Not stored; safe to retry
+        WritePending: Still committing and may be stored; a retry can store it twice
+    """
+    if WRITE_BEHIND_ENABLED:
+        future = get_writer().submit(sql, params)
+        try:
+            return future.result(timeout=WRITE_TIMEOUT)
+        except FutureTimeout:
+            # Withdraw a write the writer hasn't reached yet, so a retry can't duplicate it
+            if future.cancel():
+                raise WriteQueueFull(f"Write not started within {WRITE_TIMEOUT}s")
+            raise WritePending(f"Write still committing after {WRITE_TIMEOUT}s")
+
+    conn = get_db_connection()
+    try:
+        lastrowid = conn.execute(sql, params).lastrowid
+        conn.commit()
+        return lastrowid
+    finally:
+        conn.close()